@@ -0,0 +1,325 @@
+# project_root/batch_tagger.py
+"""Offline tagging of large backlogs through the OpenAI Batch API.
+
+Pending files are moved out of the monitored folder into
+.batch/<job id>/, submitted as one JSONL batch, and handed to the output
+sink (see output_sinks.py; the tagged folder with the usual tag_prefix
+naming by default) once the batch completes. With a job manifest each
+result is recorded there like a live one. Job state lives in
+batch_jobs.json next to settings.json, so polling picks up where it left
+off after a restart.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+from settings_manager import atomic_write_json
+from tagger_engine import scan_ready_files, output_filename_for
+from prompt_builder import combine_prompt, prompt_builder
+from job_manifest import content_hash, DONE, FAILED
+from output_sinks import FileSink
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_FOLDER = ".batch"
+# Batch API limits are 50,000 requests and 200 MB per input file
+MAX_BATCH_REQUESTS = 50000
+MAX_BATCH_BYTES = 190 * 1024 * 1024
+FAILED_STATUSES = ("failed", "expired", "cancelled")
+# Local states for jobs we are finished with
+CLOSED_STATUSES = ("collected",) + FAILED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+def _parse_usage(usage: Optional[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+    """Token usage from a batch response body, in the shape send_text() returns."""
+    if not usage:
+        return None
+    details = usage.get("prompt_tokens_details") or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "total_tokens": usage.get("total_tokens", 0),
+        "cached_tokens": details.get("cached_tokens") or 0,
+    }
+
+class BatchTagger:
+    def __init__(self, settings_manager, openai_interface, criteria_file: str, state_path: Optional[str] = None,
+                 manifest=None, sink=None):
+        self.settings_manager = settings_manager
+        self.openai_interface = openai_interface
+        self.criteria_file = criteria_file
+        self.manifest = manifest
+        self.sink = sink or FileSink()
+        self.state_path = state_path or os.path.join(
+            os.path.dirname(settings_manager.settings_path), "batch_jobs.json"
+        )
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    if isinstance(data, dict) and isinstance(data.get("jobs"), list):
+                        return data
+            except json.JSONDecodeError:
+                logger.warning("Ignoring corrupt batch state file: %s", self.state_path)
+        return {"jobs": []}
+
+    def _save_state(self):
+        atomic_write_json(self.state_path, self.state)
+
+    def open_jobs(self) -> List[Dict[str, Any]]:
+        return [job for job in self.state["jobs"] if job["status"] not in CLOSED_STATUSES]
+
+    def _staging_folder(self, job: Dict[str, Any]) -> str:
+        return os.path.join(job["monitored_folder"], BATCH_FOLDER, job["id"])
+
+    def submit(self, max_files: int = MAX_BATCH_REQUESTS) -> Optional[Dict[str, Any]]:
+        """Submit every settled file in the monitored folder as one batch job.
+
+        Returns the job record, or None if there was nothing to submit.
+        """
+        monitored_folder = self.settings_manager.get("monitored_folder", "")
+        tagged_folder = self.settings_manager.get("tagged_folder", "")
+        prefix = self.settings_manager.get("tag_prefix", "")
+        ready, _ = scan_ready_files(monitored_folder, self.settings_manager.get("watch_settle_seconds", 2))
+
+        criteria_content = prompt_builder.criteria(self.criteria_file)
+
+        lines = []
+        files = {}
+        input_texts = []
+        # Files that couldn't be read stay in the monitored folder; recorded on the job
+        skipped = {}
+        total_bytes = 0
+        for filename, size, _ in ready:
+            if len(lines) >= max_files:
+                break
+            if size == 0:
+                continue
+            output_path = os.path.join(tagged_folder, output_filename_for(filename, prefix))
+            try:
+                with open(os.path.join(monitored_folder, filename), "r", encoding="utf-8") as f:
+                    input_text = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning("Skipping %s: %s", filename, e)
+                skipped[filename] = str(e)
+                continue
+            entry = {"filename": filename, "output_path": output_path, "digest": content_hash(input_text)}
+            if self.sink.exists(entry, self._target(entry)):
+                continue
+            custom_id = str(len(lines))
+            line = json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": self.openai_interface.chat_request_body(combine_prompt(input_text, criteria_content))
+            }, ensure_ascii=False)
+            line_bytes = len(line.encode("utf-8")) + 1
+            if total_bytes + line_bytes > MAX_BATCH_BYTES:
+                break
+            total_bytes += line_bytes
+            lines.append(line)
+            input_texts.append(input_text)
+            files[custom_id] = entry
+
+        if not lines:
+            if skipped:
+                logger.warning("Nothing to submit; %d unreadable files skipped", len(skipped))
+            return None
+
+        # Cost estimate: the shared template plus every input, counted in one batch
+        template_tokens = prompt_builder.template_tokens(
+            self.criteria_file, self.openai_interface.model, self.openai_interface.count_tokens
+        )
+        estimated_prompt_tokens = (template_tokens * len(input_texts)
+                                   + sum(self.openai_interface.count_tokens_batch(input_texts)))
+
+        job = {
+            "id": time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}",
+            "status": "uploading",
+            "created_at": time.time(),
+            "criteria_file": self.criteria_file,
+            "monitored_folder": monitored_folder,
+            "batch_id": None,
+            "estimated_prompt_tokens": estimated_prompt_tokens,
+            "files": files,
+            "skipped": skipped,
+        }
+        # Move the files aside so live tagging and later batches skip them, and
+        # record the job before touching the network so a crash can be recovered
+        staging = self._staging_folder(job)
+        os.makedirs(staging, exist_ok=True)
+        for entry in files.values():
+            os.replace(os.path.join(monitored_folder, entry["filename"]), os.path.join(staging, entry["filename"]))
+        self.state["jobs"].append(job)
+        self._save_state()
+
+        client = self.openai_interface.client
+        try:
+            data = ("\n".join(lines) + "\n").encode("utf-8")
+            upload = client.files.create(file=(f"{job['id']}.jsonl", data), purpose="batch")
+            batch = client.batches.create(
+                input_file_id=upload.id,
+                endpoint=BATCH_ENDPOINT,
+                completion_window="24h"
+            )
+        except Exception as e:
+            job["error"] = str(e)
+            self._close_failed(job, "failed")
+            raise
+        job["input_file_id"] = upload.id
+        job["batch_id"] = batch.id
+        job["status"] = batch.status
+        self._save_state()
+        logger.info("Submitted batch %s with %d files (~%d prompt tokens)", batch.id, len(files),
+                    estimated_prompt_tokens)
+        return job
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Check every open job once, collecting results of completed ones."""
+        client = self.openai_interface.client
+        for job in self.open_jobs():
+            if job["batch_id"] is None:
+                # Crashed between moving files and creating the batch
+                self._close_failed(job, "failed")
+                continue
+            try:
+                batch = client.batches.retrieve(job["batch_id"])
+            except Exception as e:
+                logger.error("Error checking batch %s: %s", job["batch_id"], e)
+                continue
+            job["status"] = batch.status
+            counts = getattr(batch, "request_counts", None)
+            if counts is not None:
+                job["request_counts"] = {
+                    "total": counts.total, "completed": counts.completed, "failed": counts.failed
+                }
+            if batch.status == "completed":
+                self._collect(job, batch)
+            elif batch.status in FAILED_STATUSES:
+                self._close_failed(job, batch.status)
+            else:
+                self._save_state()
+        return self.state["jobs"]
+
+    def run(self, poll_interval: float = 60, stop_event=None):
+        """Submit the current backlog and poll until every open job is finished."""
+        self.submit()
+        while self.open_jobs():
+            self.poll()
+            if not self.open_jobs():
+                break
+            if stop_event is not None:
+                if stop_event.wait(poll_interval):
+                    return
+            else:
+                time.sleep(poll_interval)
+
+    def _target(self, entry: Dict[str, Any]) -> Dict[str, str]:
+        return {"criteria_file": self.criteria_file, "output_path": entry["output_path"]}
+
+    def _save_result(self, job: Dict[str, Any], entry: Dict[str, Any], body: Dict[str, Any]):
+        """Write one result through the sink and record it in the manifest, as process_file does."""
+        staged_path = os.path.join(self._staging_folder(job), entry["filename"])
+        if not entry.get("digest"):
+            # Jobs submitted before digests were kept
+            with open(staged_path, "r", encoding="utf-8") as f:
+                entry["digest"] = content_hash(f.read())
+        input_path = os.path.join(job["monitored_folder"], entry["filename"])
+        response = {
+            "content": body["choices"][0]["message"]["content"],
+            "model": body.get("model"),
+            "usage": _parse_usage(body.get("usage")),
+        }
+        # Batch turnaround stands in for request latency
+        latency = time.time() - job["created_at"]
+        self.sink.write(dict(entry, input_path=input_path), self._target(entry), response, latency)
+        if self.manifest:
+            self.manifest.finish(input_path, entry["digest"], DONE, latency, response["usage"],
+                                 filename=entry["filename"], output_path=entry["output_path"])
+
+    def _record_failure(self, job: Dict[str, Any], entry: Dict[str, Any]):
+        if self.manifest and entry.get("digest"):
+            self.manifest.finish(os.path.join(job["monitored_folder"], entry["filename"]), entry["digest"], FAILED,
+                                 error=entry["error"], filename=entry["filename"], output_path=entry["output_path"])
+
+    def _collect(self, job: Dict[str, Any], batch):
+        client = self.openai_interface.client
+        done = 0
+        # Successful requests land in the output file; requests that failed
+        # (e.g. validation errors or expired requests) in the error file
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if file_id:
+                done += self._collect_file(job, client.files.content(file_id).text)
+        job["status"] = "collected"
+        # Anything without a result goes back to the monitored folder for another try
+        self._restore_files(job)
+        self._save_state()
+        logger.info("Batch %s collected: %d of %d files tagged", job["batch_id"], done, len(job["files"]))
+
+    def _collect_file(self, job: Dict[str, Any], text: str) -> int:
+        """Save the results in one batch output or error file. Returns how many files were tagged."""
+        staging = self._staging_folder(job)
+        done = 0
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            entry = job["files"].get(record.get("custom_id"))
+            if entry is None or entry.get("done"):
+                continue
+            response = record.get("response") or {}
+            body = response.get("body") or {}
+            choices = body.get("choices") or []
+            if response.get("status_code") != 200 or not choices:
+                entry["error"] = json.dumps(record.get("error") or body.get("error"))
+                self._record_failure(job, entry)
+                continue
+            try:
+                self._save_result(job, entry, body)
+            except Exception as e:
+                # The file goes back to the monitored folder in _restore_files()
+                logger.error("Error saving batch result for %s: %s", entry["filename"], e)
+                entry["error"] = str(e)
+                continue
+            entry["done"] = True
+            done += 1
+            # Delete the source file after successful processing
+            try:
+                os.remove(os.path.join(staging, entry["filename"]))
+            except OSError as e:
+                logger.error("Error deleting file %s: %s", entry["filename"], e)
+        return done
+
+    def _close_failed(self, job: Dict[str, Any], status: str):
+        job["status"] = status
+        self._restore_files(job)
+        self._save_state()
+        logger.warning("Batch %s %s; files returned to the monitored folder", job.get("batch_id") or job["id"], status)
+
+    def _restore_files(self, job: Dict[str, Any]):
+        monitored_folder = job["monitored_folder"]
+        staging = self._staging_folder(job)
+        for entry in job["files"].values():
+            if entry.get("done"):
+                continue
+            staged_path = os.path.join(staging, entry["filename"])
+            target = os.path.join(monitored_folder, entry["filename"])
+            if not os.path.exists(staged_path):
+                continue
+            if os.path.exists(target):
+                # Keep both, as file leases do; the suffix keeps the old one out of the scan
+                target = f"{target}.returned-{time.strftime('%Y%m%d-%H%M%S')}"
+                logger.warning("A newer %s exists; returning the batch file as %s", entry["filename"], target)
+            try:
+                os.replace(staged_path, target)
+            except OSError as e:
+                logger.error("Error returning %s: %s", entry["filename"], e)
+        try:
+            os.rmdir(staging)
+        except OSError:
+            pass
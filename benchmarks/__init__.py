@@ -0,0 +1 @@
+# project_root/benchmarks/__init__.py
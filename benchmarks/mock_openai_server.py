@@ -0,0 +1,294 @@
+# project_root/benchmarks/mock_openai_server.py
+"""Local stand-in for the OpenAI endpoints the app uses.
+
+Serves chat completions (plain and streamed), the model list and the
+files/batches endpoints used by batch mode, with configurable latency,
+jitter, 429 rate and completion size. Point the app at it with the
+api_base_url setting, e.g. http://127.0.0.1:8765/v1.
+
+    python -m benchmarks.mock_openai_server --port 8765 --latency 0.2 --rate-429 0.05
+"""
+
+import argparse
+import email.parser
+import email.policy
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+MODELS = ["gpt-4", "gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"]
+
+class MockConfig:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, rate_429: float = 0.0,
+                 completion_tokens: int = 50, retry_after_ms: int = 200, batch_delay: float = 1.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.completion_tokens = completion_tokens
+        self.retry_after_ms = retry_after_ms
+        self.batch_delay = batch_delay
+        self.random = random.Random(seed)
+
+def _completion_text(tokens: int) -> str:
+    # Roughly one token per word
+    return "Tags: " + " ".join(f"tag{i % 50}" for i in range(max(1, tokens - 2)))
+
+def _prompt_tokens(messages) -> int:
+    return sum(len(m.get("content") or "") // 4 + 4 for m in messages)
+
+def _completion(body: Dict[str, Any], config: MockConfig) -> Dict[str, Any]:
+    prompt_tokens = _prompt_tokens(body.get("messages", []))
+    completion_tokens = min(config.completion_tokens, body.get("max_tokens") or config.completion_tokens)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", MODELS[0]),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": _completion_text(completion_tokens)},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    }
+
+class MockState:
+    """Counters and stored files/batches, shared by all handler threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"requests": self.requests, "rate_limited": self.rate_limited}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: MockConfig
+    state: MockState
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _delay(self):
+        config = self.config
+        delay = config.latency + (config.random.uniform(-config.jitter, config.jitter) if config.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [
+                {"id": m, "object": "model", "created": 0, "owned_by": "mock"} for m in MODELS
+            ]})
+        elif path.startswith("/v1/batches/"):
+            self._get_batch(path.rsplit("/", 1)[1])
+        elif path.startswith("/v1/files/") and path.endswith("/content"):
+            file_id = path.split("/")[3]
+            with self.state.lock:
+                data = self.state.files.get(file_id)
+            if data is None:
+                self._send_json(404, {"error": {"message": "No such file", "type": "invalid_request_error"}})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif path == "/stats":
+            self._send_json(200, self.state.stats())
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        raw = self._read_body()
+        if path == "/v1/chat/completions":
+            self._chat(json.loads(raw or b"{}"))
+        elif path == "/v1/files":
+            self._create_file(raw)
+        elif path == "/v1/batches":
+            self._create_batch(json.loads(raw or b"{}"))
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def _chat(self, body: Dict[str, Any]):
+        config = self.config
+        with self.state.lock:
+            self.state.requests += 1
+            limited = config.rate_429 > 0 and config.random.random() < config.rate_429
+            if limited:
+                self.state.rate_limited += 1
+        if limited:
+            self._send_json(429, {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error",
+                                            "code": "rate_limit_exceeded"}},
+                            headers={"retry-after-ms": str(config.retry_after_ms)})
+            return
+        self._delay()
+        result = _completion(body, config)
+        if not body.get("stream"):
+            self._send_json(200, result)
+            return
+
+        # Server-sent events, one chunk per word, then an optional usage chunk
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        base = {"id": result["id"], "object": "chat.completion.chunk", "created": result["created"],
+                "model": result["model"]}
+        words = result["choices"][0]["message"]["content"].split(" ")
+        for i, word in enumerate(words):
+            delta = {"content": word if i == 0 else " " + word}
+            self._send_event(dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": None}]))
+        self._send_event(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self._send_event(dict(base, choices=[], usage=result["usage"]))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _send_event(self, data: Dict[str, Any]):
+        self.wfile.write(b"data: " + json.dumps(data).encode("utf-8") + b"\n\n")
+
+    def _create_file(self, raw: bytes):
+        # multipart/form-data with a "file" part
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            b"Content-Type: " + self.headers.get("Content-Type", "").encode("latin-1") + b"\r\n\r\n" + raw
+        )
+        data = b""
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                data = part.get_payload(decode=True) or b""
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        with self.state.lock:
+            self.state.files[file_id] = data
+        self._send_json(200, {"id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                              "filename": "input.jsonl", "purpose": "batch", "status": "processed"})
+
+    def _create_batch(self, body: Dict[str, Any]):
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        batch = {
+            "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"),
+            "input_file_id": body.get("input_file_id"), "completion_window": body.get("completion_window", "24h"),
+            "status": "validating", "created_at": int(time.time()), "output_file_id": None, "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        with self.state.lock:
+            self.state.batches[batch_id] = dict(batch, _ready_at=time.time() + self.config.batch_delay)
+        self._send_json(200, batch)
+
+    def _get_batch(self, batch_id: str):
+        with self.state.lock:
+            batch = self.state.batches.get(batch_id)
+            if batch is None:
+                self._send_json(404, {"error": {"message": "No such batch", "type": "invalid_request_error"}})
+                return
+            if batch["status"] != "completed" and time.time() >= batch["_ready_at"]:
+                self._complete_batch(batch)
+            elif batch["status"] == "validating":
+                batch["status"] = "in_progress"
+            public = {k: v for k, v in batch.items() if not k.startswith("_")}
+        self._send_json(200, public)
+
+    def _complete_batch(self, batch: Dict[str, Any]):
+        """Answer every request in the batch input file. Caller holds state.lock."""
+        lines = self.state.files.get(batch["input_file_id"], b"").decode("utf-8").splitlines()
+        output = []
+        for line in lines:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            output.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "request_id": uuid.uuid4().hex,
+                             "body": _completion(request["body"], self.config)},
+                "error": None,
+            }))
+        output_id = f"file-{uuid.uuid4().hex[:12]}"
+        self.state.files[output_id] = ("\n".join(output) + "\n").encode("utf-8")
+        batch.update(status="completed", output_file_id=output_id, completed_at=int(time.time()),
+                     request_counts={"total": len(output), "completed": len(output), "failed": 0})
+
+class MockOpenAIServer:
+    """Runs the mock on a background thread; use as a context manager."""
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self.state = MockState()
+        handler = type("MockHandler", (_Handler,), {"config": self.config, "state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.mock_openai_server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds added to the latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--completion-tokens", type=int, default=50)
+    parser.add_argument("--batch-delay", type=float, default=1.0, help="seconds until a batch completes")
+    args = parser.parse_args(argv)
+    config = MockConfig(args.latency, args.jitter, args.rate_429, args.completion_tokens,
+                        batch_delay=args.batch_delay)
+    server = MockOpenAIServer(config, port=args.port)
+    print(f"Mock OpenAI API on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+# project_root/benchmarks/run.py
+"""Benchmark suite for the tagger, batch tagging, the folder scan, splitting, token counting and settings writes.
+
+Run from the project root:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --scenarios scan tagger --files 10 1000 100000 --latency 0.3 --rate-429 0.05
+
+Nothing talks to api.openai.com: the tagger and batch scenarios run
+against the local mock server. Results are printed and saved as JSON under
+benchmarks/results/ so runs can be compared across commits. Scenarios
+whose optional dependencies are missing are recorded as skipped.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.mock_openai_server import MockConfig, MockOpenAIServer
+from benchmarks.synthetic import document, make_monitored_folder, write_criteria
+
+SCENARIOS = ["scan", "tagger", "batch", "split", "tokens", "settings"]
+
+def _timed(fn: Callable[[], Any], repeat: int = 3) -> Dict[str, float]:
+    """Run fn repeat times; min and median wall time in seconds."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return {"min_s": min(times), "median_s": statistics.median(times)}
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100.0 * (len(values) - 1))))]
+
+def _skipped(e: ImportError) -> Dict[str, str]:
+    return {"skipped": f"missing dependency: {e.name or e}"}
+
+def bench_scan(args, workdir: str) -> List[Dict[str, Any]]:
+    """Cost of scan_ready_files over monitored folders of different sizes."""
+    from tagger_engine import scan_ready_files
+    results = []
+    for count in args.files:
+        folder = os.path.join(workdir, f"scan_{count}")
+        make_monitored_folder(folder, count, max_chars=1000)
+        timing = _timed(lambda: scan_ready_files(folder, settle_seconds=2), args.repeat)
+        results.append(dict(files=count, **timing, files_per_s=count / timing["median_s"]))
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+def bench_tagger(args, workdir: str) -> List[Dict[str, Any]]:
+    """End-to-end files per second: scan, combine, send to the mock, write, delete."""
+    try:
+        from openai_interface import OpenAIInterface
+        from settings_manager import SettingsManager
+        from tagger_engine import TaggerEngine
+        from tagger_cli import drain
+        from output_sinks import create_sink
+    except ImportError as e:
+        return [_skipped(e)]
+
+    config = MockConfig(args.latency, args.jitter, args.rate_429, args.completion_tokens, seed=args.seed)
+    results = []
+    with MockOpenAIServer(config) as server:
+        for count in args.tagger_files:
+            run_dir = os.path.join(workdir, f"tagger_{count}")
+            monitored = os.path.join(run_dir, "monitored")
+            tagged = os.path.join(run_dir, "tagged")
+            os.makedirs(tagged)
+            input_bytes = make_monitored_folder(monitored, count, seed=args.seed)
+            criteria_file = write_criteria(os.path.join(run_dir, "criteria.md"))
+
+            settings_manager = SettingsManager(os.path.join(run_dir, "settings.json"), write_delay=0)
+            with settings_manager.transaction():
+                settings_manager.set("monitored_folder", monitored)
+                settings_manager.set("tagged_folder", tagged)
+                settings_manager.set("response_cache_enabled", False)
+                settings_manager.set("job_manifest_enabled", False)
+                settings_manager.set("api_base_url", server.base_url)
+                settings_manager.set("queue_policy", args.queue_policy)
+                settings_manager.set("output_sink", args.output_sink)
+            openai_interface = OpenAIInterface.from_settings(settings_manager, "sk-mock")
+            sink = create_sink(settings_manager)
+
+            file_started = {}
+            latencies = []
+            # From the start of the run until each file is done; what queue ordering improves
+            times_to_tag = []
+            lock = threading.Lock()
+
+            def on_started(filename):
+                with lock:
+                    file_started[filename] = time.perf_counter()
+
+            def on_finished(filename, success, message):
+                with lock:
+                    finished = time.perf_counter()
+                    latencies.append(finished - file_started.pop(filename))
+                    times_to_tag.append(finished - started)
+
+            engine = TaggerEngine(settings_manager, openai_interface, criteria_file,
+                                  concurrency=args.concurrency, queue_size=max(100, args.concurrency * 4),
+                                  sink=sink, on_file_started=on_started, on_file_finished=on_finished)
+            requests_before = server.state.stats()
+            started = time.perf_counter()  # read by on_finished
+            engine.start()
+            try:
+                drain(engine, monitored, threading.Event())
+            finally:
+                engine.stop()
+                engine.wait_idle(timeout=60)
+                sink.close()
+                openai_interface.close()
+            elapsed = time.perf_counter() - started
+            requests_after = server.state.stats()
+
+            stats = engine.stats()
+            results.append({
+                "files": count,
+                "input_bytes": input_bytes,
+                "concurrency": args.concurrency,
+                "queue_policy": args.queue_policy,
+                "output_sink": args.output_sink,
+                "elapsed_s": elapsed,
+                "files_per_s": stats["done"] / elapsed if elapsed else 0.0,
+                "done": stats["done"],
+                "failed": stats["failed"],
+                "file_p50_s": _percentile(latencies, 50) if latencies else None,
+                "file_p95_s": _percentile(latencies, 95) if latencies else None,
+                "time_to_tag_p50_s": _percentile(times_to_tag, 50) if times_to_tag else None,
+                "api_requests": requests_after["requests"] - requests_before["requests"],
+                "api_rate_limited": requests_after["rate_limited"] - requests_before["rate_limited"],
+            })
+            shutil.rmtree(run_dir, ignore_errors=True)
+    return results
+
+def bench_batch(args, workdir: str) -> List[Dict[str, Any]]:
+    """Batch API round trip against the mock: stage and submit, poll, collect through the sink."""
+    try:
+        from openai_interface import OpenAIInterface
+        from settings_manager import SettingsManager
+        from batch_tagger import BatchTagger
+        from output_sinks import create_sink
+        from tagger_engine import scan_ready_files
+    except ImportError as e:
+        return [_skipped(e)]
+
+    config = MockConfig(args.latency, args.jitter, completion_tokens=args.completion_tokens,
+                        batch_delay=args.batch_delay, seed=args.seed)
+    results = []
+    with MockOpenAIServer(config) as server:
+        for count in args.tagger_files:
+            run_dir = os.path.join(workdir, f"batch_{count}")
+            monitored = os.path.join(run_dir, "monitored")
+            tagged = os.path.join(run_dir, "tagged")
+            os.makedirs(tagged)
+            input_bytes = make_monitored_folder(monitored, count, seed=args.seed)
+            criteria_file = write_criteria(os.path.join(run_dir, "criteria.md"))
+
+            settings_manager = SettingsManager(os.path.join(run_dir, "settings.json"), write_delay=0)
+            with settings_manager.transaction():
+                settings_manager.set("monitored_folder", monitored)
+                settings_manager.set("tagged_folder", tagged)
+                settings_manager.set("watch_settle_seconds", 0)
+                settings_manager.set("response_cache_enabled", False)
+                settings_manager.set("api_base_url", server.base_url)
+                settings_manager.set("output_sink", args.output_sink)
+            openai_interface = OpenAIInterface.from_settings(settings_manager, "sk-mock")
+            sink = create_sink(settings_manager)
+            batch_tagger = BatchTagger(settings_manager, openai_interface, criteria_file, sink=sink)
+
+            started = time.perf_counter()
+            try:
+                job = batch_tagger.submit()
+                submitted = time.perf_counter() - started
+                while batch_tagger.open_jobs():
+                    time.sleep(0.1)
+                    batch_tagger.poll()
+            finally:
+                sink.close()
+                openai_interface.close()
+            elapsed = time.perf_counter() - started
+
+            tagged_files = sum(1 for entry in (job or {}).get("files", {}).values() if entry.get("done"))
+            results.append({
+                "files": count,
+                "input_bytes": input_bytes,
+                "output_sink": args.output_sink,
+                "submit_s": submitted,
+                "elapsed_s": elapsed,
+                "tagged": tagged_files,
+                # Files whose result failed go back to the monitored folder
+                "left_over": len(scan_ready_files(monitored)[0]),
+            })
+            shutil.rmtree(run_dir, ignore_errors=True)
+    return results
+
+def bench_split(args, workdir: str) -> List[Dict[str, Any]]:
+    """save_and_split: splitting a response and writing every part atomically."""
+    from text_splitter import SplitWriter, count_parts, iter_parts
+    rng = random.Random(args.seed)
+    results = []
+    for parts in args.split_parts:
+        delimiter = "\n---\n"
+        text = delimiter.join(document(rng, 400) for _ in range(min(parts, 200)))
+        # Repeat the generated parts up to the requested count
+        sections = text.split(delimiter)
+        text = delimiter.join(sections[i % len(sections)] for i in range(parts))
+
+        def run():
+            folder = tempfile.mkdtemp(dir=workdir)
+            writer = SplitWriter(folder, "response", "SPLIT", fsync_batch=args.fsync_batch)
+            result = writer.write(iter_parts(text, delimiter), total=count_parts(text, delimiter))
+            assert "error" not in result, result
+            shutil.rmtree(folder, ignore_errors=True)
+
+        timing = _timed(run, args.repeat)
+        results.append(dict(parts=parts, chars=len(text), fsync_batch=args.fsync_batch, **timing,
+                            parts_per_s=parts / timing["median_s"]))
+    return results
+
+def bench_tokens(args, workdir: str) -> List[Dict[str, Any]]:
+    """The Text Input token counter: first count, and recount after a one-character edit."""
+    try:
+        import tiktoken
+        from ui.token_counter import BlockTokenCounter, split_blocks
+    except ImportError as e:
+        return [_skipped(e)]
+    from tokenizer_service import tokenizer_service
+    encoding = tiktoken.encoding_for_model("gpt-4")
+    rng = random.Random(args.seed)
+    results = []
+    for chars in args.token_chars:
+        text = document(rng, chars)
+        full = _timed(lambda: encoding.encode(text, disallowed_special=()), args.repeat)
+
+        blocks, _ = split_blocks(text)
+        serial = _timed(lambda: [encoding.encode(block, disallowed_special=()) for block in blocks], args.repeat)
+
+        def batched():
+            tokenizer_service.clear()
+            tokenizer_service.count_batch(blocks, "gpt-4")
+        batch = _timed(batched, args.repeat)
+
+        tokenizer_service.clear()
+        counter = BlockTokenCounter("gpt-4")
+        started = time.perf_counter()
+        tokens = counter.count(text)
+        cold = time.perf_counter() - started
+        edits = []
+        for i in range(args.repeat):
+            edited = text + "x" * (i + 1)
+            started = time.perf_counter()
+            counter.count(edited)
+            edits.append(time.perf_counter() - started)
+        results.append({
+            "chars": len(text),
+            "tokens": tokens,
+            "full_encode_s": full["median_s"],
+            "blocks": len(blocks),
+            "blocks_serial_s": serial["median_s"],
+            "blocks_encode_batch_s": batch["median_s"],
+            "block_counter_cold_s": cold,
+            "block_counter_edit_s": statistics.median(edits),
+        })
+    return results
+
+def bench_settings(args, workdir: str) -> List[Dict[str, Any]]:
+    """Overhead of settings_manager.set(): immediate writes vs. write-behind plus flush."""
+    from settings_manager import SettingsManager
+    results = []
+    for write_delay in (0, 1.0):
+        path = os.path.join(workdir, f"settings_{write_delay}.json")
+        settings_manager = SettingsManager(path, write_delay=write_delay)
+        started = time.perf_counter()
+        for i in range(args.settings_writes):
+            # The kind of update the UI makes on every keystroke
+            settings_manager.set("input_text", f"draft {i}")
+        set_elapsed = time.perf_counter() - started
+        settings_manager.flush()
+        total = time.perf_counter() - started
+        results.append({
+            "write_delay": write_delay,
+            "sets": args.settings_writes,
+            "per_set_ms": set_elapsed * 1000 / args.settings_writes,
+            "total_with_flush_s": total,
+        })
+    return results
+
+BENCHMARKS = {
+    "scan": bench_scan,
+    "tagger": bench_tagger,
+    "batch": bench_batch,
+    "split": bench_split,
+    "tokens": bench_tokens,
+    "settings": bench_settings,
+}
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Run the benchmark suite.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--files", nargs="+", type=int, default=[10, 1000, 10000],
+                        help="monitored folder sizes for the scan (up to 100000)")
+    parser.add_argument("--tagger-files", nargs="+", type=int, default=[10, 200],
+                        help="files tagged end to end against the mock server")
+    parser.add_argument("--concurrency", type=int, default=4, help="tagger workers")
+    parser.add_argument("--output-sink", default="files", help="tagger output (see output_sinks.SINK_TYPES)")
+    parser.add_argument("--queue-policy", default="fifo", help="tagger queue order (see scheduling.POLICIES)")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.02, help="mock +/- latency jitter")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of mock requests answered with 429")
+    parser.add_argument("--completion-tokens", type=int, default=50, help="mock completion length")
+    parser.add_argument("--batch-delay", type=float, default=0.5, help="mock seconds until a batch completes")
+    parser.add_argument("--split-parts", nargs="+", type=int, default=[100, 5000])
+    parser.add_argument("--fsync-batch", type=int, default=200)
+    parser.add_argument("--token-chars", nargs="+", type=int, default=[10000, 1000000])
+    parser.add_argument("--settings-writes", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "results"),
+                        help="folder for the JSON results")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": vars(args),
+        "results": {},
+    }
+    workdir = tempfile.mkdtemp(prefix="tagger-bench-")
+    try:
+        for name in args.scenarios:
+            print(f"Running {name}...")
+            started = time.perf_counter()
+            try:
+                report["results"][name] = BENCHMARKS[name](args, workdir)
+            except Exception as e:
+                report["results"][name] = [{"error": str(e)}]
+            for row in report["results"][name]:
+                print("  " + ", ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in row.items()))
+            print(f"  ({time.perf_counter() - started:.1f}s)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# project_root/benchmarks/synthetic.py
+"""Synthetic inputs for the benchmarks: markdown documents and monitored folders."""
+
+import os
+import random
+from typing import Optional
+
+_WORDS = (
+    "tagger criteria folder document section summary analysis market growth risk revenue "
+    "customer product release quarter team report policy security model latency token "
+    "batch queue worker result output input review budget forecast strategy"
+).split()
+
+def paragraph(rng: random.Random, words: int = 60) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+def document(rng: random.Random, target_chars: int) -> str:
+    """Markdown with headings, paragraphs and lists, roughly target_chars long."""
+    parts = []
+    size = 0
+    section = 0
+    while size < target_chars:
+        if len(parts) % 6 == 0:
+            section += 1
+            block = f"## Section {section}"
+        elif len(parts) % 6 == 3:
+            block = "\n".join(f"- {paragraph(rng, 8)}" for _ in range(4))
+        else:
+            block = paragraph(rng, rng.randint(40, 120))
+        parts.append(block)
+        size += len(block) + 2
+    return "\n\n".join(parts)
+
+def make_monitored_folder(folder: str, count: int, min_chars: int = 500, max_chars: int = 4000,
+                          seed: int = 0, mtime: Optional[float] = None) -> int:
+    """Fill folder with count .md/.txt files. Returns the total number of bytes written.
+
+    Files are backdated to mtime (default: an hour ago) so they are settled
+    for the tagger's scan. Identical texts are reused across files to keep
+    generating 100k files quick.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    templates = [document(rng, rng.randint(min_chars, max_chars)) for _ in range(min(count, 64))]
+    if mtime is None:
+        mtime = os.path.getmtime(folder) - 3600
+    total = 0
+    for i in range(count):
+        text = templates[i % len(templates)] + f"\n\nDocument {i}\n"
+        path = os.path.join(folder, f"doc_{i:06d}{'.md' if i % 2 == 0 else '.txt'}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.utime(path, (mtime, mtime))
+        total += len(text)
+    return total
+
+def write_criteria(path: str, criteria_count: int = 12) -> str:
+    lines = ["# Tagging criteria", "", "Tag the text with every label below that applies:", ""]
+    lines += [f"- label_{i}: the text discusses {_WORDS[i % len(_WORDS)]}" for i in range(criteria_count)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
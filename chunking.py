@@ -0,0 +1,186 @@
+# project_root/chunking.py
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from config import REDUCE_FORMAT, MAX_TOKENS, MODEL_CONTEXT_WINDOWS, DEFAULT_CONTEXT_WINDOW
+from prompt_builder import combine_prompt
+
+REDUCE_MODES = ["concatenate", "merge"]
+
+# Room for the system message and chat formatting around the prompt
+MESSAGE_OVERHEAD_TOKENS = 100
+
+_BLOCK_SEPARATOR = re.compile(r"\n\s*\n")
+_HEADING = re.compile(r"^#{1,6}\s")
+
+def _split_oversized(block: str, max_tokens: int, count_tokens: Callable[[str], int]) -> List[str]:
+    """Split a single block that exceeds max_tokens, by lines and then by characters."""
+    pieces = []
+    current = []
+    current_tokens = 0
+    for line in block.split("\n"):
+        tokens = count_tokens(line) + 1
+        if tokens > max_tokens:
+            if current:
+                pieces.append("\n".join(current))
+                current, current_tokens = [], 0
+            # No natural boundary left; cut the line into roughly budget-sized slices
+            step = max(1, len(line) * max_tokens // tokens)
+            while count_tokens(line[:step]) > max_tokens and step > 1:
+                step //= 2
+            pieces.extend(line[i:i + step] for i in range(0, len(line), step))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += tokens
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+def split_into_chunks(text: str, max_tokens: int, count_tokens: Callable[[str], int],
+                      count_batch: Optional[Callable[[List[str]], List[int]]] = None) -> List[str]:
+    """Split text into chunks of at most max_tokens on paragraph boundaries.
+
+    A markdown heading starts a new chunk once the current one is at least
+    half full, so sections tend to stay together. With count_batch all
+    blocks are counted in one call.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n\n".join(current))
+        current, current_tokens = [], 0
+
+    blocks = [block for block in _BLOCK_SEPARATOR.split(text.strip()) if block.strip()]
+    block_tokens = count_batch(blocks) if count_batch else [count_tokens(block) for block in blocks]
+    for block, tokens in zip(blocks, block_tokens):
+        tokens += 1  # +1 for the blank line joining blocks
+        if tokens > max_tokens:
+            flush()
+            chunks.extend(_split_oversized(block, max_tokens, count_tokens))
+            continue
+        starts_section = _HEADING.match(block) is not None
+        if current and (current_tokens + tokens > max_tokens
+                        or (starts_section and current_tokens >= max_tokens // 2)):
+            flush()
+        current.append(block)
+        current_tokens += tokens
+    flush()
+    return chunks
+
+def context_window(model: str) -> int:
+    """Context window of a model, by the longest matching name prefix."""
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+def prompt_budget(model: str) -> int:
+    """Prompt tokens that fit in one request next to the response reserve."""
+    return context_window(model) - MAX_TOKENS - MESSAGE_OVERHEAD_TOKENS
+
+def merge_usage(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Sum the token usage of several results."""
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached_tokens": 0}
+    for result in results:
+        for key in usage:
+            usage[key] += (result.get("usage") or {}).get(key) or 0
+    return usage
+
+class Chunker:
+    """Tags inputs that are too large for one request by map-reduce over token-budgeted chunks.
+
+    Each chunk is combined with the criteria and sent concurrently. The
+    partial results are then either concatenated in order or merged by
+    one more request (reduce_mode "merge"). With max_prompt_tokens 0 the
+    budget is the model's context window less the response reserve, so only
+    inputs the model couldn't take in one request are split.
+    """
+
+    def __init__(self, max_prompt_tokens: int = 0, reduce_mode: str = "concatenate", max_workers: int = 4):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.reduce_mode = reduce_mode if reduce_mode in REDUCE_MODES else "concatenate"
+        self.max_workers = max(1, int(max_workers))
+
+    @classmethod
+    def from_settings(cls, settings_manager):
+        """Build a chunker from the app settings, or None if chunking is disabled."""
+        if not settings_manager.get("chunking_enabled", True):
+            return None
+        return cls(
+            max_prompt_tokens=settings_manager.get("chunk_max_tokens", 0),
+            reduce_mode=settings_manager.get("chunk_reduce_mode", "concatenate"),
+            max_workers=settings_manager.get("chunk_concurrency", 4)
+        )
+
+    def prompt_budget(self, model: str) -> int:
+        """The configured chunk size, or what the model's context window allows."""
+        return self.max_prompt_tokens or prompt_budget(model)
+
+    def split(self, openai_interface, input_text: str, criteria_content: str,
+              template_tokens: Optional[int] = None) -> List[str]:
+        """Input chunks that each fit the prompt budget together with the criteria.
+
+        template_tokens is the token count of the prompt without input text,
+        if the caller already knows it. Returns a single chunk (the whole
+        input) if it fits as is.
+        """
+        max_prompt_tokens = self.prompt_budget(openai_interface.model)
+        count_tokens = openai_interface.count_tokens
+        overhead = template_tokens
+        if overhead is None:
+            overhead = count_tokens(combine_prompt("", criteria_content))
+        if overhead + count_tokens(input_text.strip()) <= max_prompt_tokens:
+            return [input_text]
+        # Leave at least a small budget for the text even if the criteria are huge
+        budget = max(max_prompt_tokens - overhead, 256)
+        return split_into_chunks(input_text, budget, count_tokens,
+                                 getattr(openai_interface, "count_tokens_batch", None))
+
+    def tag(self, openai_interface, input_text: str, criteria_content: str,
+            template_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Tag input_text against the criteria, chunking it if it is over budget."""
+        chunks = self.split(openai_interface, input_text, criteria_content, template_tokens)
+        prompts = [combine_prompt(chunk, criteria_content) for chunk in chunks]
+        if len(prompts) == 1:
+            return openai_interface.send_text(prompts[0])
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(prompts))) as executor:
+            results = list(executor.map(openai_interface.send_text, prompts))
+
+        errors = [(i, r) for i, r in enumerate(results) if "error" in r]
+        if errors:
+            i, first = errors[0]
+            return {
+                "error": f"Chunk {i + 1} of {len(results)}: {first['error']}",
+                "retryable": any(r.get("retryable") for _, r in errors)
+            }
+
+        if self.reduce_mode == "merge":
+            partial_results = "\n\n".join(
+                f"--- Part {i + 1} of {len(results)} ---\n{r['content']}" for i, r in enumerate(results)
+            )
+            merged = openai_interface.send_text(REDUCE_FORMAT.format(
+                chunk_count=len(results),
+                partial_results=partial_results,
+                criteria_content=criteria_content.strip()
+            ))
+            if "error" in merged:
+                return merged
+            merged["usage"] = merge_usage(results + [merged])
+            merged["chunks"] = len(results)
+            return merged
+
+        return {
+            "content": "\n\n".join(r["content"] for r in results),
+            "finish_reason": results[-1].get("finish_reason"),
+            "model": results[-1].get("model"),
+            "usage": merge_usage(results),
+            "chunks": len(results)
+        }
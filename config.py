@@ -1,9 +1,50 @@
 # project_root/config.py
 
+# The criteria come first so that the system message and criteria form a
+# prefix shared by every request for the same criteria file, which the API
+# can serve from its prompt cache; only the text after it varies per file.
 COMBINE_FORMAT = """
+===CRITERIA===
+{criteria_content}
+
 ===TEXT===
 {input_text}
+"""
 
+# Used to merge the per-chunk results of an input that was too long for one request
+REDUCE_FORMAT = """
 ===CRITERIA===
 {criteria_content}
+
+The text was too long to analyze at once, so it was split into {chunk_count} parts and each part was analyzed separately.
+Merge the partial results below into a single result for the whole text, following the criteria.
+
+===PARTIAL RESULTS===
+{partial_results}
 """
+
+SYSTEM_MESSAGE = "You are a helpful assistant analyzing text based on provided criteria."
+
+# Tokens reserved for the response in every request (the max_tokens parameter)
+MAX_TOKENS = 2000
+
+# Context window (prompt + response tokens) by model name prefix; the longest
+# matching prefix wins. Unknown models get DEFAULT_CONTEXT_WINDOW.
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-5": 400000,
+    "gpt-4.1": 1047576,
+    "gpt-4o": 128000,
+    "chatgpt-4o": 128000,
+    "gpt-4.5": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-1106": 128000,
+    "gpt-4-0125": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo-instruct": 4096,
+    "gpt-3.5-turbo": 16385,
+    "o1": 200000,
+    "o3": 200000,
+    "o4": 200000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
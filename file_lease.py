@@ -0,0 +1,226 @@
+# project_root/file_lease.py
+"""Claiming monitored files so several taggers can share one folder.
+
+Before a file is tagged it is renamed into this worker's own folder,
+<monitored folder>/.inprogress/<worker id>/. A rename is atomic, so when
+two processes (or machines on the same share) go for the same file exactly
+one of them gets it; the other sees it vanish and moves on. Failed files
+are renamed back for a later attempt, tagged ones are deleted from there.
+If a new file of the same name has appeared meanwhile, the returned one is
+renamed to <name>.returned-<time> beside it, which the scan ignores.
+
+Each worker touches a heartbeat file in its folder while it holds files.
+A worker whose heartbeat is older than lease_seconds is presumed dead and
+any other worker moves its files back into the monitored folder. Heartbeat
+ages are compared against the reclaiming worker's own heartbeat, so both
+timestamps come from the same filesystem clock.
+
+The worker id defaults to the host name plus a hash of the install path,
+so a restarted tagger finds its own folder and takes its files back right
+away. Set lease_worker_id to run several taggers from one install on one
+machine.
+"""
+
+import hashlib
+import os
+import socket
+import threading
+import time
+from typing import Dict, Optional, Set
+
+LEASE_FOLDER = ".inprogress"
+HEARTBEAT_FILE = ".heartbeat"
+
+def _default_worker_id() -> str:
+    install_path = os.path.dirname(os.path.abspath(__file__))
+    return f"{socket.gethostname()}-{hashlib.sha1(install_path.encode('utf-8')).hexdigest()[:8]}"
+
+class FileLeases:
+    """Atomic claims on monitored files, with heartbeats and reclaiming of expired leases."""
+
+    def __init__(self, monitored_folder: str, worker_id: Optional[str] = None, lease_seconds: float = 120.0):
+        self.monitored_folder = monitored_folder
+        self.worker_id = worker_id or _default_worker_id()
+        self.lease_seconds = max(1.0, float(lease_seconds))
+        self.lease_root = os.path.join(monitored_folder, LEASE_FOLDER)
+        self.folder = os.path.join(self.lease_root, self.worker_id)
+        self._lock = threading.Lock()
+        self._claimed: Set[str] = set()
+        self._running = False
+        self._wake = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_settings(cls, settings_manager) -> Optional["FileLeases"]:
+        """Leases for the monitored folder, or None if leasing is disabled."""
+        if not settings_manager.get("file_leasing_enabled", False):
+            return None
+        return cls(settings_manager.get("monitored_folder", ""),
+                   settings_manager.get("lease_worker_id", "") or None,
+                   settings_manager.get("lease_seconds", 120))
+
+    def start(self):
+        """Start heartbeating and reclaiming expired leases in the background."""
+        with self._lock:
+            self._running = True
+            if self._thread is not None:
+                # Still finishing the files of the previous run
+                return
+            os.makedirs(self.folder, exist_ok=True)
+            # Left over from an earlier process that used this worker id
+            self._return_all(self.folder)
+            self._thread = threading.Thread(target=self._heartbeat_loop, name="file-lease-heartbeat", daemon=True)
+        self.heartbeat()
+        self.reclaim_expired()
+        self._thread.start()
+
+    def stop(self):
+        """Stop once the files still claimed are finished; the lease folder is then removed."""
+        with self._lock:
+            self._running = False
+        self._wake.set()
+
+    def close(self, timeout: Optional[float] = None):
+        """Stop and wait for the lease folder to be cleaned up."""
+        self.stop()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _heartbeat_loop(self):
+        ticks = 0
+        while True:
+            self._wake.wait(self.lease_seconds / 4)
+            self._wake.clear()
+            with self._lock:
+                if not self._running and not self._claimed:
+                    self._thread = None
+                    try:
+                        os.remove(os.path.join(self.folder, HEARTBEAT_FILE))
+                        os.rmdir(self.folder)
+                        # Only succeeds for the last worker out
+                        os.rmdir(self.lease_root)
+                    except OSError:
+                        pass
+                    return
+            self.heartbeat()
+            ticks += 1
+            if ticks % 4 == 0:
+                self.reclaim_expired()
+
+    def heartbeat(self) -> Optional[float]:
+        """Refresh this worker's heartbeat; returns its mtime as seen by the filesystem."""
+        path = os.path.join(self.folder, HEARTBEAT_FILE)
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(path, "a"):
+                pass
+            os.utime(path)
+            return os.stat(path).st_mtime
+        except OSError as e:
+            print(f"Error refreshing lease heartbeat: {str(e)}")
+            return None
+
+    def claim(self, job: Dict) -> Optional[str]:
+        """Move the job's file into this worker's folder. None if someone else got there first."""
+        claimed_path = os.path.join(self.folder, job["filename"])
+        try:
+            os.makedirs(os.path.dirname(claimed_path), exist_ok=True)
+            os.rename(job["input_path"], claimed_path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Error claiming {job['filename']}: {str(e)}")
+            return None
+        with self._lock:
+            self._claimed.add(claimed_path)
+        return claimed_path
+
+    def release(self, job: Dict):
+        """Give up a claim: the file goes back to the monitored folder if it still exists."""
+        claimed_path = job.pop("claimed_path", None)
+        if claimed_path is None:
+            return
+        if os.path.exists(claimed_path):
+            self._return_file(claimed_path, job["input_path"])
+        with self._lock:
+            self._claimed.discard(claimed_path)
+            idle = not self._running and not self._claimed
+        if idle:
+            self._wake.set()
+
+    def _return_file(self, claimed_path: str, input_path: str):
+        """Move a claimed file back, next to a newer file of the same name if there is one."""
+        target = input_path
+        if os.path.exists(target):
+            # Keep both; the suffix keeps the old one out of the scan until someone looks at it
+            target = f"{input_path}.returned-{time.strftime('%Y%m%d-%H%M%S')}"
+            print(f"A newer {input_path} exists; returning the claimed file as {target}")
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.rename(claimed_path, target)
+        except OSError as e:
+            print(f"Error returning {input_path}: {str(e)}")
+
+    def _return_all(self, folder: str) -> int:
+        """Move every file under a lease folder back to where it was claimed from."""
+        returned = 0
+        for root, dirs, files in os.walk(folder, topdown=False):
+            for name in files:
+                path = os.path.join(root, name)
+                if path == os.path.join(folder, HEARTBEAT_FILE):
+                    continue
+                relative = os.path.relpath(path, folder)
+                self._return_file(path, os.path.join(self.monitored_folder, relative))
+                returned += 1
+            if root != folder:
+                try:
+                    os.rmdir(root)
+                except OSError:
+                    pass
+        return returned
+
+    def reclaim_expired(self) -> int:
+        """Return the files of workers whose heartbeat has expired. Returns how many were moved."""
+        now = self.heartbeat()
+        if now is None:
+            return 0
+        try:
+            workers = [entry for entry in os.scandir(self.lease_root)
+                       if entry.is_dir() and entry.name != self.worker_id]
+        except OSError:
+            return 0
+        returned = 0
+        for entry in workers:
+            try:
+                last_seen = os.stat(os.path.join(entry.path, HEARTBEAT_FILE)).st_mtime
+            except FileNotFoundError:
+                # Never heartbeated (crashed while starting) or finished stopping
+                last_seen = entry.stat().st_mtime
+            except OSError:
+                continue
+            if now - last_seen < self.lease_seconds:
+                continue
+            count = self._return_all(entry.path)
+            try:
+                os.remove(os.path.join(entry.path, HEARTBEAT_FILE))
+            except OSError:
+                pass
+            try:
+                os.rmdir(entry.path)
+            except OSError:
+                pass
+            if count:
+                print(f"Reclaimed {count} file(s) from expired worker {entry.name}")
+            returned += count
+        return returned
+
+    def done(self, job: Dict):
+        """Forget a claim whose file was tagged and deleted."""
+        claimed_path = job.pop("claimed_path", None)
+        with self._lock:
+            self._claimed.discard(claimed_path)
+            idle = not self._running and not self._claimed
+        if idle:
+            # Let a stopped worker clean up without waiting for the next tick
+            self._wake.set()
@@ -0,0 +1,162 @@
+# project_root/job_manifest.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+# Job states. "skipped" marks files whose output already existed before the
+# manifest knew about them, so they aren't requeued on every scan.
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# SQLite's default limit on bound parameters is 999
+_LOOKUP_CHUNK = 500
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class JobManifest:
+    """Durable record of every monitored file the tagger has worked on, backed by SQLite.
+
+    Jobs are keyed by input path plus content hash and move through
+    pending -> in_flight -> done/failed, with attempt counts, latency and
+    token usage, including prompt tokens served from the API's prompt
+    cache. Jobs left in flight by a crash are reset to pending when the
+    manifest is opened so the next engine can resume them.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Shared by all tagger workers; access is serialized by _lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                input_path TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                output_path TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                latency REAL,
+                prompt_tokens INTEGER,
+                completion_tokens INTEGER,
+                cached_tokens INTEGER,
+                error TEXT,
+                PRIMARY KEY (input_path, content_hash)
+            )"""
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if "cached_tokens" not in columns:
+            # Manifests created before cached-token tracking
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN cached_tokens INTEGER")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_input_updated ON jobs (input_path, updated_at)")
+        self._conn.commit()
+        with self._lock:
+            self.recovered = self._conn.execute(
+                "UPDATE jobs SET state = ?, updated_at = ? WHERE state = ?", (PENDING, time.time(), IN_FLIGHT)
+            ).rowcount
+            self._conn.commit()
+        if self.recovered:
+            print(f"Resuming {self.recovered} interrupted tagging job(s)")
+
+    @classmethod
+    def from_settings(cls, settings_manager) -> Optional["JobManifest"]:
+        """Open the manifest next to settings.json, or None if it is disabled."""
+        if not settings_manager.get("job_manifest_enabled", True):
+            return None
+        return cls(os.path.join(os.path.dirname(settings_manager.settings_path), "tagger_jobs.sqlite"))
+
+    def lookup(self, input_path: str, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM jobs WHERE input_path = ? AND content_hash = ?", (input_path, digest)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([c[0] for c in cursor.description], row))
+
+    def latest_states(self, input_paths: Iterable[str]) -> Dict[str, str]:
+        """State of the most recent job for each input path that has one."""
+        paths = list(input_paths)
+        states = {}
+        with self._lock:
+            for i in range(0, len(paths), _LOOKUP_CHUNK):
+                chunk = paths[i:i + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"""SELECT input_path, state FROM jobs WHERE input_path IN ({placeholders})
+                        ORDER BY updated_at""",
+                    chunk
+                ).fetchall()
+                # Later rows overwrite earlier ones, leaving the latest state per path
+                states.update(rows)
+        return states
+
+    def pending_jobs(self) -> List[Dict[str, str]]:
+        """Jobs waiting to be (re)processed, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT input_path, filename, output_path FROM jobs WHERE state = ? ORDER BY created_at",
+                (PENDING,)
+            ).fetchall()
+        return [{"input_path": r[0], "filename": r[1], "output_path": r[2]} for r in rows]
+
+    def start(self, input_path: str, digest: str, filename: str, output_path: str):
+        """Mark a job in flight, creating it if needed, and count the attempt."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO jobs (input_path, content_hash, filename, output_path, state, attempts,
+                                     created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+                   ON CONFLICT (input_path, content_hash) DO UPDATE SET
+                       state = excluded.state, output_path = excluded.output_path,
+                       attempts = attempts + 1, updated_at = excluded.updated_at, error = NULL""",
+                (input_path, digest, filename, output_path, IN_FLIGHT, now, now)
+            )
+            self._conn.commit()
+
+    def finish(self, input_path: str, digest: str, state: str, latency: Optional[float] = None,
+               usage: Optional[Dict[str, int]] = None, error: Optional[str] = None,
+               filename: str = "", output_path: str = ""):
+        """Record the outcome of a job (done, failed, skipped, or pending for a retry)."""
+        usage = usage or {}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO jobs (input_path, content_hash, filename, output_path, state, attempts,
+                                     created_at, updated_at, latency, prompt_tokens, completion_tokens,
+                                     cached_tokens, error)
+                   VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (input_path, content_hash) DO UPDATE SET
+                       state = excluded.state, updated_at = excluded.updated_at,
+                       latency = COALESCE(excluded.latency, latency),
+                       prompt_tokens = COALESCE(excluded.prompt_tokens, prompt_tokens),
+                       completion_tokens = COALESCE(excluded.completion_tokens, completion_tokens),
+                       cached_tokens = COALESCE(excluded.cached_tokens, cached_tokens),
+                       error = excluded.error""",
+                (input_path, digest, filename, output_path, state, now, now, latency,
+                 usage.get("prompt_tokens"), usage.get("completion_tokens"), usage.get("cached_tokens"), error)
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,49 +1,47 @@
 # project_root/main.py
 
+# First, so the startup timer starts before the heavy imports
+from startup_timing import startup_timer
+
+import logging
 import sys
-import os
-import json
+import threading
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 from ui.main_window import MainWindow
-from settings_manager import SettingsManager
+from settings_manager import SettingsManager, ensure_settings_file
 from secure_storage import SecureStorage
-
-def ensure_settings_file():
-    resources_path = os.path.join(os.path.dirname(__file__), "resources")
-    if not os.path.exists(resources_path):
-        os.makedirs(resources_path)
-    settings_path = os.path.join(resources_path, "settings.json")
-    if not os.path.exists(settings_path):
-        # Create default settings.json with all required fields
-        default_settings = {
-            "folders": {
-                "split_folder": "",
-                "processed_folder": "",
-                "monitored_folder": "",
-                "tagged_folder": ""
-            },
-            "criteria_file": "",
-            "input_text": "",
-            "delimiter": ",",
-            "suffix": "SPLIT",
-            "model": "gpt-4",
-            "temperature": 0.7,
-            "monitoring_interval": 20,
-            "models_list": []
-        }
-        with open(settings_path, "w", encoding="utf-8") as f:
-            json.dump(default_settings, f, indent=4)
-    return settings_path
+import metrics
+from tokenizer_service import tokenizer_service
 
 if __name__ == "__main__":
+    startup_timer.mark("imports")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     app = QApplication(sys.argv)
 
     settings_path = ensure_settings_file()
     settings_manager = SettingsManager(settings_path)
+    # Cheap: cryptography is only loaded once the key is needed
     secure_storage = SecureStorage()
+    # Settings are written behind a short timer; make sure the last changes land on exit
+    app.aboutToQuit.connect(settings_manager.flush)
+    startup_timer.enabled = startup_timer.enabled or settings_manager.get("startup_timing", False)
+    # Offline BPE cache (tokenizer_cache_dir), before anything loads an encoding
+    tokenizer_service.configure_from_settings(settings_manager)
+    startup_timer.mark("settings loaded")
+
+    # Optional Prometheus endpoint/file (metrics_port, metrics_file in settings.json)
+    metrics_stop = threading.Event()
+    metrics.start_exporters(settings_manager, metrics_stop)
+    app.aboutToQuit.connect(metrics_stop.set)
 
+    # The tokenizer, OpenAI client and model list initialize in the background;
+    # the timing report is printed once they and the window are all ready
+    startup_timer.expect(["window"])
     window = MainWindow(settings_manager, secure_storage)
     window.resize(1200, 800)
+    startup_timer.mark("window built")
     window.show()
+    QTimer.singleShot(0, lambda: startup_timer.task_done("window"))
 
     sys.exit(app.exec())
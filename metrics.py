@@ -0,0 +1,290 @@
+# project_root/metrics.py
+"""In-process counters, gauges and histograms for the API client and tagger.
+
+Everything records into the shared `metrics` registry, which the Metrics
+tab reads directly and which can be exported in the Prometheus text
+format to a file or over a local HTTP endpoint for headless runs.
+"""
+
+import bisect
+import collections
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# Seconds; covers cached answers up to long completions
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+# Recent observations kept for percentiles
+RECENT_SAMPLES = 2048
+
+# Longest window rate_per_minute() can look back over; counters keep one bucket per second for it
+RATE_WINDOW_SECONDS = 300
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+class Counter:
+    """Monotonic count, optionally split by labels."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+        # (second, {label key: amount}) for the last RATE_WINDOW_SECONDS; exact however busy it gets
+        self._per_second = collections.deque()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        second = int(time.monotonic())
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            if not self._per_second or self._per_second[-1][0] != second:
+                self._per_second.append((second, {}))
+                while self._per_second[0][0] <= second - RATE_WINDOW_SECONDS:
+                    self._per_second.popleft()
+            bucket = self._per_second[-1][1]
+            bucket[key] = bucket.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            if labels:
+                return self._values.get(_label_key(labels), 0)
+            return sum(self._values.values())
+
+    def rate_per_minute(self, window: float = 60.0, **labels) -> float:
+        """Increase over the last window seconds (for the given labels, if any), scaled to one minute.
+
+        Counted in whole seconds, including the current one; window is capped
+        at RATE_WINDOW_SECONDS.
+        """
+        window = min(max(1, int(window)), RATE_WINDOW_SECONDS)
+        cutoff = int(time.monotonic()) - window
+        wanted = _label_key(labels) if labels else None
+        with self._lock:
+            total = 0
+            for second, amounts in reversed(self._per_second):
+                if second <= cutoff:
+                    break
+                total += amounts.get(wanted, 0) if wanted is not None else sum(amounts.values())
+        return total * 60.0 / window
+
+    def samples(self) -> List[Tuple[str, float]]:
+        with self._lock:
+            return [(self.name + _format_labels(key), value) for key, value in self._values.items()]
+
+class Gauge:
+    """Value that goes up and down, e.g. queue depth."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def samples(self) -> List[Tuple[str, float]]:
+        with self._lock:
+            return [(self.name + _format_labels(key), value) for key, value in self._values.items()]
+
+class Histogram:
+    """Bucketed distribution (for export) plus recent samples (for percentiles)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._recent = collections.deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+            self._recent.append(value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile (0-100) of the recent samples, or None if there are none."""
+        with self._lock:
+            recent = sorted(self._recent)
+        if not recent:
+            return None
+        index = min(len(recent) - 1, max(0, int(round(q / 100.0 * (len(recent) - 1)))))
+        return recent[index]
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def samples(self) -> List[Tuple[str, float]]:
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        samples = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            samples.append((f"{self.name}_bucket" + _format_labels((), ("le", le)), cumulative))
+        samples.append((f"{self.name}_sum", total))
+        samples.append((f"{self.name}_count", count))
+        return samples
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample, value in metric.samples():
+                lines.append(f"{sample} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path: str):
+        """Write the exposition atomically, e.g. for node_exporter's textfile collector."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+# Shared by the API client, the tagger engine and the UI
+metrics = MetricsRegistry()
+
+# API client
+api_requests = metrics.counter("openai_requests_total", "Chat completion requests by outcome (ok, error, cached)")
+api_request_seconds = metrics.histogram("openai_request_seconds", "Chat completion latency including retries")
+api_tokens = metrics.counter("openai_tokens_total", "Tokens by kind (prompt, completion, cached)")
+api_retries = metrics.counter("openai_retries_total", "Retried requests by reason (rate_limited, transient)")
+
+# Tagger
+tagger_files = metrics.counter("tagger_files_total", "Monitored files by outcome (done, skipped, failed, requeued, claimed_elsewhere)")
+tagger_file_seconds = metrics.histogram("tagger_file_seconds", "Time to tag one monitored file")
+tagger_queue_depth = metrics.gauge("tagger_queue_depth", "Files queued for the tagger workers")
+tagger_in_progress = metrics.gauge("tagger_in_progress", "Files being tagged right now")
+tagger_queue_wait_seconds = metrics.histogram(
+    "tagger_queue_wait_seconds", "Time a monitored file waits in the queue before a worker picks it up",
+    buckets=(0.1, 1, 5, 15, 60, 300, 900, 3600)
+)
+folder_scan_seconds = metrics.histogram(
+    "folder_scan_seconds", "Time to scan the monitored folder", buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+folder_backlog_files = metrics.gauge("folder_backlog_files", "Settled files found in the last folder scan")
+
+def record_usage(usage: Optional[Dict[str, int]]):
+    if not usage:
+        return
+    api_tokens.inc(usage.get("prompt_tokens") or 0, kind="prompt")
+    api_tokens.inc(usage.get("completion_tokens") or 0, kind="completion")
+    if usage.get("cached_tokens"):
+        api_tokens.inc(usage["cached_tokens"], kind="cached")
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = metrics
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the console
+        pass
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics on a daemon thread. Call shutdown() on the result to stop it."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+def start_file_writer(path: str, interval: float, stop_event: threading.Event) -> threading.Thread:
+    """Rewrite the Prometheus file every interval seconds until stop_event is set."""
+    def loop():
+        while True:
+            try:
+                metrics.write_prometheus_file(path)
+            except OSError as e:
+                print(f"Error writing metrics file {path}: {str(e)}")
+            if stop_event.wait(interval):
+                break
+        # One last write so the file reflects the final counts
+        try:
+            metrics.write_prometheus_file(path)
+        except OSError:
+            pass
+    thread = threading.Thread(target=loop, name="metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+def start_exporters(settings_manager, stop_event: threading.Event, port: Optional[int] = None,
+                    path: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """Start the exporters enabled in settings (metrics_port, metrics_file); arguments override them.
+
+    Returns the HTTP server if one was started.
+    """
+    port = settings_manager.get("metrics_port", 0) if port is None else port
+    path = settings_manager.get("metrics_file", "") if path is None else path
+    server = None
+    if port:
+        try:
+            server = start_http_server(port)
+            print(f"Serving metrics on http://127.0.0.1:{port}/metrics")
+        except OSError as e:
+            print(f"Could not serve metrics on port {port}: {str(e)}")
+    if path:
+        start_file_writer(path, settings_manager.get("metrics_file_interval", 15), stop_event)
+    return server
@@ -1,63 +1,372 @@
 # project_root/openai_interface.py
+import os
+import httpx
 import openai
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from config import SYSTEM_MESSAGE, MAX_TOKENS
+from response_cache import ResponseCache
+from rate_limiter import RateLimiter, backoff_delay
+from tokenizer_service import tokenizer_service
+import metrics
+
+# Errors worth retrying: rate limits, dropped connections/timeouts and 5xx responses
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+def _build_http_limits(max_connections: int, max_keepalive: int, keepalive_expiry: float) -> httpx.Limits:
+    """Connection pool limits for the client shared by every caller of an interface."""
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=keepalive_expiry
+    )
+
+def _build_messages(prompt: str) -> List[Dict[str, str]]:
+    # Create a system message to help guide the model
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ]
+
+def _parse_usage(usage) -> Optional[Dict[str, int]]:
+    if usage is None:
+        return None
+    # Prompt tokens served from the provider's prompt cache (a shared prefix)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens,
+        "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+    }
+
+def _parse_completion(response) -> Dict[str, Any]:
+    """Convert a chat completion into the result dict used throughout the app."""
+    if response.choices and len(response.choices) > 0:
+        return {
+            "content": response.choices[0].message.content,
+            "finish_reason": response.choices[0].finish_reason,
+            "model": response.model,
+            "usage": _parse_usage(response.usage)
+        }
+    return {"error": "No response generated"}
+
+def _retry_after_seconds(error) -> Optional[float]:
+    """Read the server's Retry-After hint from an API error, if it sent one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = response.headers.get(header)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                # HTTP-date form; fall back to our own backoff
+                continue
+    return None
+
+def count_tokens(model: str, text: str) -> int:
+    """Token count of text for the given model (estimated by length without tiktoken)."""
+    return tokenizer_service.count(text, model)
+
+def estimate_request_tokens(model: str, messages: List[Dict[str, str]], max_tokens: int = MAX_TOKENS) -> int:
+    """Tokens a request counts against the TPM budget: prompt tokens plus max_tokens."""
+    prompt_tokens = sum(tokenizer_service.count_batch([message["content"] for message in messages], model))
+    prompt_tokens += 4 * len(messages)  # per-message framing
+    return prompt_tokens + max_tokens
+
+def _record_request(started: float, result: Dict[str, Any]):
+    """Record latency, outcome and token usage of one API request (an empty result means it failed)."""
+    metrics.api_request_seconds.observe(time.monotonic() - started)
+    if "error" in result or not result:
+        metrics.api_requests.inc(outcome="error")
+        return
+    metrics.api_requests.inc(outcome="ok")
+    metrics.record_usage(result.get("usage"))
+
+def _filter_models(models) -> List[str]:
+    # Filter models to include only GPT/chat models
+    filtered = [
+        m.id for m in models
+        if ("gpt" in m.id.lower() or "chat" in m.id.lower())
+        and not any(x in m.id.lower() for x in ["realtime", "audio", "whisper"])
+    ]
+    return sorted(filtered)
 
 class OpenAIInterface:
-    def __init__(self, api_key: str, model: str = "gpt-4", temperature: float = 0.7):
+    def __init__(self, api_key: str, model: str = "gpt-4", temperature: float = 0.7,
+                 max_connections: int = 20, max_keepalive: int = 10, keepalive_expiry: float = 30.0,
+                 cache: Optional[ResponseCache] = None, rate_limiter: Optional[RateLimiter] = None,
+                 max_retries: int = 5, base_url: Optional[str] = None):
         self.model = model
         self.temperature = temperature
-        # Initialize the OpenAI client with the API key
-        openai.api_key = api_key
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        # Point at a local stand-in (e.g. for offline testing) instead of api.openai.com
+        self.base_url = base_url or None
+        self._limits = _build_http_limits(max_connections, max_keepalive, keepalive_expiry)
+        # Each interface owns its client so callers never race on module-global state.
+        # The pooled HTTP client is thread-safe and shared by the tagger workers
+        # and the Send to GPT button.
+        self.client = self._create_client(api_key)
+
+    @classmethod
+    def from_settings(cls, settings_manager, api_key: str) -> "OpenAIInterface":
+        """Build an interface (and its response cache) from the app settings."""
+        cache = None
+        if settings_manager.get("response_cache_enabled", True):
+            # Keep the cache database next to settings.json
+            cache_path = os.path.join(os.path.dirname(settings_manager.settings_path), "response_cache.sqlite")
+            cache = ResponseCache(
+                cache_path,
+                max_bytes=int(settings_manager.get("response_cache_max_mb", 100) * 1024 * 1024),
+                max_age_seconds=settings_manager.get("response_cache_max_age_days", 30) * 86400
+            )
+        rate_limiter = None
+        rpm = settings_manager.get("rate_limit_rpm", 0)
+        tpm = settings_manager.get("rate_limit_tpm", 0)
+        if rpm or tpm:
+            rate_limiter = RateLimiter(rpm, tpm)
+        return cls(
+            api_key,
+            settings_manager.get("model", "gpt-4"),
+            settings_manager.get("temperature", 0.7),
+            max_connections=settings_manager.get("http_max_connections", 20),
+            max_keepalive=settings_manager.get("http_max_keepalive", 10),
+            cache=cache,
+            rate_limiter=rate_limiter,
+            max_retries=settings_manager.get("api_max_retries", 5),
+            base_url=settings_manager.get("api_base_url", "")
+        )
+
+    def _create_client(self, api_key: str) -> openai.OpenAI:
+        # Retries are handled here so they can respect the shared rate limiter
+        return openai.OpenAI(api_key=api_key, base_url=self.base_url, max_retries=0,
+                             http_client=httpx.Client(limits=self._limits))
+
+    def count_tokens(self, text: str) -> int:
+        return count_tokens(self.model, text)
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        return tokenizer_service.count_batch(texts, self.model)
+
+    def chat_request_body(self, prompt: str) -> Dict[str, Any]:
+        """Request body for a chat completion, as used by the Batch API input file."""
+        return {
+            "model": self.model,
+            "messages": _build_messages(prompt),
+            "temperature": self.temperature,
+            "max_tokens": MAX_TOKENS
+        }
+
+    def _create_completion(self, messages: List[Dict[str, str]], **kwargs):
+        """Call chat.completions.create within the rate limits, retrying transient errors.
+
+        Returns (response, estimated_tokens). The estimate has already been
+        charged to the token budget; callers settle it with record_usage().
+        """
+        estimated = estimate_request_tokens(self.model, messages) if self.rate_limiter else 0
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimated)
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=MAX_TOKENS,
+                    **kwargs
+                )
+                return response, estimated
+            except RETRYABLE_ERRORS as e:
+                if self.rate_limiter:
+                    # The failed request didn't consume any tokens
+                    self.rate_limiter.record_usage(estimated, 0)
+                if attempt >= self.max_retries:
+                    raise
+                metrics.api_retries.inc(
+                    reason="rate_limited" if isinstance(e, openai.RateLimitError) else "transient"
+                )
+                retry_after = _retry_after_seconds(e)
+                if self.rate_limiter and isinstance(e, openai.RateLimitError):
+                    # Pause every caller; the next acquire() waits it out
+                    self.rate_limiter.record_rate_limited(attempt, retry_after)
+                else:
+                    time.sleep(retry_after if retry_after is not None else backoff_delay(attempt))
+
+    def _record_usage(self, estimated: int, usage: Optional[Dict[str, int]]):
+        if self.rate_limiter and usage:
+            self.rate_limiter.record_usage(estimated, usage["total_tokens"])
+
+    def set_api_key(self, api_key: str):
+        """Replace the client after the user saves a new API key."""
+        old_client = self.client
+        self.client = self._create_client(api_key)
+        old_client.close()
+
+    def close(self):
+        self.client.close()
+
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        if not self.cache:
+            return None
+        return ResponseCache.make_key(self.model, self.temperature, SYSTEM_MESSAGE, prompt)
 
     def refresh_models(self) -> List[str]:
         """Fetch available models from OpenAI API and filter for chat/GPT models."""
         try:
             # Get list of available models
-            models = openai.models.list()
-            # Filter models to include only GPT/chat models
-            filtered = [
-                m.id for m in models 
-                if ("gpt" in m.id.lower() or "chat" in m.id.lower()) 
-                and not any(x in m.id.lower() for x in ["realtime", "audio", "whisper"])
-            ]
-            return sorted(filtered)
+            return _filter_models(self.client.models.list())
         except Exception as e:
             print(f"Error fetching models: {str(e)}")
             # Return a default list if API call fails
             return ["gpt-4", "gpt-3.5-turbo"]
 
-    def send_text(self, prompt: str) -> Dict[str, Any]:
-        """Send text to OpenAI API using the chat completions endpoint."""
+    def send_text(self, prompt: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Send text to OpenAI API using the chat completions endpoint.
+
+        Identical requests are answered from the response cache when one is
+        configured; pass use_cache=False to force a fresh completion.
+        """
+        cache_key = self._cache_key(prompt)
+        if cache_key and use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                cached["cached"] = True
+                metrics.api_requests.inc(outcome="cached")
+                return cached
+
+        started = time.monotonic()
         try:
-            # Create a system message to help guide the model
-            messages = [
-                {"role": "system", "content": "You are a helpful assistant analyzing text based on provided criteria."},
-                {"role": "user", "content": prompt}
-            ]
-            
             # Make the API call using the chat completions endpoint
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                # Add reasonable max tokens limit
-                max_tokens=2000
-            )
-            
+            response, estimated = self._create_completion(_build_messages(prompt))
+
             # Extract and return the response content
-            if response.choices and len(response.choices) > 0:
-                return {
-                    "content": response.choices[0].message.content,
-                    "finish_reason": response.choices[0].finish_reason,
-                    "model": response.model,
-                    "usage": {
-                        "prompt_tokens": response.usage.prompt_tokens,
-                        "completion_tokens": response.usage.completion_tokens,
-                        "total_tokens": response.usage.total_tokens
-                    }
-                }
-            else:
-                return {"error": "No response generated"}
-                
+            result = _parse_completion(response)
+            self._record_usage(estimated, result.get("usage"))
+
+        except RETRYABLE_ERRORS as e:
+            # Still failing after all retries; callers may requeue the work
+            _record_request(started, {})
+            return {"error": f"API Error: {str(e)}", "retryable": True}
         except Exception as e:
+            _record_request(started, {})
             return {"error": f"API Error: {str(e)}"}
+        _record_request(started, result)
+
+        if cache_key and "error" not in result:
+            # Refresh the cached entry even when this call bypassed the lookup
+            self.cache.put(cache_key, result)
+        return result
+
+    def send_many(self, prompts: Iterable[str], max_in_flight: int = 8) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Send prompts concurrently and yield (index, result) pairs as they complete.
+
+        Each result has the same shape as send_text() and goes through the
+        same cache, rate limiter and pooled client. At most max_in_flight
+        requests are outstanding at once; prompts are pulled from the
+        iterable lazily so very large batches stay cheap.
+        """
+        max_in_flight = max(1, int(max_in_flight))
+        prompt_iter = iter(enumerate(prompts))
+        in_flight = {}
+        executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="send-many")
+
+        def schedule_next() -> bool:
+            try:
+                index, prompt = next(prompt_iter)
+            except StopIteration:
+                return False
+            in_flight[executor.submit(self.send_text, prompt)] = index
+            return True
+
+        try:
+            while len(in_flight) < max_in_flight and schedule_next():
+                pass
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    yield index, future.result()
+                    schedule_next()
+        finally:
+            # Consumer stopped early; don't start the requests still waiting
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stream_text(self, prompt: str, use_cache: bool = True,
+                    cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """Stream a completion for prompt.
+
+        Yields {"delta": text} for each content fragment as it arrives,
+        followed by exactly one final result dict with the same shape as
+        send_text() (content, finish_reason, model, usage) or {"error": ...}.
+        Setting cancel_event stops generation early; the final result then
+        holds the partial content with finish_reason "cancelled".
+        """
+        cache_key = self._cache_key(prompt)
+        if cache_key and use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                cached["cached"] = True
+                metrics.api_requests.inc(outcome="cached")
+                yield {"delta": cached["content"]}
+                yield cached
+                return
+
+        started = time.monotonic()
+        parts = []
+        finish_reason = None
+        model = self.model
+        usage = None
+        try:
+            stream, estimated = self._create_completion(
+                _build_messages(prompt),
+                stream=True,
+                # Ask for a final chunk carrying token usage
+                stream_options={"include_usage": True}
+            )
+            with stream:
+                for chunk in stream:
+                    if cancel_event is not None and cancel_event.is_set():
+                        finish_reason = "cancelled"
+                        break
+                    model = chunk.model or model
+                    if chunk.usage is not None:
+                        usage = _parse_usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    if choice.delta and choice.delta.content:
+                        parts.append(choice.delta.content)
+                        yield {"delta": choice.delta.content}
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
+        except RETRYABLE_ERRORS as e:
+            _record_request(started, {})
+            yield {"error": f"API Error: {str(e)}", "retryable": True}
+            return
+        except Exception as e:
+            _record_request(started, {})
+            yield {"error": f"API Error: {str(e)}"}
+            return
+        self._record_usage(estimated, usage)
+        _record_request(started, {"usage": usage} if parts or finish_reason == "cancelled" else {})
+
+        if not parts and finish_reason != "cancelled":
+            yield {"error": "No response generated"}
+            return
+
+        result = {
+            "content": "".join(parts),
+            "finish_reason": finish_reason,
+            "model": model,
+            "usage": usage
+        }
+        # Only complete answers are worth caching
+        if cache_key and finish_reason != "cancelled":
+            self.cache.put(cache_key, result)
+        yield result
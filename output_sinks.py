@@ -0,0 +1,341 @@
+# project_root/output_sinks.py
+"""Where the tagger puts its results.
+
+    files   one output file per input (and criteria file) in tagged_folder,
+            named as before; each is written via a temp file and fsynced
+    jsonl   one JSON record per line, appended to rolling .jsonl files that
+            rotate once they pass output_jsonl_max_mb
+    sqlite  one row per record in the tagged_results table
+
+Records carry the source filename, a hash of its content, criteria file,
+model, token usage, tagging latency, a timestamp and the content. The jsonl and sqlite sinks
+use group commit: concurrent workers hand their records to one writer
+thread, which writes whatever has accumulated and makes it durable with a
+single fsync (or commit). write() returns only once the record is on disk,
+so the source file is never deleted before its result is safe.
+
+The append-only sinks know a result by (source, content hash, criteria
+file): sqlite through a unique index, jsonl through a compact index next to
+each .jsonl file (a .keys file with one hash of the key per line), read when
+the sink is opened. A file whose content was already tagged isn't sent
+again, while a new file with a reused name is.
+"""
+
+import abc
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List
+
+SINK_TYPES = ["files", "jsonl", "sqlite"]
+
+JSONL_PREFIX = "tagged-"
+SQLITE_FILENAME = "tagged_results.sqlite"
+
+def build_record(job: Dict, target: Dict, response: Dict, latency: float) -> Dict[str, Any]:
+    return {
+        "source": job["filename"],
+        "digest": job.get("digest"),
+        "criteria_file": target["criteria_file"],
+        "model": response.get("model"),
+        "usage": response.get("usage"),
+        "latency": round(latency, 3),
+        "tagged_at": time.time(),
+        "content": response["content"],
+    }
+
+def record_key(job: Dict, target: Dict) -> tuple:
+    """What identifies a result in the append-only sinks."""
+    return job["filename"], job.get("digest"), target["criteria_file"]
+
+def _key_digest(key: tuple) -> bytes:
+    """Fixed-size stand-in for a record key in the jsonl key index."""
+    return hashlib.blake2b(json.dumps(key, ensure_ascii=False).encode("utf-8"), digest_size=16).digest()
+
+def write_output_file(output_path: str, content: str):
+    """Write the tagged output via a temp file so a crash never leaves a partial file."""
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, output_path)
+
+class FileSink:
+    """One file per result at target["output_path"] (the original layout)."""
+    appends = False
+
+    def exists(self, job: Dict, target: Dict) -> bool:
+        return os.path.exists(target["output_path"])
+
+    def write(self, job: Dict, target: Dict, response: Dict, latency: float):
+        os.makedirs(os.path.dirname(target["output_path"]), exist_ok=True)
+        write_output_file(target["output_path"], response["content"])
+
+    def close(self):
+        pass
+
+class _GroupCommitSink(abc.ABC):
+    """Base for sinks that batch records from all workers into one durable write."""
+    appends = True
+
+    def __init__(self, batch_size: int = 200):
+        self.batch_size = max(1, int(batch_size))
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer_loop, name=f"{type(self).__name__}-writer", daemon=True)
+        self._thread.start()
+
+    @abc.abstractmethod
+    def exists(self, job: Dict, target: Dict) -> bool:
+        """Whether this content was already tagged against target's criteria file."""
+
+    def write(self, job: Dict, target: Dict, response: Dict, latency: float):
+        """Queue a record and wait until it has been committed."""
+        entry = {"record": build_record(job, target, response, latency), "done": threading.Event(), "error": None}
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Output sink is closed")
+            self._queue.put(entry)
+        entry["done"].wait()
+        if entry["error"] is not None:
+            raise entry["error"]
+
+    def close(self):
+        """Commit what is queued, then release the file or database."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    def _writer_loop(self):
+        closing = False
+        while not closing:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            # Everything that queued up during the previous commit goes into this one
+            batch = [entry]
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    closing = True
+                    break
+                batch.append(entry)
+            try:
+                self._write_batch([item["record"] for item in batch])
+                error = None
+            except Exception as e:
+                print(f"Error writing {len(batch)} tagged result(s): {str(e)}")
+                error = e
+            for item in batch:
+                item["error"] = error
+                item["done"].set()
+        self._close()
+
+    @abc.abstractmethod
+    def _write_batch(self, records: List[Dict[str, Any]]):
+        """Write the records durably; called on the writer thread only."""
+
+    def _close(self):
+        pass
+
+class JsonlSink(_GroupCommitSink):
+    """Appends records to folder/tagged-<start time>-<pid>-<n>.jsonl, rotating by size.
+
+    Every process writes its own files, so several taggers can share the folder.
+    Alongside each .jsonl file a .keys file lists a hash of every record's
+    key, so opening the sink never has to parse the records themselves.
+    Results written by another process after this sink was opened aren't
+    in its index.
+    """
+
+    def __init__(self, folder: str, max_bytes: int = 100 * 1024 * 1024, batch_size: int = 200):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.max_bytes = max(1, int(max_bytes))
+        self._stem = f"{JSONL_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._index = 0
+        self._file = None
+        self._keys_file = None
+        self.path = None
+        self._keys_lock = threading.Lock()
+        self._keys = self._load_keys()
+        super().__init__(batch_size)
+
+    def _load_keys(self) -> set:
+        keys = set()
+        for entry in os.scandir(self.folder):
+            if not (entry.name.startswith(JSONL_PREFIX) and entry.name.endswith(".jsonl")):
+                continue
+            keys_path = entry.path[:-len(".jsonl")] + ".keys"
+            try:
+                if os.path.exists(keys_path):
+                    keys.update(self._read_key_index(keys_path))
+                else:
+                    # Written before key indexes were kept
+                    keys.update(self._read_record_keys(entry.path))
+            except OSError as e:
+                print(f"Error reading {entry.path}: {str(e)}")
+        return keys
+
+    @staticmethod
+    def _read_key_index(path: str) -> set:
+        keys = set()
+        with open(path, "r", encoding="ascii", errors="replace") as f:
+            for line in f:
+                try:
+                    keys.add(bytes.fromhex(line.strip()))
+                except ValueError:
+                    # A torn last line from a crash mid-write
+                    continue
+        return keys
+
+    @staticmethod
+    def _read_record_keys(path: str) -> set:
+        keys = set()
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("digest"):
+                    keys.add(_key_digest((record["source"], record["digest"], record["criteria_file"])))
+        return keys
+
+    def exists(self, job: Dict, target: Dict) -> bool:
+        key = _key_digest(record_key(job, target))
+        with self._keys_lock:
+            return key in self._keys
+
+    def _open_next(self):
+        self._close()
+        self._index += 1
+        self.path = os.path.join(self.folder, f"{self._stem}-{self._index:04d}.jsonl")
+        self._file = open(self.path, "ab")
+        self._keys_file = open(self.path[:-len(".jsonl")] + ".keys", "ab")
+
+    def _write_batch(self, records: List[Dict[str, Any]]):
+        data = b"".join(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n" for record in records)
+        if self._file is None or (self._file.tell() and self._file.tell() + len(data) > self.max_bytes):
+            self._open_next()
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        # Records first: after a crash in between a result may be sent again, but is never lost
+        keys = [_key_digest((record["source"], record["digest"], record["criteria_file"]))
+                for record in records if record["digest"]]
+        if keys:
+            self._keys_file.write(b"".join(key.hex().encode("ascii") + b"\n" for key in keys))
+            self._keys_file.flush()
+            os.fsync(self._keys_file.fileno())
+        with self._keys_lock:
+            self._keys.update(keys)
+
+    def _close(self):
+        for f in (self._file, self._keys_file):
+            if f:
+                f.close()
+        self._file = None
+        self._keys_file = None
+
+class SqliteSink(_GroupCommitSink):
+    """Inserts records into the tagged_results table, one transaction per batch.
+
+    A unique index on (source, digest, criteria_file) makes a repeated
+    result a no-op, even when several processes share the database.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 200):
+        self.db_path = db_path
+        # Shared by the writer thread and exists() lookups from the workers
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Every commit must be durable before the source file is deleted
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tagged_results (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                digest TEXT,
+                criteria_file TEXT NOT NULL,
+                model TEXT,
+                prompt_tokens INTEGER,
+                completion_tokens INTEGER,
+                cached_tokens INTEGER,
+                latency REAL,
+                tagged_at REAL NOT NULL,
+                content TEXT NOT NULL
+            )"""
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(tagged_results)")]
+        if "digest" not in columns:
+            # Tables from before results were keyed by content
+            self._conn.execute("ALTER TABLE tagged_results ADD COLUMN digest TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tagged_results_source ON tagged_results (source)")
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS tagged_results_key ON tagged_results (source, digest, criteria_file)"
+        )
+        self._conn.commit()
+        super().__init__(batch_size)
+
+    def exists(self, job: Dict, target: Dict) -> bool:
+        if not job.get("digest"):
+            return False
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM tagged_results WHERE source = ? AND digest = ? AND criteria_file = ?",
+                record_key(job, target)
+            ).fetchone()
+        return row is not None
+
+    def _write_batch(self, records: List[Dict[str, Any]]):
+        rows = []
+        for record in records:
+            usage = record["usage"] or {}
+            rows.append((record["source"], record["digest"], record["criteria_file"], record["model"],
+                         usage.get("prompt_tokens"), usage.get("completion_tokens"), usage.get("cached_tokens"),
+                         record["latency"], record["tagged_at"], record["content"]))
+        with self._db_lock, self._conn:
+            self._conn.executemany(
+                """INSERT OR IGNORE INTO tagged_results (source, digest, criteria_file, model, prompt_tokens,
+                   completion_tokens, cached_tokens, latency, tagged_at, content)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+
+    def _close(self):
+        with self._db_lock:
+            self._conn.close()
+
+def sink_settings(settings_manager) -> tuple:
+    """The settings a sink is built from; compare to know whether it must be reopened."""
+    return (
+        settings_manager.get("output_sink", "files"),
+        settings_manager.get("output_sink_path", "") or settings_manager.get("tagged_folder", ""),
+        settings_manager.get("output_jsonl_max_mb", 100),
+        settings_manager.get("output_batch_size", 200),
+    )
+
+def create_sink(settings_manager):
+    """Open the sink selected by output_sink. jsonl and sqlite default to the tagged folder."""
+    kind, path, max_mb, batch_size = sink_settings(settings_manager)
+    if kind == "jsonl":
+        return JsonlSink(path, int(max_mb * 1024 * 1024), batch_size)
+    if kind == "sqlite":
+        if os.path.isdir(path):
+            path = os.path.join(path, SQLITE_FILENAME)
+        return SqliteSink(path, batch_size)
+    return FileSink()
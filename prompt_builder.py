@@ -0,0 +1,62 @@
+# project_root/prompt_builder.py
+import os
+import threading
+from typing import Callable, Dict, Tuple
+from config import COMBINE_FORMAT
+
+def combine_prompt(input_text: str, criteria_content: str) -> str:
+    """Combine an input text and the criteria using the template."""
+    return COMBINE_FORMAT.format(
+        input_text=input_text.strip(),
+        criteria_content=criteria_content.strip()
+    )
+
+class PromptBuilder:
+    """Builds tagging prompts, reading each criteria file only once.
+
+    Criteria are cached per path and reloaded when the file's mtime or size
+    changes. The token count of the fixed part of the prompt (template plus
+    criteria) is cached too, so only the per-file text has to be counted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._criteria: Dict[str, Tuple[Tuple[float, int], str]] = {}
+        self._prefix_tokens: Dict[Tuple[str, Tuple[float, int], str], int] = {}
+
+    def _load(self, path: str) -> Tuple[Tuple[float, int], str]:
+        st = os.stat(path)
+        version = (st.st_mtime, st.st_size)
+        with self._lock:
+            cached = self._criteria.get(path)
+            if cached is not None and cached[0] == version:
+                return cached
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        with self._lock:
+            self._criteria[path] = (version, content)
+            # Token counts of the previous version are stale now
+            for key in [k for k in self._prefix_tokens if k[0] == path and k[1] != version]:
+                del self._prefix_tokens[key]
+        return version, content
+
+    def criteria(self, path: str) -> str:
+        return self._load(path)[1]
+
+    def build(self, input_text: str, criteria_path: str) -> str:
+        return combine_prompt(input_text, self.criteria(criteria_path))
+
+    def template_tokens(self, criteria_path: str, model: str, count_tokens: Callable[[str], int]) -> int:
+        """Tokens of the prompt without any input text, counted once per criteria version and model."""
+        version, criteria_content = self._load(criteria_path)
+        key = (criteria_path, version, model)
+        with self._lock:
+            if key in self._prefix_tokens:
+                return self._prefix_tokens[key]
+        tokens = count_tokens(combine_prompt("", criteria_content))
+        with self._lock:
+            self._prefix_tokens[key] = tokens
+        return tokens
+
+# Shared by the tagger workers, the batch tagger and the Send to GPT button
+prompt_builder = PromptBuilder()
@@ -0,0 +1,102 @@
+# project_root/rate_limiter.py
+import random
+import threading
+import time
+from typing import Optional
+
+def backoff_delay(attempt: int, base: float = 1.0, maximum: float = 60.0) -> float:
+    """Exponential backoff with jitter for the given retry attempt (0-based)."""
+    delay = min(maximum, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute up to a one-minute burst."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken (0 if it can be taken now)."""
+        self._refill(now)
+        # A single request larger than the whole budget only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budget shared by every API caller.
+
+    A limit of 0 disables that budget. After a 429 every caller is paused
+    until the server's Retry-After (or a jittered exponential backoff) has
+    passed, so the whole process backs off together instead of each
+    worker hammering the endpoint on its own.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: int = 0) -> float:
+        """Take budget for one request if available. Returns 0 on success, else seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._blocked_until - now
+            if self.requests:
+                wait = max(wait, self.requests.wait_time(1, now))
+            if self.tokens:
+                wait = max(wait, self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+            return 0.0
+
+    def acquire(self, tokens: int = 0):
+        """Block until the request fits in the budget."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            # Re-check periodically; a backoff may have been extended meanwhile
+            time.sleep(min(wait, 1.0))
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token budget once the real usage of a request is known."""
+        if not self.tokens or actual_tokens is None:
+            return
+        with self._lock:
+            difference = estimated_tokens - actual_tokens
+            if difference > 0:
+                self.tokens.give_back(difference)
+            else:
+                self.tokens.take(-difference)
+
+    def record_rate_limited(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Pause all callers after a 429. Returns the delay that was applied."""
+        delay = retry_after
+        if delay is None:
+            delay = backoff_delay(attempt, self.base_backoff, self.max_backoff)
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        return delay
@@ -0,0 +1,181 @@
+# project_root/scheduling.py
+"""Ordering of the tagger queue.
+
+Policies:
+    fifo      in the order files were queued (the folder listing order)
+    oldest    oldest file first, by modification time
+    smallest  shortest job first, by a token estimate from the file size
+    priority  explicit priority 0 (most urgent) to 9, from a "p<digit>_"
+              filename prefix or a "<filename>.priority" sidecar file;
+              files without one get DEFAULT_PRIORITY
+
+smallest and priority use aging so nothing starves: a job's place in the
+queue is its enqueue time plus a delay of at most max_delay seconds, scaled
+by its size or priority. A large or low-priority file can be overtaken only
+by files queued less than max_delay seconds after it. Because every waiting
+job ages at the same rate the key never has to be recomputed, and the
+queue stays a plain heap.
+
+A job with a "not_before" time (a requeued job backing off after a
+transient error) waits in a second heap until then, and only takes its
+place in the policy order once it is due.
+"""
+
+import heapq
+import itertools
+import os
+import queue
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+POLICIES = ["fifo", "oldest", "smallest", "priority"]
+
+PRIORITY_SUFFIX = ".priority"
+DEFAULT_PRIORITY = 5
+MAX_PRIORITY = 9
+_PRIORITY_PREFIX = re.compile(r"p(\d)[_\-]", re.IGNORECASE)
+
+# Inputs of this many tokens or more are delayed by the full max_delay
+SJF_FULL_DELAY_TOKENS = 100_000
+# Same rough ratio as tokenizer_service.estimate_tokens, applied to bytes
+BYTES_PER_TOKEN = 4
+
+# Sidecar priorities remembered for files not yet handed to a worker
+PRIORITY_CACHE_SIZE = 10_000
+
+def priority_for(input_path: str, check_sidecar: bool = True) -> Tuple[int, Optional[str]]:
+    """Priority of a monitored file and the sidecar it came from, if any."""
+    match = _PRIORITY_PREFIX.match(os.path.basename(input_path))
+    if match:
+        return int(match.group(1)), None
+    if check_sidecar:
+        sidecar = input_path + PRIORITY_SUFFIX
+        try:
+            with open(sidecar, "r", encoding="utf-8") as f:
+                return max(0, min(MAX_PRIORITY, int(f.read().strip()))), sidecar
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Ignoring priority file {sidecar}: {str(e)}")
+    return DEFAULT_PRIORITY, None
+
+class JobQueue(queue.Queue):
+    """Bounded, thread-safe queue of tagger jobs served in policy order.
+
+    Jobs are the dicts built by TaggerEngine; "size" and "mtime" are used
+    when present. The first enqueue time is kept in the job, so a requeued
+    job keeps its place instead of going to the back once its "not_before"
+    time, if any, has passed. Priorities are cached
+    by (input path, mtime), so a file that is rescanned while the queue is
+    full doesn't have its sidecar read again; a changed file is re-read.
+    """
+
+    def __init__(self, maxsize: int = 0, policy: str = "fifo", max_delay: float = 600.0):
+        self.policy = policy if policy in POLICIES else "fifo"
+        self.max_delay = max(0.0, float(max_delay))
+        self._priorities: Dict[Tuple[str, Optional[float]], Tuple[int, Optional[str]]] = {}
+        super().__init__(maxsize)
+
+    @classmethod
+    def from_settings(cls, settings_manager, maxsize: int) -> "JobQueue":
+        return cls(maxsize, settings_manager.get("queue_policy", "fifo"),
+                   settings_manager.get("queue_max_delay_seconds", 600))
+
+    def put(self, job, block=True, timeout=None):
+        # Reading a priority sidecar is file I/O; do it before taking the queue's lock
+        job.setdefault("enqueued_at", time.time())
+        if self.policy == "priority" and "priority" not in job:
+            job["priority"], job["priority_file"] = self._priority_for(job)
+        super().put(job, block, timeout)
+
+    def _priority_for(self, job: Dict) -> Tuple[int, Optional[str]]:
+        key = (job["input_path"], job.get("mtime"))
+        priority = self._priorities.get(key)
+        if priority is None:
+            priority = priority_for(job["input_path"])
+            if len(self._priorities) >= PRIORITY_CACHE_SIZE:
+                self._priorities.clear()
+            self._priorities[key] = priority
+        return priority
+
+    def get(self, block=True, timeout=None):
+        """Like Queue.get(), but a job isn't handed out before its "not_before" time."""
+        if timeout is not None and timeout < 0:
+            raise ValueError("'timeout' must be a non-negative number")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.not_empty:
+            while True:
+                wait = self._due_in()
+                if wait == 0:
+                    break
+                if not block:
+                    raise queue.Empty
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    wait = remaining if wait is None else min(wait, remaining)
+                # put() notifies not_empty, so a new job that is due right away cuts the wait short
+                self.not_empty.wait(wait)
+            job = self._get()
+            self.not_full.notify()
+            return job
+
+    def clear(self):
+        """Remove and return every queued job, due or not."""
+        with self.mutex:
+            jobs = [entry[2] for entry in self.queue + self._delayed]
+            self.queue = []
+            self._delayed = []
+            self._priorities.clear()
+            self.not_full.notify_all()
+        return jobs
+
+    def sort_key(self, job: Dict) -> float:
+        enqueued_at = job["enqueued_at"]
+        if self.policy == "oldest":
+            return job.get("mtime", enqueued_at)
+        if self.policy == "smallest":
+            tokens = job.get("size", 0) // BYTES_PER_TOKEN
+            return enqueued_at + self.max_delay * min(tokens, SJF_FULL_DELAY_TOKENS) / SJF_FULL_DELAY_TOKENS
+        if self.policy == "priority":
+            return enqueued_at + self.max_delay * job["priority"] / MAX_PRIORITY
+        return enqueued_at
+
+    # queue.Queue storage hooks; called with the queue's mutex held
+
+    def _init(self, maxsize):
+        self.queue = []  # jobs that are due, in policy order
+        self._delayed = []  # jobs backing off, by not_before
+        self._counter = itertools.count()
+
+    def _qsize(self):
+        return len(self.queue) + len(self._delayed)
+
+    def _put(self, job):
+        # The counter keeps equal keys in insertion order and jobs out of comparisons
+        not_before = job.get("not_before", 0)
+        if not_before > time.time():
+            heapq.heappush(self._delayed, (not_before, next(self._counter), job))
+        else:
+            heapq.heappush(self.queue, (self.sort_key(job), next(self._counter), job))
+
+    def _due_in(self) -> Optional[float]:
+        """Seconds until a job is due: 0 if one is, None if the queue is empty."""
+        now = time.time()
+        while self._delayed and self._delayed[0][0] <= now:
+            job = heapq.heappop(self._delayed)[2]
+            heapq.heappush(self.queue, (self.sort_key(job), next(self._counter), job))
+        if self.queue:
+            return 0
+        if self._delayed:
+            return self._delayed[0][0] - now
+        return None
+
+    def _get(self):
+        # Only called once _due_in() found a due job
+        job = heapq.heappop(self.queue)[2]
+        # Queued jobs carry their priority; the cache is only for files still waiting to get in
+        self._priorities.pop((job["input_path"], job.get("mtime")), None)
+        return job
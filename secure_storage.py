@@ -1,6 +1,6 @@
 # project_root/secure_storage.py
 import os
-from cryptography.fernet import Fernet
+import threading
 
 # In a real application, you would store the key in a secure location (e.g., OS keychain)
 # For demonstration, we generate or reuse a key stored locally.
@@ -8,6 +8,7 @@ from cryptography.fernet import Fernet
 KEY_FILE = os.path.join(os.path.expanduser("~"), ".my_app_key")
 
 def _get_or_create_key():
+    from cryptography.fernet import Fernet
     if not os.path.exists(KEY_FILE):
         key = Fernet.generate_key()
         with open(KEY_FILE, "wb") as f:
@@ -19,9 +20,18 @@ def _get_or_create_key():
 
 class SecureStorage:
     def __init__(self):
-        self.key = _get_or_create_key()
-        self.fernet = Fernet(self.key)
         self.api_key_file = os.path.join(os.path.expanduser("~"), ".my_app_api_key.enc")
+        self._fernet = None
+        self._lock = threading.Lock()
+
+    @property
+    def fernet(self):
+        # cryptography is imported on first use so it doesn't slow down startup
+        with self._lock:
+            if self._fernet is None:
+                from cryptography.fernet import Fernet
+                self._fernet = Fernet(_get_or_create_key())
+            return self._fernet
 
     def store_api_key(self, api_key: str):
         encrypted = self.fernet.encrypt(api_key.encode("utf-8"))
@@ -1,26 +1,126 @@
 # project_root/settings_manager.py
+import atexit
+import copy
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# Every setting and its default; written to a new settings.json and used for keys it lacks
+DEFAULT_SETTINGS = {
+    "folders": {
+        "split_folder": "",
+        "processed_folder": ""
+    },
+    "criteria_file": "",
+    "input_text": "",
+    "delimiter": ",",
+    "suffix": "SPLIT",
+    "monitored_folder": "",
+    "tagged_folder": "",
+    "model": "gpt-4",
+    "temperature": 0.7,
+    "monitoring_interval": 20,
+    "monitoring_mode": "watch",
+    "watch_settle_seconds": 2,
+    "watch_fallback_interval": 300,
+    "scan_recursive": False,
+    "output_index_refresh_seconds": 300,
+    "tagger_concurrency": 4,
+    "tagger_queue_size": 100,
+    "queue_policy": "fifo",
+    "queue_max_delay_seconds": 600,
+    "file_leasing_enabled": False,
+    "lease_seconds": 120,
+    "lease_worker_id": "",
+    "output_sink": "files",
+    "output_sink_path": "",
+    "output_jsonl_max_mb": 100,
+    "output_batch_size": 200,
+    "http_max_connections": 20,
+    "http_max_keepalive": 10,
+    "response_cache_enabled": True,
+    "response_cache_max_mb": 100,
+    "response_cache_max_age_days": 30,
+    "stream_responses": True,
+    "rate_limit_rpm": 0,
+    "rate_limit_tpm": 0,
+    "api_max_retries": 5,
+    "api_base_url": "",
+    "job_manifest_enabled": True,
+    "chunking_enabled": True,
+    "chunk_max_tokens": 0,
+    "chunk_reduce_mode": "concatenate",
+    "chunk_concurrency": 4,
+    "delimiter_is_regex": False,
+    "split_write_manifest": False,
+    "split_fsync_batch": 200,
+    "multi_criteria_enabled": False,
+    "tag_criteria_files": [],
+    "multi_criteria_output": "subfolder",
+    "metrics_port": 0,
+    "metrics_file": "",
+    "metrics_file_interval": 15,
+    "startup_timing": False,
+    "tokenizer_cache_dir": "",
+    "models_list": []
+}
+
+def ensure_settings_file():
+    """Create resources/settings.json with defaults if it does not exist yet."""
+    resources_path = os.path.join(os.path.dirname(__file__), "resources")
+    if not os.path.exists(resources_path):
+        os.makedirs(resources_path)
+    settings_path = os.path.join(resources_path, "settings.json")
+    if not os.path.exists(settings_path):
+        # Create default settings.json with all required fields
+        with open(settings_path, "w", encoding="utf-8") as f:
+            json.dump(DEFAULT_SETTINGS, f, indent=4)
+    return settings_path
+
+def atomic_write_json(path: str, data):
+    """Write JSON to a temp file in the same folder, fsync it, then rename it over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
 class SettingsManager:
-    def __init__(self, settings_path: str):
+    """Loads and saves settings.json.
+
+    With write_delay > 0 changes are coalesced and written once the delay
+    has passed without further changes (write-behind); call flush() to
+    write immediately. Saves always go through a temp file and rename, so
+    a crash never leaves a half-written settings.json behind.
+    """
+
+    def __init__(self, settings_path: str, write_delay: float = 1.0):
         self.settings_path = settings_path
-        self.settings_data = {
-            "folders": {
-                "split_folder": "",
-                "processed_folder": ""
-            },
-            "criteria_file": "",
-            "input_text": "",
-            "delimiter": ",",
-            "suffix": "SPLIT",
-            "monitored_folder": "",
-            "tagged_folder": "",
-            "model": "gpt-4",
-            "temperature": 0.7,
-            "monitoring_interval": 20
-        }
+        self.write_delay = write_delay
+        self._lock = threading.RLock()
+        # Serializes file writes; held without _lock so readers and setters never wait on disk
+        self._write_lock = threading.Lock()
+        self._flush_timer = None
+        self._dirty = False
+        self._batch_depth = 0
+        # Bumped on every change; a snapshot older than the one on disk is never written
+        self._generation = 0
+        self._written_generation = 0
+        self.settings_data = copy.deepcopy(DEFAULT_SETTINGS)
         self._load_settings()
+        # Make sure pending changes reach disk even if the caller forgets to flush
+        atexit.register(self.flush)
 
     def _load_settings(self):
         if os.path.exists(self.settings_path):
@@ -30,20 +130,95 @@ class SettingsManager:
                     if isinstance(data, dict):  # Verify we got valid data
                         self.settings_data.update(data)
             except json.JSONDecodeError:
-                # If file is corrupted, reset to defaults and save
-                with open(self.settings_path, "w", encoding="utf-8") as f:
-                    json.dump(self.settings_data, f, indent=4)
+                # If file is corrupted, keep a copy for inspection, then reset to defaults and save
+                try:
+                    os.replace(self.settings_path, self.settings_path + ".corrupt")
+                except OSError:
+                    pass
+                atomic_write_json(self.settings_path, self.settings_data)
 
     def save_settings(self):
-        with open(self.settings_path, "w", encoding="utf-8") as f:
-            json.dump(self.settings_data, f, indent=4)
+        """Write settings to disk now.
+
+        The data is copied under the lock and written outside it, so other
+        threads can keep reading and changing settings during the write.
+        """
+        with self._lock:
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            snapshot = copy.deepcopy(self.settings_data)
+            generation = self._generation
+            self._dirty = False
+        with self._write_lock:
+            if generation < self._written_generation:
+                # A newer snapshot reached disk while this one waited
+                return
+            try:
+                atomic_write_json(self.settings_path, snapshot)
+            except BaseException:
+                with self._lock:
+                    self._dirty = True
+                raise
+            self._written_generation = generation
+
+    def flush(self):
+        """Write pending changes, if any, without waiting for the write-behind timer."""
+        with self._lock:
+            dirty = self._dirty
+        if dirty:
+            self.save_settings()
+
+    @contextmanager
+    def transaction(self):
+        """Group several updates into a single save.
+
+        with settings_manager.transaction():
+            settings_manager.set("model", model)
+            settings_manager.set("temperature", temperature)
+        """
+        with self._lock:
+            self._batch_depth += 1
+        save_now = False
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    save_now = self._schedule_save()
+            if save_now:
+                self.save_settings()
+
+    def _schedule_save(self) -> bool:
+        """Mark settings dirty and start the write-behind timer. Caller holds _lock.
+
+        Returns True when the caller should save right away (write_delay <= 0);
+        the save happens after the caller releases the lock.
+        """
+        self._dirty = True
+        if self._batch_depth > 0:
+            return False
+        if self.write_delay <= 0:
+            return True
+        # Restart the timer so a burst of changes results in one write
+        if self._flush_timer:
+            self._flush_timer.cancel()
+        self._flush_timer = threading.Timer(self.write_delay, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+        return False
 
     def get(self, key, default=None):
         return self.settings_data.get(key, default)
 
     def set(self, key, value):
-        self.settings_data[key] = value
-        self.save_settings()
+        with self._lock:
+            self.settings_data[key] = value
+            self._generation += 1
+            save_now = self._schedule_save()
+        if save_now:
+            self.save_settings()
 
     def get_nested(self, *keys, default=None):
         data = self.settings_data
@@ -52,10 +227,14 @@ class SettingsManager:
         return data if data else default
 
     def set_nested(self, value, *keys):
-        data = self.settings_data
-        for k in keys[:-1]:
-            if k not in data:
-                data[k] = {}
-            data = data[k]
-        data[keys[-1]] = value
-        self.save_settings()
+        with self._lock:
+            data = self.settings_data
+            for k in keys[:-1]:
+                if k not in data:
+                    data[k] = {}
+                data = data[k]
+            data[keys[-1]] = value
+            self._generation += 1
+            save_now = self._schedule_save()
+        if save_now:
+            self.save_settings()
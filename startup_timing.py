@@ -0,0 +1,56 @@
+# project_root/startup_timing.py
+"""Opt-in report of where the time goes between launch and a fully initialized window.
+
+Enable with "startup_timing": true in settings.json or TAGGER_STARTUP_TIMING=1.
+Import this module first so its clock starts before the heavy imports.
+"""
+
+import os
+import threading
+import time
+from typing import Iterable, List, Tuple
+
+class StartupTimer:
+    """Collects named marks and prints them once every background task has finished."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.enabled = os.environ.get("TAGGER_STARTUP_TIMING", "") not in ("", "0")
+        self._lock = threading.Lock()
+        self._marks: List[Tuple[str, float, str]] = []  # (label, seconds since start, thread)
+        self._pending = set()
+        self._reported = False
+
+    def mark(self, label: str):
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            self._marks.append((label, elapsed, threading.current_thread().name))
+
+    def expect(self, tasks: Iterable[str]):
+        """Background tasks that must finish before the report is printed."""
+        with self._lock:
+            self._pending.update(tasks)
+
+    def task_done(self, task: str):
+        self.mark(f"{task} ready")
+        with self._lock:
+            self._pending.discard(task)
+            finished = not self._pending
+        if finished:
+            self.report()
+
+    def report(self):
+        with self._lock:
+            if self._reported or not self.enabled:
+                return
+            self._reported = True
+            marks = sorted(self._marks, key=lambda m: m[1])
+        print("Startup timing (ms since launch, ms since previous mark):")
+        previous = 0.0
+        for label, elapsed, thread in marks:
+            where = "" if thread == "MainThread" else f"  [{thread}]"
+            print(f"  {elapsed * 1000:8.1f}  {(elapsed - previous) * 1000:+8.1f}  {label}{where}")
+            previous = elapsed
+
+# Shared by main.py and the panels that initialize in the background
+startup_timer = StartupTimer()
@@ -0,0 +1,197 @@
+# project_root/tagger_cli.py
+"""Headless tagger that runs the monitored-folder pipeline without Qt.
+
+Usage:
+    python -m tagger_cli --once     # drain the monitored folder and exit
+    python -m tagger_cli --watch    # keep watching the folder (default)
+    python -m tagger_cli --batch run   # drain through the Batch API (also: submit, poll)
+
+Folders, prefix, model and concurrency come from settings.json. The API
+key is read from OPENAI_API_KEY, falling back to the key saved by the GUI.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+from settings_manager import SettingsManager, ensure_settings_file
+from tagger_engine import TaggerEngine, scan_ready_files
+from job_manifest import JobManifest
+from file_lease import FileLeases
+from output_sinks import create_sink
+import metrics
+from tokenizer_service import tokenizer_service
+
+def _load_api_key() -> str:
+    api_key = os.environ.get("OPENAI_API_KEY", "")
+    if api_key:
+        return api_key
+    # Only pull in cryptography when the environment doesn't provide a key
+    from secure_storage import SecureStorage
+    return SecureStorage().retrieve_api_key()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tagger_cli", description="Run the tagger without the GUI.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--once", action="store_true", help="process the current backlog and exit")
+    mode.add_argument("--watch", action="store_true", help="keep polling the monitored folder (default)")
+    mode.add_argument("--batch", choices=["submit", "poll", "run"],
+                      help="use the Batch API: submit the backlog, poll open jobs, or both until done")
+    parser.add_argument("--settings", help="path to settings.json (default: resources/settings.json)")
+    parser.add_argument("--criteria", nargs="+",
+                        help="criteria file(s); with several, each input is tagged against all of them "
+                             "(default: tag_criteria_files if multi-criteria is enabled, else tag_criteria_file)")
+    parser.add_argument("--concurrency", type=int, help="parallel requests (default: tagger_concurrency)")
+    parser.add_argument("--recursive", action="store_true", default=None,
+                        help="also tag files in subfolders of the monitored folder (default: scan_recursive)")
+    parser.add_argument("--interval", type=float, help="seconds between scans in watch mode (default: monitoring_interval)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve Prometheus metrics on 127.0.0.1:PORT/metrics (default: metrics_port)")
+    parser.add_argument("--metrics-file", help="rewrite Prometheus metrics to this file periodically (default: metrics_file)")
+    parser.add_argument("--batch-poll-interval", type=float, default=60, help="seconds between batch status checks")
+    return parser.parse_args(argv)
+
+def drain(engine: TaggerEngine, monitored_folder: str, stop_event: threading.Event, recursive: bool = False):
+    """Queue everything in the folder, wait for it, and repeat until nothing new fits."""
+    while not stop_event.is_set():
+        ready, _ = scan_ready_files(monitored_folder, recursive=recursive)
+        # Files that fail are left in place; don't retry them forever in one-shot mode
+        complete = engine.queue_ready_files(ready, retry_failed=False)
+        engine.wait_idle()
+        if complete:
+            return
+
+def watch(engine: TaggerEngine, monitored_folder: str, interval: float, settle_seconds: float,
+          stop_event: threading.Event, recursive: bool = False):
+    while not stop_event.is_set():
+        ready, next_check = scan_ready_files(monitored_folder, settle_seconds, recursive)
+        engine.queue_ready_files(ready)
+        wait = interval if next_check is None else min(interval, next_check + 0.1)
+        stop_event.wait(wait)
+
+def run_batch(args, settings_manager, openai_interface, criteria_file: str) -> int:
+    from batch_tagger import BatchTagger
+    manifest = JobManifest.from_settings(settings_manager)
+    sink = create_sink(settings_manager)
+    batch_tagger = BatchTagger(settings_manager, openai_interface, criteria_file, manifest=manifest, sink=sink)
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    try:
+        if args.batch == "submit":
+            if batch_tagger.submit() is None:
+                print("Nothing to submit")
+        elif args.batch == "poll":
+            batch_tagger.poll()
+        else:
+            batch_tagger.run(args.batch_poll_interval, stop_event)
+    finally:
+        sink.close()
+        if manifest:
+            manifest.close()
+        openai_interface.close()
+        settings_manager.flush()
+    for job in batch_tagger.open_jobs():
+        print(f"Batch {job['batch_id']}: {job['status']}")
+    return 0
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # The batch tagger reports through logging; show it like the rest of the output
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    settings_manager = SettingsManager(args.settings or ensure_settings_file())
+    tokenizer_service.configure_from_settings(settings_manager)
+
+    monitored_folder = settings_manager.get("monitored_folder", "")
+    tagged_folder = settings_manager.get("tagged_folder", "")
+    if args.criteria:
+        criteria_files = args.criteria
+    elif settings_manager.get("multi_criteria_enabled", False) and settings_manager.get("tag_criteria_files", []):
+        criteria_files = settings_manager.get("tag_criteria_files", [])
+    else:
+        criteria_files = [settings_manager.get("tag_criteria_file", "")]
+    if not monitored_folder or not os.path.isdir(monitored_folder):
+        print(f"Monitored folder not found: {monitored_folder!r}", file=sys.stderr)
+        return 2
+    if not tagged_folder or not os.path.isdir(tagged_folder):
+        print(f"Tagged folder not found: {tagged_folder!r}", file=sys.stderr)
+        return 2
+    for criteria_file in criteria_files:
+        if not criteria_file or not os.path.isfile(criteria_file):
+            print(f"Criteria file not found: {criteria_file!r}", file=sys.stderr)
+            return 2
+
+    from openai_interface import OpenAIInterface
+    openai_interface = OpenAIInterface.from_settings(settings_manager, _load_api_key())
+
+    if args.batch:
+        if len(criteria_files) > 1:
+            print("Batch mode supports a single criteria file", file=sys.stderr)
+            return 2
+        return run_batch(args, settings_manager, openai_interface, criteria_files[0])
+
+    def report(filename, success, message):
+        if not success:
+            print(f"Error processing {filename}: {message}")
+
+    from chunking import Chunker
+    manifest = JobManifest.from_settings(settings_manager)
+    leases = FileLeases.from_settings(settings_manager)
+    sink = create_sink(settings_manager)
+    engine = TaggerEngine(
+        settings_manager, openai_interface, criteria_files,
+        concurrency=args.concurrency or settings_manager.get("tagger_concurrency", 4),
+        queue_size=settings_manager.get("tagger_queue_size", 100),
+        manifest=manifest,
+        chunker=Chunker.from_settings(settings_manager),
+        leases=leases,
+        sink=sink,
+        on_file_finished=report
+    )
+
+    stop_event = threading.Event()
+    metrics_server = metrics.start_exporters(settings_manager, stop_event, args.metrics_port, args.metrics_file)
+
+    def handle_signal(signum, frame):
+        print("Stopping after in-flight files finish...")
+        stop_event.set()
+        engine.stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    recursive = args.recursive or settings_manager.get("scan_recursive", False)
+    engine.start()
+    try:
+        if args.once:
+            drain(engine, monitored_folder, stop_event, recursive)
+        else:
+            interval = args.interval or settings_manager.get("monitoring_interval", 20)
+            watch(engine, monitored_folder, interval, settings_manager.get("watch_settle_seconds", 2), stop_event,
+                  recursive)
+    finally:
+        engine.stop()
+        engine.wait_idle(timeout=120)
+        if leases:
+            leases.close(timeout=10)
+        sink.close()
+        openai_interface.close()
+        if manifest:
+            manifest.close()
+        if metrics_server:
+            metrics_server.shutdown()
+        stop_event.set()
+        settings_manager.flush()
+
+    stats = engine.stats()
+    print(f"Done: {stats['done']} | Skipped: {stats['skipped']} | Failed: {stats['failed']}")
+    p50 = metrics.api_request_seconds.percentile(50)
+    if p50 is not None:
+        print(f"API latency p50: {p50:.2f}s | p95: {metrics.api_request_seconds.percentile(95):.2f}s | "
+              f"Tokens: {int(metrics.api_tokens.value(kind='prompt') + metrics.api_tokens.value(kind='completion'))}")
+    return 1 if args.once and stats["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,589 @@
+# project_root/tagger_engine.py
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from prompt_builder import combine_prompt, prompt_builder
+from chunking import merge_usage
+import metrics
+from job_manifest import JobManifest, content_hash, PENDING, DONE, FAILED, SKIPPED
+from scheduling import JobQueue
+from output_sinks import FileSink
+from rate_limiter import backoff_delay
+
+ALLOWED_EXTENSIONS = [".txt", ".md"]
+
+class RetryableError(Exception):
+    """The API call failed for a transient reason (e.g. rate limit); the file can be requeued."""
+
+class SkippedFile(Exception):
+    """Every output already exists from something other than this tagger; the file is left alone."""
+
+OUTPUT_LAYOUTS = ["subfolder", "prefix"]
+
+def output_filename_for(filename: str, prefix: str) -> str:
+    """Name of the tagged output for a monitored file (which may be in a subfolder)."""
+    if prefix:
+        folder, name = os.path.split(filename)
+        return os.path.join(folder, f"{prefix}_{name}")
+    return filename
+
+def output_paths_for(tagged_folder: str, filename: str, prefix: str, criteria_files: List[str],
+                     layout: str = "subfolder") -> List[str]:
+    """Tagged output path for a monitored file, one per criteria file.
+
+    A single criteria file writes straight into tagged_folder. With several,
+    each criteria file gets a subfolder (layout "subfolder") or an extra
+    filename prefix (layout "prefix") named after the criteria file.
+    """
+    name = output_filename_for(filename, prefix)
+    if len(criteria_files) == 1:
+        return [os.path.join(tagged_folder, name)]
+    paths = []
+    for criteria_file in criteria_files:
+        criteria_name = os.path.splitext(os.path.basename(criteria_file))[0]
+        if layout == "prefix":
+            paths.append(os.path.join(tagged_folder, f"{criteria_name}_{name}"))
+        else:
+            paths.append(os.path.join(tagged_folder, criteria_name, name))
+    return paths
+
+def _iter_files(folder: str, recursive: bool = False, relative_to: str = ""):
+    """(relative path, DirEntry) for the files in folder, via os.scandir.
+
+    Hidden folders such as the .batch staging area are never entered.
+    """
+    folders = [(folder, relative_to)]
+    while folders:
+        path, relative = folders.pop()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = os.path.join(relative, entry.name) if relative else entry.name
+                    try:
+                        # Answered from the directory listing on most platforms, no stat needed
+                        if entry.is_file():
+                            yield name, entry
+                        elif recursive and entry.is_dir() and not entry.name.startswith("."):
+                            folders.append((entry.path, name))
+                    except OSError:
+                        continue
+        except OSError as e:
+            if path == folder:
+                raise
+            print(f"Error scanning {path}: {str(e)}")
+
+def scan_ready_files(folder: str, settle_seconds: float = 0.0,
+                     recursive: bool = False) -> Tuple[List[Tuple[str, int, float]], Optional[float]]:
+    """List monitored files whose mtime has been stable for settle_seconds.
+
+    Returns (ready, next_check) where ready is a list of (filename, size, mtime)
+    tuples and next_check is the number of seconds until the next unsettled
+    file should be looked at again, or None if every file was ready. With
+    recursive=True files in subfolders are included, named by their path
+    relative to folder.
+    """
+    started = time.monotonic()
+    now = time.time()
+    ready = []
+    next_check = None
+    for f, entry in _iter_files(folder, recursive):
+        if os.path.splitext(f)[1].lower() not in ALLOWED_EXTENSIONS:
+            continue
+        try:
+            # Cached from the directory listing on Windows; one stat elsewhere
+            st = entry.stat()
+        except OSError:
+            # Removed or renamed between listing and stat
+            continue
+        age = now - st.st_mtime
+        if age < settle_seconds:
+            # Still being written; look again once it should have settled
+            wait = settle_seconds - age
+            next_check = wait if next_check is None else min(next_check, wait)
+            continue
+        ready.append((f, st.st_size, st.st_mtime))
+    metrics.folder_scan_seconds.observe(time.monotonic() - started)
+    metrics.folder_backlog_files.set(len(ready))
+    return ready, next_check
+
+class OutputIndex:
+    """The set of files in the tagged folder, so queueing never stats output paths.
+
+    Built with one scandir walk, updated as outputs are written, and rebuilt
+    every refresh_seconds to pick up outputs added or removed by anything
+    else. Workers still check the disk before calling the API, so a stale
+    entry can only delay a file until the next rebuild.
+    """
+
+    def __init__(self, folder: str = "", refresh_seconds: float = 300.0):
+        self.folder = folder
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._paths = set()
+        self._built_at = None
+
+    def set_folder(self, folder: str):
+        with self._lock:
+            if folder != self.folder:
+                self.folder = folder
+                self._built_at = None
+
+    def _rebuild(self):
+        paths = set()
+        if self.folder and os.path.isdir(self.folder):
+            try:
+                paths = {os.path.normpath(os.path.join(self.folder, name))
+                         for name, _ in _iter_files(self.folder, recursive=True)}
+            except OSError as e:
+                print(f"Error indexing tagged folder: {str(e)}")
+        self._paths = paths
+        self._built_at = time.monotonic()
+
+    def contains(self, path: str) -> bool:
+        with self._lock:
+            if self._built_at is None or time.monotonic() - self._built_at > self.refresh_seconds:
+                self._rebuild()
+            return os.path.normpath(path) in self._paths
+
+    def add(self, path: str):
+        with self._lock:
+            self._paths.add(os.path.normpath(path))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._paths)
+
+def _remove_source(input_path: str, filename: str):
+    # Delete the source file after successful processing
+    try:
+        os.remove(input_path)
+        print(f"Successfully processed and deleted: {filename}")
+    except Exception as e:
+        print(f"Error deleting file {filename}: {str(e)}")
+
+def _tag_with_criteria(openai_interface, input_text: str, criteria_file: str, chunker=None) -> Dict:
+    # Criteria are read once and reused until the file changes
+    criteria_content = prompt_builder.criteria(criteria_file)
+    if chunker:
+        template_tokens = prompt_builder.template_tokens(
+            criteria_file, openai_interface.model, openai_interface.count_tokens
+        )
+        return chunker.tag(openai_interface, input_text, criteria_content, template_tokens)
+    # Combine using the template
+    return openai_interface.send_text(combine_prompt(input_text, criteria_content))
+
+def process_file(openai_interface, job: Dict, manifest: Optional[JobManifest] = None,
+                 chunker=None, sink=None) -> Tuple[bool, str]:
+    """Read, combine, send, write and delete a single monitored file.
+
+    job["targets"] lists one {"criteria_file", "output_path"} per criteria
+    file. The input is read once and tagged against every criteria file
+    concurrently; the source is only deleted once every output exists, and
+    a retry only repeats the criteria whose output is still missing.
+
+    With a manifest, each attempt is recorded against the file's content
+    hash, so a file whose outputs were written before a crash is finished
+    off without calling the API again. With a chunker (see chunking.py),
+    inputs over the prompt budget are tagged in parallel chunks. A file
+    claimed through file leasing is read and deleted at job["claimed_path"];
+    the manifest still knows it by its monitored path. Results go to sink
+    (see output_sinks.py), one file per target by default. Raises
+    SkippedFile if the outputs exist but weren't written for this input.
+    """
+    sink = sink or FileSink()
+    input_path = job["input_path"]
+    source_path = job.get("claimed_path", input_path)
+    output_path = job["output_path"]
+    filename = job["filename"]
+    targets = job["targets"]
+
+    # Read input file
+    with open(source_path, "r", encoding="utf-8") as f:
+        input_text = f.read()
+
+    # Append-only sinks know results by content, so they need the hash too
+    digest = content_hash(input_text) if manifest or sink.appends else None
+    job["digest"] = digest
+    record = manifest.lookup(input_path, digest) if manifest else None
+
+    # Another worker (or a previous run) may have finished this file already. Results
+    # written by an earlier attempt of this job are remembered without asking the sink.
+    written = job.setdefault("written", [])
+    missing = [target for target in targets
+               if target["criteria_file"] not in written and not sink.exists(job, target)]
+    if not missing:
+        # An append-only sink's results are for this very content, so they are ours too
+        if sink.appends or (record is not None and record["state"] != SKIPPED):
+            # Our own output (written atomically) from a run that died before deleting the source
+            if manifest and (record is None or record["state"] != DONE):
+                manifest.finish(input_path, digest, DONE, filename=filename, output_path=output_path)
+            _remove_source(source_path, filename)
+            return True, "Already tagged"
+        if manifest:
+            manifest.finish(input_path, digest, SKIPPED, error="Output already exists",
+                            filename=filename, output_path=output_path)
+        raise SkippedFile("Output already exists")
+
+    # Send to GPT
+    if manifest:
+        manifest.start(input_path, digest, filename, output_path)
+    started = time.monotonic()
+    try:
+        if len(missing) == 1:
+            responses = [_tag_with_criteria(openai_interface, input_text, missing[0]["criteria_file"], chunker)]
+        else:
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                responses = list(executor.map(
+                    lambda target: _tag_with_criteria(openai_interface, input_text, target["criteria_file"], chunker),
+                    missing
+                ))
+    except Exception as e:
+        if manifest:
+            manifest.finish(input_path, digest, FAILED, time.monotonic() - started, error=str(e))
+        raise
+    latency = time.monotonic() - started
+    usage = merge_usage([response for response in responses if "error" not in response])
+
+    # Save the tagged outputs that succeeded
+    errors = []
+    try:
+        for target, response in zip(missing, responses):
+            if "error" in response:
+                errors.append((target, response))
+                continue
+            sink.write(job, target, response, latency)
+            written.append(target["criteria_file"])
+    except Exception as e:
+        if manifest:
+            manifest.finish(input_path, digest, FAILED, latency, usage, error=str(e))
+        raise
+
+    if errors:
+        target, response = errors[0]
+        message = response["error"]
+        if len(targets) > 1:
+            message = f"{os.path.basename(target['criteria_file'])}: {message}"
+        retryable = any(response.get("retryable") for _, response in errors)
+        if manifest:
+            manifest.finish(input_path, digest, PENDING if retryable else FAILED, latency, usage, error=message)
+        if retryable:
+            raise RetryableError(message)
+        return False, message
+
+    if manifest:
+        manifest.finish(input_path, digest, DONE, latency, usage)
+
+    _remove_source(source_path, filename)
+    return True, "Tagged"
+
+class TaggerEngine:
+    """Monitor -> combine -> send -> write -> delete pipeline, independent of any UI.
+
+    Files are handed over with queue_ready_files() and processed on a pool
+    of worker threads, in the order set by queue_policy (see scheduling.py).
+    With leases (see file_lease.py) each file is claimed before it is
+    tagged, so several engines can share one monitored folder. Progress is reported through optional callbacks,
+    which run on the worker threads. criteria_files may be a single path
+    or a list, in which case every file is tagged against each of them.
+    """
+
+    def __init__(self, settings_manager, openai_interface, criteria_files: Union[str, List[str]],
+                 concurrency: int = 4, queue_size: int = 100, max_requeues: int = 3, requeue_delay: float = 1.0,
+                 manifest: Optional[JobManifest] = None, chunker=None, leases=None, sink=None,
+                 on_progress: Optional[Callable[[int, int, int, int], None]] = None,
+                 on_file_started: Optional[Callable[[str], None]] = None,
+                 on_file_finished: Optional[Callable[[str, bool, str], None]] = None):
+        self.settings_manager = settings_manager
+        self.openai_interface = openai_interface
+        self.criteria_files = [criteria_files] if isinstance(criteria_files, str) else list(criteria_files)
+        self.concurrency = max(1, int(concurrency))
+        self.queue = JobQueue.from_settings(settings_manager, max(1, int(queue_size)))
+        self.max_requeues = max_requeues
+        # Base of the exponential backoff before a requeued job is handed out again
+        self.requeue_delay = requeue_delay
+        self.manifest = manifest
+        self.chunker = chunker
+        self.leases = leases
+        self.sink = sink or FileSink()
+        self.output_index = OutputIndex(settings_manager.get("tagged_folder", ""),
+                                        settings_manager.get("output_index_refresh_seconds", 300))
+        self.on_progress = on_progress
+        self.on_file_started = on_file_started
+        self.on_file_finished = on_file_finished
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = set()  # input paths queued or in progress
+        self._failed_paths = set()
+        self._in_progress = 0
+        self._done = 0
+        self._failed = 0
+        self._skipped = 0
+
+    def start(self):
+        """Start the worker threads if they are not already running."""
+        if self._threads:
+            return
+        # Each generation of workers gets its own stop event so a quick
+        # stop/start cannot leave old threads consuming the new queue
+        self._stop_event = threading.Event()
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._worker_loop, args=(self._stop_event,),
+                                      name=f"tagger-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.leases:
+            self.leases.start()
+        self._resume_pending()
+
+    def _resume_pending(self):
+        """Queue jobs the manifest still has pending (e.g. interrupted by a crash)."""
+        if not self.manifest:
+            return
+        monitored_folder = self.settings_manager.get("monitored_folder", "")
+        for job in self.manifest.pending_jobs():
+            # filename is relative to the monitored folder (it may include a subfolder)
+            if os.path.abspath(os.path.join(monitored_folder, job["filename"])) != os.path.abspath(job["input_path"]):
+                continue
+            try:
+                st = os.stat(job["input_path"])
+            except OSError:
+                continue
+            job = self._make_job(job["filename"], job["input_path"], st.st_size, st.st_mtime)
+            if not self.submit(job) and self.queue.full():
+                # The folder scan picks up the rest
+                break
+
+    def stop(self):
+        """Drop queued jobs and let workers exit after their current file."""
+        # Including requeued jobs still backing off
+        for job in self.queue.clear():
+            with self._lock:
+                self._pending.discard(job["input_path"])
+                self._idle.notify_all()
+        if self._threads:
+            self._stop_event.set()
+            if self.leases:
+                # Keeps heartbeating until the files in progress are finished
+                self.leases.stop()
+        self._threads = []
+        self._emit_progress()
+
+    def is_running(self) -> bool:
+        return bool(self._threads)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queued": self.queue.qsize(),
+                "in_progress": self._in_progress,
+                "done": self._done,
+                "failed": self._failed,
+                "skipped": self._skipped,
+            }
+
+    def _make_job(self, filename: str, input_path: str, size: int = 0, mtime: Optional[float] = None) -> Dict:
+        output_paths = output_paths_for(
+            self.settings_manager.get("tagged_folder", ""),
+            filename,
+            self.settings_manager.get("tag_prefix", ""),
+            self.criteria_files,
+            self.settings_manager.get("multi_criteria_output", "subfolder")
+        )
+        return {
+            "filename": filename,
+            "input_path": input_path,
+            "size": size,
+            # Scheduling falls back to the enqueue time
+            **({"mtime": mtime} if mtime is not None else {}),
+            # The first output stands for the job in the manifest
+            "output_path": output_paths[0],
+            "targets": [
+                {"criteria_file": criteria_file, "output_path": output_path}
+                for criteria_file, output_path in zip(self.criteria_files, output_paths)
+            ],
+        }
+
+    def queue_ready_files(self, ready_files: List[Tuple[str, int, float]], retry_failed: bool = True) -> bool:
+        """Queue settled (filename, size, mtime) entries from the monitored folder.
+
+        Zero-byte files are deleted, files whose outputs all exist are
+        skipped. Returns False if the queue filled up before every file
+        could be queued, in which case the caller should rescan later.
+        With retry_failed=False, files that already failed in this run are
+        left alone.
+        """
+        monitored_folder = self.settings_manager.get("monitored_folder", "")
+        self.output_index.set_folder(self.settings_manager.get("tagged_folder", ""))
+        # One indexed lookup for the whole scan instead of a stat per output
+        states = {}
+        if self.manifest:
+            states = self.manifest.latest_states(
+                os.path.join(monitored_folder, filename) for filename, _, _ in ready_files
+            )
+
+        for filename, size, mtime in ready_files:
+            input_path = os.path.join(monitored_folder, filename)
+
+            # Check for zero-byte files immediately
+            if size == 0:
+                try:
+                    os.remove(input_path)
+                    print(f"Deleted zero-byte file: {filename}")
+                except Exception as e:
+                    print(f"Error deleting zero-byte file {filename}: {str(e)}")
+                continue
+
+            if self.is_pending(input_path):
+                continue
+            if not retry_failed and input_path in self._failed_paths:
+                continue
+            job = self._make_job(filename, input_path, size, mtime)
+
+            # Skip if output files already exist. With a manifest only files it
+            # has seen skipped need the check; the worker checks new ones.
+            state = states.get(input_path)
+            if (not self.manifest or state == SKIPPED) and not self.sink.appends and all(
+                self.output_index.contains(target["output_path"]) for target in job["targets"]
+            ):
+                continue
+
+            if not self.submit(job):
+                return False
+        return True
+
+    def submit(self, job: Dict[str, str]) -> bool:
+        """Queue a job without blocking. Returns False if it is already pending or the queue is full."""
+        input_path = job["input_path"]
+        with self._lock:
+            if input_path in self._pending:
+                return False
+            self._pending.add(input_path)
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._pending.discard(input_path)
+                self._idle.notify_all()
+            return False
+        self._emit_progress()
+        return True
+
+    def is_pending(self, input_path: str) -> bool:
+        with self._lock:
+            return input_path in self._pending
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until nothing is queued or in progress. Returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def _requeue(self, job: Dict[str, str]) -> bool:
+        """Put a job that hit a transient error back on the queue, keeping it pending."""
+        attempts = job.get("requeues", 0)
+        if attempts >= self.max_requeues:
+            return False
+        if self.leases:
+            # Let go of the file while it waits; whoever gets to it next claims it again
+            self.leases.release(job)
+        job["requeues"] = attempts + 1
+        # Keeps its place in the queue, but not before the backoff has passed
+        job["not_before"] = time.time() + backoff_delay(attempts, base=self.requeue_delay)
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            return False
+        with self._lock:
+            self._in_progress -= 1
+        self._emit_progress()
+        return True
+
+    def _finish_unclaimed(self, job: Dict):
+        """Drop a job whose file was gone when it came to be claimed."""
+        metrics.tagger_files.inc(outcome="claimed_elsewhere")
+        with self._lock:
+            self._in_progress -= 1
+            self._pending.discard(job["input_path"])
+            self._idle.notify_all()
+        self._emit_progress()
+
+    def _emit_progress(self):
+        stats = self.stats()
+        metrics.tagger_queue_depth.set(stats["queued"])
+        metrics.tagger_in_progress.set(stats["in_progress"])
+        if not self.on_progress:
+            return
+        self.on_progress(stats["queued"], stats["in_progress"], stats["done"], stats["failed"])
+
+    def _worker_loop(self, stop_event: threading.Event):
+        while not stop_event.is_set():
+            try:
+                job = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self._lock:
+                self._in_progress += 1
+            if "requeues" not in job:
+                metrics.tagger_queue_wait_seconds.observe(time.time() - job["enqueued_at"])
+            if self.leases:
+                job["claimed_path"] = self.leases.claim(job)
+                if job["claimed_path"] is None:
+                    # Another worker claimed (or finished) it first
+                    del job["claimed_path"]
+                    self._finish_unclaimed(job)
+                    continue
+            self._emit_progress()
+            if self.on_file_started:
+                self.on_file_started(job["filename"])
+            started = time.monotonic()
+            skipped = False
+            try:
+                success, message = process_file(self.openai_interface, job, self.manifest, self.chunker, self.sink)
+            except SkippedFile as e:
+                # Not a failure: the file simply stays where it is
+                skipped, success, message = True, False, str(e)
+            except RetryableError as e:
+                if self._requeue(job):
+                    metrics.tagger_files.inc(outcome="requeued")
+                    continue
+                success, message = False, str(e)
+            except Exception as e:
+                success, message = False, str(e)
+            if self.leases:
+                if success:
+                    self.leases.done(job)
+                else:
+                    self.leases.release(job)
+            metrics.tagger_file_seconds.observe(time.monotonic() - started)
+            metrics.tagger_files.inc(outcome="done" if success else "skipped" if skipped else "failed")
+            if success:
+                if not self.sink.appends:
+                    for target in job["targets"]:
+                        self.output_index.add(target["output_path"])
+                if job.get("priority_file"):
+                    # The sidecar has served its purpose once the source is gone
+                    try:
+                        os.remove(job["priority_file"])
+                    except OSError:
+                        pass
+            with self._lock:
+                self._in_progress -= 1
+                self._pending.discard(job["input_path"])
+                if success:
+                    self._done += 1
+                    self._failed_paths.discard(job["input_path"])
+                elif skipped:
+                    self._skipped += 1
+                else:
+                    self._failed += 1
+                    self._failed_paths.add(job["input_path"])
+                self._idle.notify_all()
+            if self.on_file_finished:
+                # A skip is reported as not tagged, but isn't an error
+                self.on_file_finished(job["filename"], success or skipped, message)
+            self._emit_progress()
@@ -0,0 +1,83 @@
+# project_root/tests/conftest.py
+"""Shared fixtures: a settings file in a temp folder and a fake OpenAI client.
+
+Nothing here needs the openai package or network access; FakeOpenAI stands
+in for OpenAIInterface wherever the tagger only calls send_text() and the
+token counters.
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from settings_manager import SettingsManager
+
+class FakeOpenAI:
+    """Answers every prompt with "tagged: <last line of the prompt>", i.e. of the input text.
+
+    respond(prompt) may return a result dict (e.g. {"error": ...}) to
+    override the answer for a prompt; returning None keeps the default.
+    """
+
+    def __init__(self, model: str = "gpt-4", respond=None):
+        self.model = model
+        self.respond = respond
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def count_tokens(self, text: str) -> int:
+        return len(text) // 4
+
+    def count_tokens_batch(self, texts):
+        return [self.count_tokens(text) for text in texts]
+
+    def send_text(self, prompt: str, use_cache: bool = True):
+        with self._lock:
+            self.prompts.append(prompt)
+        if self.respond:
+            result = self.respond(prompt)
+            if result is not None:
+                return result
+        return {
+            "content": "tagged: " + prompt.strip().splitlines()[-1],
+            "finish_reason": "stop",
+            "model": self.model,
+            "usage": {"prompt_tokens": self.count_tokens(prompt), "completion_tokens": 3,
+                      "total_tokens": self.count_tokens(prompt) + 3, "cached_tokens": 0},
+        }
+
+@pytest.fixture
+def fake_openai():
+    return FakeOpenAI()
+
+@pytest.fixture
+def settings(tmp_path):
+    """Settings with an empty monitored folder, tagged folder and one criteria file."""
+    settings_manager = SettingsManager(str(tmp_path / "settings.json"), write_delay=0)
+    monitored = tmp_path / "monitored"
+    tagged = tmp_path / "tagged"
+    monitored.mkdir()
+    tagged.mkdir()
+    criteria = tmp_path / "criteria.md"
+    criteria.write_text("Tag the topic.", encoding="utf-8")
+    with settings_manager.transaction():
+        settings_manager.set("monitored_folder", str(monitored))
+        settings_manager.set("tagged_folder", str(tagged))
+        settings_manager.set("tag_criteria_file", str(criteria))
+    return settings_manager
+
+def write_inputs(folder, count: int, prefix: str = "doc"):
+    """Create count small input files; returns their names."""
+    names = []
+    for i in range(count):
+        name = f"{prefix}{i:03d}.txt"
+        with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+            f.write(f"{name} body text\n")
+        names.append(name)
+    return names
@@ -0,0 +1,153 @@
+# project_root/tests/test_batch_tagger.py
+import json
+import os
+import sqlite3
+from types import SimpleNamespace
+
+from batch_tagger import BatchTagger
+from conftest import FakeOpenAI, write_inputs
+from job_manifest import JobManifest
+from output_sinks import SqliteSink
+
+class FakeBatchClient:
+    """The files and batches endpoints BatchTagger uses; completes every batch on the first poll.
+
+    Requests in fail_custom_ids get a 500 in the output file; those in
+    expire_custom_ids land in the error file instead.
+    """
+
+    def __init__(self, client, fail_custom_ids=(), expire_custom_ids=()):
+        self.fake_openai = client
+        self.fail_custom_ids = set(fail_custom_ids)
+        self.expire_custom_ids = set(expire_custom_ids)
+        self.uploads = {}
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose):
+        self.uploads["input"] = file[1].decode("utf-8")
+        return SimpleNamespace(id="file-input")
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        return SimpleNamespace(id="batch-1", status="validating")
+
+    def _retrieve_batch(self, batch_id):
+        return SimpleNamespace(status="completed", output_file_id="file-output",
+                               error_file_id="file-error" if self.expire_custom_ids else None,
+                               request_counts=None)
+
+    def _file_content(self, file_id):
+        lines = []
+        for line in self.uploads["input"].splitlines():
+            request = json.loads(line)
+            custom_id = request["custom_id"]
+            if (file_id == "file-error") != (custom_id in self.expire_custom_ids):
+                continue
+            if custom_id in self.expire_custom_ids:
+                record = {"custom_id": custom_id, "response": None,
+                          "error": {"code": "batch_expired", "message": "not completed in time"}}
+            elif custom_id in self.fail_custom_ids:
+                record = {"custom_id": custom_id,
+                          "response": {"status_code": 500, "body": {"error": {"message": "server error"}}}}
+            else:
+                result = self.fake_openai.send_text(request["body"]["messages"][-1]["content"])
+                body = {"model": result["model"], "usage": result["usage"],
+                        "choices": [{"message": {"content": result["content"]}}]}
+                record = {"custom_id": custom_id, "response": {"status_code": 200, "body": body}}
+            lines.append(json.dumps(record))
+        return SimpleNamespace(text="\n".join(lines))
+
+class FakeBatchOpenAI(FakeOpenAI):
+    def __init__(self, fail_custom_ids=(), expire_custom_ids=()):
+        super().__init__()
+        self.client = FakeBatchClient(self, fail_custom_ids, expire_custom_ids)
+
+    def chat_request_body(self, prompt):
+        return {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
+
+def test_batch_results_go_through_the_sink_and_manifest(settings, tmp_path):
+    settings.set("watch_settle_seconds", 0)
+    monitored = settings.get("monitored_folder")
+    write_inputs(monitored, 3)
+    client = FakeBatchOpenAI(fail_custom_ids={"1"})
+    manifest = JobManifest(str(tmp_path / "jobs.sqlite"))
+    sink = SqliteSink(str(tmp_path / "results.sqlite"))
+    batch_tagger = BatchTagger(settings, client, settings.get("tag_criteria_file"), manifest=manifest, sink=sink)
+
+    job = batch_tagger.submit()
+    assert len(job["files"]) == 3
+    assert [name for name in os.listdir(monitored) if not name.startswith(".")] == []
+
+    batch_tagger.poll()
+    sink.close()
+
+    failed = job["files"]["1"]["filename"]
+    assert job["status"] == "collected"
+    assert [name for name in os.listdir(monitored) if not name.startswith(".")] == [failed]
+    assert manifest.stats() == {"done": 2, "failed": 1}
+    with sqlite3.connect(str(tmp_path / "results.sqlite")) as conn:
+        rows = conn.execute("SELECT source, digest, content FROM tagged_results ORDER BY source").fetchall()
+    assert [row[0] for row in rows] == sorted(entry["filename"] for entry in job["files"].values()
+                                             if entry["filename"] != failed)
+    assert all(row[1] and row[2].startswith("tagged: ") for row in rows)
+
+def test_submit_leaves_out_files_already_tagged(settings, tmp_path):
+    settings.set("watch_settle_seconds", 0)
+    write_inputs(settings.get("monitored_folder"), 2)
+    with open(os.path.join(settings.get("tagged_folder"), "doc000.txt"), "w", encoding="utf-8") as f:
+        f.write("tagged earlier")
+    batch_tagger = BatchTagger(settings, FakeBatchOpenAI(), settings.get("tag_criteria_file"),
+                               state_path=str(tmp_path / "batch_jobs.json"))
+
+    job = batch_tagger.submit()
+    assert [entry["filename"] for entry in job["files"].values()] == ["doc001.txt"]
+
+def _inputs(monitored):
+    return sorted(name for name in os.listdir(monitored) if not name.startswith("."))
+
+def test_requests_in_the_error_file_are_failed_and_returned(settings, tmp_path):
+    settings.set("watch_settle_seconds", 0)
+    monitored = settings.get("monitored_folder")
+    write_inputs(monitored, 3)
+    manifest = JobManifest(str(tmp_path / "jobs.sqlite"))
+    batch_tagger = BatchTagger(settings, FakeBatchOpenAI(expire_custom_ids={"2"}), settings.get("tag_criteria_file"),
+                               state_path=str(tmp_path / "batch_jobs.json"), manifest=manifest)
+
+    job = batch_tagger.submit()
+    batch_tagger.poll()
+
+    expired = job["files"]["2"]
+    assert "batch_expired" in expired["error"]
+    assert _inputs(monitored) == [expired["filename"]]
+    assert manifest.stats() == {"done": 2, "failed": 1}
+
+def test_unreadable_files_are_skipped_and_recorded(settings, tmp_path):
+    settings.set("watch_settle_seconds", 0)
+    monitored = settings.get("monitored_folder")
+    write_inputs(monitored, 2)
+    with open(os.path.join(monitored, "binary.txt"), "wb") as f:
+        f.write(b"\xff\xfe\x00not utf-8")
+    batch_tagger = BatchTagger(settings, FakeBatchOpenAI(), settings.get("tag_criteria_file"),
+                               state_path=str(tmp_path / "batch_jobs.json"))
+
+    job = batch_tagger.submit()
+    assert sorted(entry["filename"] for entry in job["files"].values()) == ["doc000.txt", "doc001.txt"]
+    assert list(job["skipped"]) == ["binary.txt"]
+    assert _inputs(monitored) == ["binary.txt"]
+
+def test_returned_file_does_not_replace_a_newer_one(settings, tmp_path):
+    settings.set("watch_settle_seconds", 0)
+    monitored = settings.get("monitored_folder")
+    write_inputs(monitored, 1)
+    batch_tagger = BatchTagger(settings, FakeBatchOpenAI(fail_custom_ids={"0"}), settings.get("tag_criteria_file"),
+                               state_path=str(tmp_path / "batch_jobs.json"))
+
+    batch_tagger.submit()
+    with open(os.path.join(monitored, "doc000.txt"), "w", encoding="utf-8") as f:
+        f.write("a newer version")
+    batch_tagger.poll()
+
+    names = _inputs(monitored)
+    assert names[0] == "doc000.txt" and names[1].startswith("doc000.txt.returned-")
+    with open(os.path.join(monitored, "doc000.txt"), encoding="utf-8") as f:
+        assert f.read() == "a newer version"
@@ -0,0 +1,53 @@
+# project_root/tests/test_chunking.py
+from chunking import Chunker, context_window, prompt_budget, split_into_chunks
+from config import DEFAULT_CONTEXT_WINDOW, MAX_TOKENS
+from conftest import FakeOpenAI
+
+def _paragraphs(count: int, words: int = 50) -> str:
+    return "\n\n".join(" ".join(f"w{i}" for _ in range(words)) for i in range(count))
+
+def test_context_window_uses_the_longest_prefix():
+    assert context_window("gpt-4") == 8192
+    assert context_window("gpt-4-32k-0613") == 32768
+    assert context_window("gpt-4o-mini") == 128000
+    assert context_window("some-new-model") == DEFAULT_CONTEXT_WINDOW
+    assert prompt_budget("gpt-4") < 8192 - MAX_TOKENS
+
+def test_input_that_fits_is_not_split():
+    client = FakeOpenAI()
+    text = "short input"
+    assert Chunker(max_prompt_tokens=1000).split(client, text, "criteria") == [text]
+
+def test_input_over_the_budget_is_split_within_it():
+    client = FakeOpenAI()
+    text = _paragraphs(40)
+    chunks = Chunker(max_prompt_tokens=1000).split(client, text, "criteria", template_tokens=100)
+    assert len(chunks) > 1
+    # Blocks are budgeted one by one, plus a token for each separating blank line
+    assert all(sum(client.count_tokens(block) + 1 for block in chunk.split("\n\n")) <= 900 for chunk in chunks)
+    assert "\n\n".join(chunks).split() == text.split()
+
+def test_automatic_budget_follows_the_model():
+    text = _paragraphs(100, words=100)  # about 10,000 tokens with FakeOpenAI's counter
+    assert len(Chunker().split(FakeOpenAI("gpt-4"), text, "criteria")) > 1
+    assert Chunker().split(FakeOpenAI("gpt-4o"), text, "criteria") == [text]
+
+def test_oversized_block_is_cut_by_lines_and_characters():
+    text = "x" * 10_000
+    chunks = split_into_chunks(text, 300, lambda s: len(s) // 4)
+    assert "".join(chunks) == text
+    assert all(len(chunk) // 4 <= 300 for chunk in chunks)
+
+def test_tag_concatenates_chunk_results_in_order():
+    client = FakeOpenAI()
+    text = _paragraphs(40)
+    result = Chunker(max_prompt_tokens=1000).tag(client, text, "criteria", template_tokens=100)
+    assert result["chunks"] == len(client.prompts) > 1
+    assert result["content"].count("tagged: ") == result["chunks"]
+    assert result["usage"]["completion_tokens"] == 3 * result["chunks"]
+
+def test_tag_reports_failed_chunks():
+    client = FakeOpenAI(respond=lambda prompt: {"error": "API Error: 429", "retryable": True} if "w3 " in prompt else None)
+    result = Chunker(max_prompt_tokens=1000).tag(client, _paragraphs(40), "criteria", template_tokens=100)
+    assert result["error"].startswith("Chunk ")
+    assert result["retryable"]
@@ -0,0 +1,90 @@
+# project_root/tests/test_file_lease.py
+import os
+import time
+
+import pytest
+
+from file_lease import FileLeases, HEARTBEAT_FILE, LEASE_FOLDER
+
+@pytest.fixture
+def monitored(tmp_path):
+    folder = tmp_path / "monitored"
+    folder.mkdir()
+    return str(folder)
+
+def _input(monitored, name="a.txt", text="text"):
+    path = os.path.join(monitored, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return {"filename": name, "input_path": path}
+
+def test_claim_moves_the_file_and_only_one_worker_gets_it(monitored):
+    first = FileLeases(monitored, "worker-a")
+    second = FileLeases(monitored, "worker-b")
+    job = _input(monitored)
+
+    claimed = first.claim(dict(job))
+    assert claimed == os.path.join(monitored, LEASE_FOLDER, "worker-a", "a.txt")
+    assert os.path.exists(claimed) and not os.path.exists(job["input_path"])
+    assert second.claim(dict(job)) is None
+
+def test_release_returns_the_file(monitored):
+    leases = FileLeases(monitored, "worker-a")
+    job = _input(monitored)
+    job["claimed_path"] = leases.claim(job)
+
+    leases.release(job)
+    assert os.path.exists(job["input_path"])
+    assert "claimed_path" not in job
+
+def test_release_next_to_a_newer_file_keeps_both(monitored):
+    leases = FileLeases(monitored, "worker-a")
+    job = _input(monitored, text="old")
+    job["claimed_path"] = leases.claim(job)
+    _input(monitored, text="new")
+
+    leases.release(job)
+    names = sorted(os.listdir(monitored))
+    assert names[0] == LEASE_FOLDER and names[1] == "a.txt"
+    assert names[2].startswith("a.txt.returned-")
+    with open(os.path.join(monitored, names[2]), encoding="utf-8") as f:
+        assert f.read() == "old"
+
+def test_expired_leases_are_reclaimed(monitored):
+    dead = FileLeases(monitored, "worker-dead", lease_seconds=5)
+    dead.heartbeat()
+    job = _input(monitored)
+    dead.claim(job)
+    # The dead worker's last heartbeat was long ago
+    stale = time.time() - 60
+    os.utime(os.path.join(dead.folder, HEARTBEAT_FILE), (stale, stale))
+
+    alive = FileLeases(monitored, "worker-alive", lease_seconds=5)
+    assert alive.reclaim_expired() == 1
+    assert os.path.exists(job["input_path"])
+    assert not os.path.exists(dead.folder)
+
+def test_live_leases_are_left_alone(monitored):
+    other = FileLeases(monitored, "worker-other", lease_seconds=60)
+    other.heartbeat()
+    job = _input(monitored)
+    other.claim(job)
+
+    assert FileLeases(monitored, "worker-me", lease_seconds=60).reclaim_expired() == 0
+    assert not os.path.exists(job["input_path"])
+
+def test_restart_takes_back_its_own_files(monitored):
+    crashed = FileLeases(monitored)
+    crashed.heartbeat()
+    job = _input(monitored)
+    crashed.claim(job)
+
+    # Same host and install, so the same default worker id
+    restarted = FileLeases(monitored)
+    assert restarted.worker_id == crashed.worker_id
+    restarted.start()
+    try:
+        assert os.path.exists(job["input_path"])
+    finally:
+        restarted.close(timeout=5)
+    assert not os.path.exists(os.path.join(monitored, LEASE_FOLDER))
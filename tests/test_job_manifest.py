@@ -0,0 +1,29 @@
+# project_root/tests/test_job_manifest.py
+from job_manifest import JobManifest, DONE, IN_FLIGHT, PENDING
+
+def test_manifest_resets_jobs_left_in_flight(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    manifest = JobManifest(path)
+    manifest.start("/in/a.txt", "hash-a", "a.txt", "/out/a.txt")
+    manifest.start("/in/b.txt", "hash-b", "b.txt", "/out/b.txt")
+    manifest.finish("/in/b.txt", "hash-b", DONE)
+    assert manifest.lookup("/in/a.txt", "hash-a")["state"] == IN_FLIGHT
+    manifest.close()
+
+    reopened = JobManifest(path)
+    assert reopened.recovered == 1
+    assert reopened.pending_jobs() == [{"input_path": "/in/a.txt", "filename": "a.txt", "output_path": "/out/a.txt"}]
+    assert reopened.latest_states(["/in/a.txt", "/in/b.txt"]) == {"/in/a.txt": PENDING, "/in/b.txt": DONE}
+
+def test_jobs_are_keyed_by_path_and_content(tmp_path):
+    manifest = JobManifest(str(tmp_path / "jobs.sqlite"))
+    manifest.start("/in/a.txt", "hash-a", "a.txt", "/out/a.txt")
+    manifest.finish("/in/a.txt", "hash-a", DONE, 1.5, {"prompt_tokens": 10, "completion_tokens": 2})
+    # New content under the same name is a new job
+    manifest.start("/in/a.txt", "hash-a2", "a.txt", "/out/a.txt")
+
+    done = manifest.lookup("/in/a.txt", "hash-a")
+    assert (done["state"], done["attempts"], done["prompt_tokens"]) == (DONE, 1, 10)
+    assert manifest.lookup("/in/a.txt", "hash-a2")["state"] == IN_FLIGHT
+    assert manifest.stats() == {DONE: 1, IN_FLIGHT: 1}
+    manifest.close()
@@ -0,0 +1,90 @@
+# project_root/tests/test_metrics.py
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+from metrics import Counter, Histogram, MetricsRegistry, RATE_WINDOW_SECONDS
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": 10_000.0}
+    monkeypatch.setattr(metrics, "time", SimpleNamespace(monotonic=lambda: now["t"]))
+    return now
+
+def test_rate_counts_every_increment_under_load(clock):
+    counter = Counter("requests_total", "")
+    for _ in range(5000):
+        counter.inc(outcome="ok")
+    counter.inc(3, outcome="error")
+
+    assert counter.rate_per_minute() == 5003
+    assert counter.rate_per_minute(outcome="ok") == 5000
+    assert counter.rate_per_minute(outcome="error") == 3
+    assert counter.rate_per_minute(outcome="cached") == 0
+
+def test_rate_only_covers_the_window(clock):
+    counter = Counter("requests_total", "")
+    counter.inc(10)
+    clock["t"] += 30
+    counter.inc(20)
+    assert counter.rate_per_minute(window=60) == 30
+    # Only the second burst is within the last 10 seconds: 20 per 10 s
+    assert counter.rate_per_minute(window=10) == 120
+
+    clock["t"] += 45
+    assert counter.rate_per_minute(window=60) == 20
+    clock["t"] += 60
+    assert counter.rate_per_minute(window=60) == 0
+    assert counter.value() == 30
+
+def test_rate_memory_is_bounded_by_the_window(clock):
+    counter = Counter("requests_total", "")
+    for _ in range(3 * RATE_WINDOW_SECONDS):
+        counter.inc()
+        clock["t"] += 1
+    assert len(counter._per_second) <= RATE_WINDOW_SECONDS
+    assert counter.rate_per_minute(window=RATE_WINDOW_SECONDS) == 60 * (RATE_WINDOW_SECONDS - 1) / RATE_WINDOW_SECONDS
+
+def test_histogram_percentiles():
+    histogram = Histogram("latency_seconds", "", buckets=(1, 5))
+    assert histogram.percentile(50) is None
+    for value in range(1, 101):
+        histogram.observe(value / 10)
+    assert histogram.percentile(50) == 5.1
+    assert histogram.percentile(95) == 9.5
+    assert histogram.count == 100
+
+def test_prometheus_rendering():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests by outcome").inc(2, outcome="ok")
+    registry.counter("requests_total").inc(path='a "quoted"\nname')
+    registry.gauge("queue_depth").set(7)
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.5, 1))
+    for value in (0.2, 0.7, 3):
+        histogram.observe(value)
+
+    assert registry.render_prometheus().splitlines() == [
+        "# HELP requests_total Requests by outcome",
+        "# TYPE requests_total counter",
+        'requests_total{outcome="ok"} 2',
+        'requests_total{path="a \\"quoted\\"\\nname"} 1',
+        "# TYPE queue_depth gauge",
+        "queue_depth 7",
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.5"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 3.9",
+        "latency_seconds_count 3",
+    ]
+
+def test_prometheus_file_is_replaced_whole(tmp_path):
+    registry = MetricsRegistry()
+    registry.gauge("queue_depth").set(1)
+    path = str(tmp_path / "tagger.prom")
+    registry.write_prometheus_file(path)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == registry.render_prometheus()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["tagger.prom"]
@@ -0,0 +1,38 @@
+# project_root/tests/test_openai_interface.py
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+
+from openai_interface import OpenAIInterface
+
+@pytest.fixture
+def interface():
+    interface = OpenAIInterface("sk-test", base_url="http://127.0.0.1:9/v1")
+    yield interface
+    interface.close()
+
+def test_send_many_yields_every_result_with_bounded_concurrency(interface):
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def send_text(prompt, use_cache=True):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        # Later prompts finish first
+        time.sleep(0.05 if prompt == "p0" else 0.01)
+        with lock:
+            running["now"] -= 1
+        return {"content": prompt.upper(), "finish_reason": "stop", "model": "gpt-4", "usage": None}
+
+    interface.send_text = send_text
+    results = list(interface.send_many((f"p{i}" for i in range(10)), max_in_flight=3))
+
+    assert sorted(index for index, _ in results) == list(range(10))
+    assert all(result["content"] == f"P{index}" for index, result in results)
+    assert results[0][0] != 0
+    assert running["peak"] <= 3
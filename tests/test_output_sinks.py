@@ -0,0 +1,115 @@
+# project_root/tests/test_output_sinks.py
+import json
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from output_sinks import FileSink, JsonlSink, SqliteSink, _GroupCommitSink
+
+RESPONSE = {"content": "tagged", "model": "gpt-4", "usage": {"prompt_tokens": 10, "completion_tokens": 2}}
+
+def _job(name="a.txt", digest="hash-a"):
+    return {"filename": name, "digest": digest}
+
+def _target(folder, name="a.txt", criteria_file="criteria.md"):
+    return {"criteria_file": criteria_file, "output_path": os.path.join(str(folder), name)}
+
+def test_group_commit_sink_is_abstract():
+    with pytest.raises(TypeError):
+        _GroupCommitSink()
+
+def test_file_sink_exists_once_written(tmp_path):
+    sink = FileSink()
+    target = _target(tmp_path / "out" / "sub")
+    assert not sink.exists(_job(), target)
+    sink.write(_job(), target, RESPONSE, 0.1)
+    assert sink.exists(_job(), target)
+    with open(target["output_path"], encoding="utf-8") as f:
+        assert f.read() == "tagged"
+
+@pytest.mark.parametrize("make_sink", [
+    lambda path: JsonlSink(str(path / "jsonl")),
+    lambda path: SqliteSink(str(path / "results.sqlite")),
+], ids=["jsonl", "sqlite"])
+def test_append_sinks_know_what_they_wrote_across_reopens(tmp_path, make_sink):
+    target = _target(tmp_path)
+    sink = make_sink(tmp_path)
+    assert not sink.exists(_job(), target)
+    sink.write(_job(), target, RESPONSE, 0.1)
+    assert sink.exists(_job(), target)
+    sink.close()
+
+    reopened = make_sink(tmp_path)
+    try:
+        assert reopened.exists(_job(), target)
+        # Same name, new content: a different result
+        assert not reopened.exists(_job(digest="hash-b"), target)
+        assert not reopened.exists(_job(), _target(tmp_path, criteria_file="other.md"))
+    finally:
+        reopened.close()
+
+def test_sqlite_sink_ignores_a_repeated_result(tmp_path):
+    path = tmp_path / "results.sqlite"
+    sink = SqliteSink(str(path))
+    sink.write(_job(), _target(tmp_path), RESPONSE, 0.1)
+    sink.write(_job(), _target(tmp_path), RESPONSE, 0.2)
+    sink.close()
+    with sqlite3.connect(str(path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tagged_results").fetchone()[0] == 1
+
+def test_jsonl_sink_commits_concurrent_writes(tmp_path):
+    sink = JsonlSink(str(tmp_path), batch_size=8)
+    threads = [
+        threading.Thread(target=sink.write, args=(_job(f"f{i}.txt", f"h{i}"), _target(tmp_path), RESPONSE, 0.1))
+        for i in range(50)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.close()
+
+    with open(sink.path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert sorted(record["source"] for record in records) == sorted(f"f{i}.txt" for i in range(50))
+    assert all(record["usage"]["prompt_tokens"] == 10 for record in records)
+
+def test_write_after_close_raises(tmp_path):
+    sink = JsonlSink(str(tmp_path))
+    sink.close()
+    with pytest.raises(RuntimeError):
+        sink.write(_job(), _target(tmp_path), RESPONSE, 0.1)
+
+def test_jsonl_sink_reopens_from_its_key_index(tmp_path, monkeypatch):
+    sink = JsonlSink(str(tmp_path))
+    for i in range(3):
+        sink.write(_job(f"f{i}.txt", f"h{i}"), _target(tmp_path), RESPONSE, 0.1)
+    sink.close()
+    keys_path = sink.path[:-len(".jsonl")] + ".keys"
+    with open(keys_path, encoding="ascii") as f:
+        assert len(f.read().split()) == 3
+
+    # Opening reads only the index, never the records
+    monkeypatch.setattr(JsonlSink, "_read_record_keys", staticmethod(lambda path: pytest.fail(path)))
+    reopened = JsonlSink(str(tmp_path))
+    try:
+        assert all(reopened.exists(_job(f"f{i}.txt", f"h{i}"), _target(tmp_path)) for i in range(3))
+        assert not reopened.exists(_job("f3.txt", "h3"), _target(tmp_path))
+    finally:
+        reopened.close()
+
+def test_jsonl_sink_indexes_files_written_without_a_key_index(tmp_path):
+    sink = JsonlSink(str(tmp_path))
+    sink.write(_job(), _target(tmp_path), RESPONSE, 0.1)
+    sink.close()
+    os.remove(sink.path[:-len(".jsonl")] + ".keys")
+    with open(sink.path, "a", encoding="utf-8") as f:
+        f.write('{"source": "torn')
+
+    reopened = JsonlSink(str(tmp_path))
+    try:
+        assert reopened.exists(_job(), _target(tmp_path))
+    finally:
+        reopened.close()
@@ -0,0 +1,60 @@
+# project_root/tests/test_prompt_builder.py
+import os
+
+import pytest
+
+import prompt_builder
+from prompt_builder import PromptBuilder, combine_prompt
+
+@pytest.fixture
+def criteria(tmp_path):
+    path = tmp_path / "criteria.md"
+    path.write_text("Tag the topic.", encoding="utf-8")
+    return str(path)
+
+def _rewrite(path, text, mtime):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.utime(path, (mtime, mtime))
+
+def test_criteria_are_read_once_while_unchanged(criteria, monkeypatch):
+    builder = PromptBuilder()
+    opened = []
+
+    def recording_open(path, *args, **kwargs):
+        opened.append(path)
+        return open(path, *args, **kwargs)
+
+    monkeypatch.setattr(prompt_builder, "open", recording_open, raising=False)
+
+    for _ in range(3):
+        assert builder.build(" input ", criteria) == combine_prompt("input", "Tag the topic.")
+    assert opened == [criteria]
+
+def test_changed_mtime_reloads_the_criteria(criteria):
+    builder = PromptBuilder()
+    mtime = os.stat(criteria).st_mtime
+    assert builder.criteria(criteria) == "Tag the topic."
+
+    # Same size, so only the mtime gives the change away
+    _rewrite(criteria, "Tag the place.", mtime + 10)
+    assert builder.criteria(criteria) == "Tag the place."
+
+def test_template_tokens_are_counted_once_per_version_and_model(criteria):
+    builder = PromptBuilder()
+    counted = []
+
+    def count_tokens(text):
+        counted.append(text)
+        return len(text)
+
+    first = builder.template_tokens(criteria, "gpt-4", count_tokens)
+    assert builder.template_tokens(criteria, "gpt-4", count_tokens) == first
+    builder.template_tokens(criteria, "gpt-4o", count_tokens)
+    assert len(counted) == 2
+
+    _rewrite(criteria, "Tag the topic and the place.", os.stat(criteria).st_mtime + 10)
+    assert builder.template_tokens(criteria, "gpt-4", count_tokens) == first + len(" and the place")
+    assert len(counted) == 3
+    # The old version's counts are dropped
+    assert all(key[1] == builder._load(criteria)[0] for key in builder._prefix_tokens)
@@ -0,0 +1,114 @@
+# project_root/tests/test_rate_limiter.py
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from rate_limiter import RateLimiter, backoff_delay
+
+def test_backoff_grows_with_jitter_and_is_capped():
+    for attempt in range(8):
+        delay = backoff_delay(attempt, base=1.0, maximum=30.0)
+        full = min(30.0, 2 ** attempt)
+        assert full / 2 <= delay <= full
+
+def test_request_budget_runs_out():
+    limiter = RateLimiter(requests_per_minute=2)
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == 0
+    # The bucket refills at two requests a minute
+    assert 0 < limiter.try_acquire() <= 30
+
+def test_token_budget_is_settled_with_actual_usage():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    assert limiter.try_acquire(900) == 0
+    assert limiter.try_acquire(500) > 0
+    # The request used far fewer tokens than estimated
+    limiter.record_usage(900, 100)
+    assert limiter.try_acquire(500) == 0
+
+def test_rate_limited_response_pauses_every_caller():
+    limiter = RateLimiter()
+    assert limiter.try_acquire() == 0
+    assert limiter.record_rate_limited(0, retry_after=5) == 5
+    assert 4 < limiter.try_acquire() <= 5
+
+def test_backoff_without_retry_after():
+    limiter = RateLimiter(base_backoff=2.0, max_backoff=8.0)
+    delay = limiter.record_rate_limited(5)
+    assert 4.0 <= delay <= 8.0
+    assert limiter.try_acquire() > 0
+
+def _rate_limit_error(headers):
+    openai = pytest.importorskip("openai")
+    httpx = pytest.importorskip("httpx")
+    request = httpx.Request("POST", "http://127.0.0.1:9/v1/chat/completions")
+    return openai.RateLimitError("rate limited", response=httpx.Response(429, headers=headers, request=request), body=None)
+
+def test_retry_after_header_is_read_from_api_errors():
+    pytest.importorskip("openai")
+    from openai_interface import _retry_after_seconds
+
+    assert _retry_after_seconds(_rate_limit_error({"retry-after-ms": "1500"})) == 1.5
+    assert _retry_after_seconds(_rate_limit_error({"retry-after": "7"})) == 7.0
+    # The HTTP-date form is left to our own backoff
+    assert _retry_after_seconds(_rate_limit_error({"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"})) is None
+    assert _retry_after_seconds(_rate_limit_error({})) is None
+
+class _RecordingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__()
+        self.rate_limited = []
+
+    def record_rate_limited(self, attempt, retry_after=None):
+        self.rate_limited.append((attempt, retry_after))
+        return super().record_rate_limited(attempt, retry_after)
+
+def _interface(errors, **kwargs):
+    """An interface whose first len(errors) requests fail with those errors."""
+    from openai_interface import OpenAIInterface
+
+    interface = OpenAIInterface("sk-test", base_url="http://127.0.0.1:9/v1", **kwargs)
+    remaining = list(errors)
+
+    def create(**request):
+        if remaining:
+            raise remaining.pop(0)
+        message = SimpleNamespace(content="answer")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")],
+                               model=request["model"], usage=None)
+
+    interface.client.chat.completions.create = create
+    return interface
+
+def test_429_pauses_the_shared_limiter_for_retry_after():
+    errors = [_rate_limit_error({"retry-after-ms": "50"}), _rate_limit_error({"retry-after-ms": "50"})]
+    limiter = _RecordingLimiter()
+    interface = _interface(errors, rate_limiter=limiter)
+    try:
+        started = time.monotonic()
+        assert interface.send_text("prompt")["content"] == "answer"
+        assert time.monotonic() - started >= 0.09
+    finally:
+        interface.close()
+    assert limiter.rate_limited == [(0, 0.05), (1, 0.05)]
+
+def test_429_without_a_limiter_sleeps_for_retry_after(monkeypatch):
+    interface = _interface([_rate_limit_error({"retry-after": "3"})])
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    try:
+        assert interface.send_text("prompt")["content"] == "answer"
+    finally:
+        interface.close()
+    assert sleeps == [3.0]
+
+def test_429_after_the_last_retry_is_reported_as_retryable():
+    errors = [_rate_limit_error({"retry-after-ms": "1"}) for _ in range(3)]
+    interface = _interface(errors, rate_limiter=RateLimiter(), max_retries=2)
+    try:
+        result = interface.send_text("prompt")
+    finally:
+        interface.close()
+    assert result["retryable"]
+    assert result["error"].startswith("API Error: ")
@@ -0,0 +1,93 @@
+# project_root/tests/test_response_cache.py
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+def _result(text):
+    return {"content": text, "finish_reason": "stop", "model": "gpt-4", "usage": None}
+
+def _size(text):
+    return len(json.dumps(_result(text), ensure_ascii=False).encode("utf-8"))
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable clock, so access order doesn't depend on timer resolution."""
+    now = {"t": 1_000_000.0}
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(time=lambda: now["t"]))
+    return now
+
+def test_key_covers_everything_that_changes_the_answer():
+    key = ResponseCache.make_key("gpt-4", 0.7, "system", "prompt")
+    assert key == ResponseCache.make_key("gpt-4", 0.7, "system", "prompt")
+    assert key != ResponseCache.make_key("gpt-4o", 0.7, "system", "prompt")
+    assert key != ResponseCache.make_key("gpt-4", 0.2, "system", "prompt")
+    assert key != ResponseCache.make_key("gpt-4", 0.7, "other system", "prompt")
+    assert key != ResponseCache.make_key("gpt-4", 0.7, "system", "other prompt")
+
+def test_get_returns_what_was_put_across_reopens(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    assert cache.get("k") is None
+    cache.put("k", _result("answer"))
+    assert cache.get("k") == _result("answer")
+    cache.close()
+
+    reopened = ResponseCache(path)
+    try:
+        assert reopened.get("k") == _result("answer")
+        assert reopened.stats()["entries"] == 1
+    finally:
+        reopened.close()
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=3 * _size("a"))
+    for key in ("a", "b", "c"):
+        clock["t"] += 1
+        cache.put(key, _result(key))
+    clock["t"] += 1
+    assert cache.get("a") is not None  # "b" is now the least recently used
+
+    clock["t"] += 1
+    cache.put("d", _result("d"))
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+    assert cache.stats()["bytes"] <= 3 * _size("a")
+    cache.close()
+
+def test_expired_entries_are_misses(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_age_seconds=60)
+    cache.put("k", _result("answer"))
+    clock["t"] += 61
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
+    cache.close()
+
+def test_send_text_bypasses_the_cache_on_request(tmp_path):
+    pytest.importorskip("openai")
+    pytest.importorskip("httpx")
+    from openai_interface import OpenAIInterface
+
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    interface = OpenAIInterface("sk-test", cache=cache, base_url="http://127.0.0.1:9/v1")
+    answers = iter(["first", "second"])
+
+    def create_completion(messages, **kwargs):
+        message = SimpleNamespace(content=next(answers))
+        response = SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")],
+                                   model="gpt-4", usage=None)
+        return response, 0
+
+    interface._create_completion = create_completion
+    try:
+        assert interface.send_text("prompt")["content"] == "first"
+        assert interface.send_text("prompt")["cached"]
+        # Bypassing skips the lookup but refreshes the stored answer
+        assert interface.send_text("prompt", use_cache=False)["content"] == "second"
+        assert interface.send_text("prompt")["content"] == "second"
+    finally:
+        interface.close()
+        cache.close()
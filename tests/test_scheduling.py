@@ -0,0 +1,128 @@
+# project_root/tests/test_scheduling.py
+import queue
+import threading
+import time
+
+import pytest
+
+from scheduling import JobQueue, DEFAULT_PRIORITY, PRIORITY_SUFFIX, priority_for
+
+def _drain(job_queue):
+    names = []
+    while True:
+        try:
+            names.append(job_queue.get_nowait()["input_path"])
+        except queue.Empty:
+            return names
+
+def _put(job_queue, name, enqueued_at, **fields):
+    job_queue.put({"input_path": name, "enqueued_at": enqueued_at, **fields})
+
+def test_fifo_keeps_queue_order():
+    job_queue = JobQueue(policy="fifo")
+    for i, name in enumerate(["c", "a", "b"]):
+        _put(job_queue, name, 100.0 + i, mtime=300.0 - i)
+    assert _drain(job_queue) == ["c", "a", "b"]
+
+def test_oldest_orders_by_mtime():
+    job_queue = JobQueue(policy="oldest")
+    _put(job_queue, "new", 100.0, mtime=50.0)
+    _put(job_queue, "old", 101.0, mtime=10.0)
+    _put(job_queue, "middle", 102.0, mtime=30.0)
+    assert _drain(job_queue) == ["old", "middle", "new"]
+
+def test_smallest_first_within_max_delay():
+    job_queue = JobQueue(policy="smallest", max_delay=600)
+    _put(job_queue, "large", 100.0, size=400_000)
+    _put(job_queue, "small", 101.0, size=400)
+    assert _drain(job_queue) == ["small", "large"]
+
+def test_aging_lets_a_waiting_large_job_go_first():
+    job_queue = JobQueue(policy="smallest", max_delay=60)
+    _put(job_queue, "large", 100.0, size=400_000)
+    # Queued after the large job's full delay has passed
+    _put(job_queue, "small", 161.0, size=400)
+    assert _drain(job_queue) == ["large", "small"]
+
+def test_priority_from_prefix_and_sidecar(tmp_path):
+    urgent = tmp_path / "p0_report.txt"
+    sidecar = tmp_path / "notes.txt"
+    plain = tmp_path / "plain.txt"
+    with open(str(sidecar) + PRIORITY_SUFFIX, "w", encoding="utf-8") as f:
+        f.write("2\n")
+
+    assert priority_for(str(urgent)) == (0, None)
+    assert priority_for(str(sidecar)) == (2, str(sidecar) + PRIORITY_SUFFIX)
+    assert priority_for(str(plain)) == (DEFAULT_PRIORITY, None)
+
+    job_queue = JobQueue(policy="priority", max_delay=600)
+    _put(job_queue, str(plain), 100.0)
+    _put(job_queue, str(sidecar), 101.0)
+    _put(job_queue, str(urgent), 102.0)
+    assert _drain(job_queue) == [str(urgent), str(sidecar), str(plain)]
+
+def test_priority_sidecar_is_read_once_per_mtime(tmp_path, monkeypatch):
+    reads = []
+
+    def counting_priority_for(input_path):
+        reads.append(input_path)
+        return 3, None
+
+    monkeypatch.setattr("scheduling.priority_for", counting_priority_for)
+    job_queue = JobQueue(maxsize=1, policy="priority")
+    job_queue.put_nowait({"input_path": "first", "mtime": 1.0})
+    for _ in range(3):
+        # Rescans of a full queue offer the same file again
+        with pytest.raises(queue.Full):
+            job_queue.put_nowait({"input_path": "waiting", "mtime": 1.0})
+    assert reads == ["first", "waiting"]
+
+    with pytest.raises(queue.Full):
+        job_queue.put_nowait({"input_path": "waiting", "mtime": 2.0})
+    assert reads == ["first", "waiting", "waiting"]
+
+def test_requeued_job_keeps_its_place():
+    job_queue = JobQueue(policy="fifo")
+    first = {"input_path": "first"}
+    job_queue.put(first)
+    _put(job_queue, "second", first["enqueued_at"] + 1)
+    assert job_queue.get_nowait() is first
+    job_queue.put(first)
+    assert _drain(job_queue) == ["first", "second"]
+
+def test_backing_off_job_waits_for_its_turn():
+    job_queue = JobQueue(policy="oldest")
+    # Older than everything else, but backing off after a transient error
+    _put(job_queue, "retry", 100.0, mtime=1.0, not_before=time.time() + 0.3)
+    _put(job_queue, "fresh", 101.0, mtime=50.0)
+
+    assert job_queue.qsize() == 2
+    assert _drain(job_queue) == ["fresh"]
+    with pytest.raises(queue.Empty):
+        job_queue.get(timeout=0.05)
+    started = time.monotonic()
+    assert job_queue.get(timeout=5)["input_path"] == "retry"
+    assert time.monotonic() - started >= 0.15
+
+def test_due_job_keeps_its_place():
+    job_queue = JobQueue(policy="oldest")
+    _put(job_queue, "retry", 100.0, mtime=1.0, not_before=time.time() + 0.1)
+    _put(job_queue, "fresh", 101.0, mtime=50.0)
+    time.sleep(0.15)
+    assert _drain(job_queue) == ["retry", "fresh"]
+
+def test_new_job_wakes_a_worker_waiting_for_a_backing_off_one():
+    job_queue = JobQueue()
+    _put(job_queue, "retry", 100.0, not_before=time.time() + 60)
+    threading.Timer(0.1, _put, args=(job_queue, "fresh", 101.0)).start()
+    started = time.monotonic()
+    assert job_queue.get(timeout=5)["input_path"] == "fresh"
+    assert time.monotonic() - started < 5
+
+def test_clear_returns_every_job():
+    job_queue = JobQueue(maxsize=2)
+    _put(job_queue, "due", 100.0)
+    _put(job_queue, "retry", 101.0, not_before=time.time() + 60)
+    assert job_queue.full()
+    assert sorted(job["input_path"] for job in job_queue.clear()) == ["due", "retry"]
+    assert job_queue.empty()
@@ -0,0 +1,136 @@
+# project_root/tests/test_settings_manager.py
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import settings_manager
+from settings_manager import DEFAULT_SETTINGS, SettingsManager
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Record every snapshot written to disk."""
+    written = []
+    atomic_write_json = settings_manager.atomic_write_json
+
+    def record(path, data):
+        written.append(data)
+        atomic_write_json(path, data)
+
+    monkeypatch.setattr(settings_manager, "atomic_write_json", record)
+    return written
+
+def _on_disk(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def test_missing_keys_get_their_defaults(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"model": "gpt-4o"}), encoding="utf-8")
+    settings = SettingsManager(str(path))
+    assert settings.get("model") == "gpt-4o"
+    assert settings.get("temperature") == DEFAULT_SETTINGS["temperature"]
+
+def test_write_behind_coalesces_a_burst_of_changes(tmp_path, writes):
+    path = str(tmp_path / "settings.json")
+    settings = SettingsManager(path, write_delay=0.1)
+    for i in range(20):
+        settings.set("temperature", i / 20)
+    assert writes == []
+
+    deadline = time.monotonic() + 5
+    while not writes and time.monotonic() < deadline:
+        time.sleep(0.02)
+    time.sleep(0.2)
+    assert len(writes) == 1
+    assert _on_disk(path)["temperature"] == 19 / 20
+
+def test_flush_writes_pending_changes_now(tmp_path, writes):
+    path = str(tmp_path / "settings.json")
+    settings = SettingsManager(path, write_delay=60)
+    settings.set_nested("/out", "folders", "split_folder")
+    settings.flush()
+    assert _on_disk(path)["folders"]["split_folder"] == "/out"
+    settings.flush()
+    assert len(writes) == 1
+
+def test_transaction_saves_once(tmp_path, writes):
+    path = str(tmp_path / "settings.json")
+    settings = SettingsManager(path, write_delay=0)
+    with settings.transaction():
+        settings.set("model", "gpt-4o")
+        with settings.transaction():
+            settings.set("temperature", 0.2)
+        assert writes == []
+    assert len(writes) == 1
+    assert (writes[0]["model"], writes[0]["temperature"]) == ("gpt-4o", 0.2)
+
+def test_failed_save_leaves_the_old_file_in_place(tmp_path):
+    path = str(tmp_path / "settings.json")
+    settings = SettingsManager(path, write_delay=0)
+    settings.set("model", "gpt-4o")
+    with pytest.raises(TypeError):
+        settings.set("model", object())  # not JSON serializable
+    assert _on_disk(path)["model"] == "gpt-4o"
+    assert os.listdir(str(tmp_path)) == ["settings.json"]
+    # Leave nothing unwritable for the flush at exit
+    settings.set("model", "gpt-4o")
+
+def test_corrupt_file_is_kept_aside_and_reset(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text("{not json", encoding="utf-8")
+    SettingsManager(str(path))
+    assert (tmp_path / "settings.json.corrupt").read_text(encoding="utf-8") == "{not json"
+    assert _on_disk(str(path))["model"] == DEFAULT_SETTINGS["model"]
+
+def test_changes_do_not_wait_for_a_slow_write(tmp_path, monkeypatch):
+    path = str(tmp_path / "settings.json")
+    settings = SettingsManager(path, write_delay=60)
+    writing = threading.Event()
+    release = threading.Event()
+    atomic_write_json = settings_manager.atomic_write_json
+
+    def slow_write(path, data):
+        writing.set()
+        release.wait(5)
+        atomic_write_json(path, data)
+
+    monkeypatch.setattr(settings_manager, "atomic_write_json", slow_write)
+    settings.set("model", "gpt-4o")
+    saver = threading.Thread(target=settings.save_settings)
+    saver.start()
+    assert writing.wait(5)
+
+    setter = threading.Thread(target=settings.set, args=("temperature", 0.1))
+    setter.start()
+    setter.join(1)
+    assert not setter.is_alive()
+    assert settings.get("temperature") == 0.1
+
+    release.set()
+    saver.join(5)
+    assert _on_disk(path)["temperature"] == DEFAULT_SETTINGS["temperature"]
+    settings.flush()
+    assert _on_disk(path)["temperature"] == 0.1
+
+def _wait_for_snapshot(settings):
+    deadline = time.monotonic() + 5
+    while settings._dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_an_older_snapshot_never_overwrites_a_newer_one(tmp_path):
+    path = str(tmp_path / "settings.json")
+    settings = SettingsManager(path, write_delay=60)
+    savers = []
+    # Both saves take their snapshot, then queue up for the file
+    with settings._write_lock:
+        for model in ("gpt-4o", "gpt-3.5-turbo"):
+            settings.set("model", model)
+            savers.append(threading.Thread(target=settings.save_settings))
+            savers[-1].start()
+            _wait_for_snapshot(settings)
+    for saver in savers:
+        saver.join(5)
+    assert _on_disk(path)["model"] == "gpt-3.5-turbo"
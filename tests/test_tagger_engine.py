@@ -0,0 +1,201 @@
+# project_root/tests/test_tagger_engine.py
+import os
+import time
+
+import pytest
+
+from tagger_engine import TaggerEngine, RetryableError, SkippedFile, process_file, scan_ready_files
+from conftest import FakeOpenAI, write_inputs
+from file_lease import FileLeases
+from job_manifest import JobManifest, content_hash, FAILED, PENDING, SKIPPED
+
+def _engine(settings, client, criteria_files=None, **kwargs):
+    return TaggerEngine(settings, client, criteria_files or settings.get("tag_criteria_file"),
+                        concurrency=kwargs.pop("concurrency", 2), **kwargs)
+
+def _job(engine, filename):
+    input_path = os.path.join(engine.settings_manager.get("monitored_folder"), filename)
+    return engine._make_job(filename, input_path, os.path.getsize(input_path))
+
+def _run(engine):
+    monitored = engine.settings_manager.get("monitored_folder")
+    engine.start()
+    try:
+        assert engine.queue_ready_files(scan_ready_files(monitored)[0])
+        assert engine.wait_idle(timeout=10)
+    finally:
+        engine.stop()
+
+def _state(manifest, job):
+    with open(job["input_path"], encoding="utf-8") as f:
+        return manifest.lookup(job["input_path"], content_hash(f.read()))["state"]
+
+def test_process_file_tags_and_deletes_source(settings, fake_openai):
+    write_inputs(settings.get("monitored_folder"), 1)
+    job = _job(_engine(settings, fake_openai), "doc000.txt")
+
+    assert process_file(fake_openai, job) == (True, "Tagged")
+    assert not os.path.exists(job["input_path"])
+    with open(job["output_path"], encoding="utf-8") as f:
+        assert f.read() == "tagged: doc000.txt body text"
+
+def test_worker_pool_tags_every_queued_file(settings, fake_openai):
+    names = write_inputs(settings.get("monitored_folder"), 10)
+    engine = _engine(settings, fake_openai, concurrency=4)
+    _run(engine)
+
+    assert engine.stats()["done"] == len(names)
+    assert len(fake_openai.prompts) == len(names)
+    assert sorted(os.listdir(settings.get("tagged_folder"))) == names
+    assert os.listdir(settings.get("monitored_folder")) == []
+
+def test_engine_requeues_transient_errors(settings):
+    failures = {"doc000.txt": 1}
+
+    def respond(prompt):
+        if "doc000.txt" in prompt and failures["doc000.txt"]:
+            failures["doc000.txt"] -= 1
+            return {"error": "API Error: 429", "retryable": True}
+        return None
+
+    client = FakeOpenAI(respond=respond)
+    write_inputs(settings.get("monitored_folder"), 3)
+    engine = _engine(settings, client)
+    _run(engine)
+
+    assert engine.stats()["done"] == 3
+    assert engine.stats()["failed"] == 0
+    assert len(client.prompts) == 4
+    assert os.listdir(settings.get("monitored_folder")) == []
+
+def test_process_file_skips_output_it_did_not_write(settings, fake_openai, tmp_path):
+    write_inputs(settings.get("monitored_folder"), 1)
+    job = _job(_engine(settings, fake_openai), "doc000.txt")
+    with open(job["output_path"], "w", encoding="utf-8") as f:
+        f.write("written by someone else")
+    manifest = JobManifest(str(tmp_path / "jobs.sqlite"))
+
+    with pytest.raises(SkippedFile):
+        process_file(fake_openai, job, manifest)
+    assert os.path.exists(job["input_path"])
+    assert fake_openai.prompts == []
+    assert _state(manifest, job) == SKIPPED
+
+def test_process_file_finishes_its_own_output_after_a_crash(settings, fake_openai, tmp_path):
+    write_inputs(settings.get("monitored_folder"), 1)
+    job = _job(_engine(settings, fake_openai), "doc000.txt")
+    manifest = JobManifest(str(tmp_path / "jobs.sqlite"))
+    with open(job["input_path"], encoding="utf-8") as f:
+        manifest.start(job["input_path"], content_hash(f.read()), job["filename"], job["output_path"])
+    with open(job["output_path"], "w", encoding="utf-8") as f:
+        f.write("tagged before the crash")
+
+    assert process_file(fake_openai, job, manifest) == (True, "Already tagged")
+    assert not os.path.exists(job["input_path"])
+    assert fake_openai.prompts == []
+
+def test_process_file_keeps_source_on_error(settings, tmp_path):
+    client = FakeOpenAI(respond=lambda prompt: {"error": "API Error: bad request"})
+    write_inputs(settings.get("monitored_folder"), 1)
+    job = _job(_engine(settings, client), "doc000.txt")
+    manifest = JobManifest(str(tmp_path / "jobs.sqlite"))
+
+    assert process_file(client, job, manifest) == (False, "API Error: bad request")
+    assert os.path.exists(job["input_path"])
+    assert not os.path.exists(job["output_path"])
+    assert _state(manifest, job) == FAILED
+
+def test_process_file_raises_retryable_errors(settings, tmp_path):
+    client = FakeOpenAI(respond=lambda prompt: {"error": "API Error: 429", "retryable": True})
+    write_inputs(settings.get("monitored_folder"), 1)
+    job = _job(_engine(settings, client), "doc000.txt")
+    manifest = JobManifest(str(tmp_path / "jobs.sqlite"))
+
+    with pytest.raises(RetryableError):
+        process_file(client, job, manifest)
+    assert _state(manifest, job) == PENDING
+
+def test_engine_counts_skips_apart_from_failures(settings, fake_openai, tmp_path):
+    write_inputs(settings.get("monitored_folder"), 2)
+    with open(os.path.join(settings.get("tagged_folder"), "doc000.txt"), "w", encoding="utf-8") as f:
+        f.write("written by someone else")
+    engine = _engine(settings, fake_openai, manifest=JobManifest(str(tmp_path / "jobs.sqlite")))
+    _run(engine)
+
+    stats = engine.stats()
+    assert (stats["done"], stats["skipped"], stats["failed"]) == (1, 1, 0)
+    assert engine._failed_paths == set()
+
+def test_multi_criteria_retry_only_sends_the_missing_criteria(settings, tmp_path):
+    criteria_a = str(tmp_path / "a.md")
+    criteria_b = str(tmp_path / "b.md")
+    for path, text in ((criteria_a, "Criteria A"), (criteria_b, "Criteria B")):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    failures = {"Criteria B": 1}
+
+    def respond(prompt):
+        for name in failures:
+            if name in prompt and failures[name]:
+                failures[name] -= 1
+                return {"error": "API Error: server error"}
+        return None
+
+    client = FakeOpenAI(respond=respond)
+    write_inputs(settings.get("monitored_folder"), 1)
+    job = _job(_engine(settings, client, [criteria_a, criteria_b]), "doc000.txt")
+
+    success, message = process_file(client, job)
+    assert not success and message.startswith("b.md:")
+    assert os.path.exists(job["targets"][0]["output_path"])
+    assert os.path.exists(job["input_path"])
+
+    assert process_file(client, job) == (True, "Tagged")
+    assert sum("Criteria A" in prompt for prompt in client.prompts) == 1
+    assert sum("Criteria B" in prompt for prompt in client.prompts) == 2
+    assert all(os.path.exists(target["output_path"]) for target in job["targets"])
+
+def test_requeued_job_backs_off_before_its_retry(settings):
+    attempts = []
+
+    def respond(prompt):
+        if "doc000.txt" in prompt:
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                return {"error": "API Error: 429", "retryable": True}
+        return None
+
+    client = FakeOpenAI(respond=respond)
+    write_inputs(settings.get("monitored_folder"), 3)
+    settings.set("queue_policy", "oldest")
+    engine = _engine(settings, client, concurrency=1, requeue_delay=0.2)
+    _run(engine)
+
+    assert engine.stats()["done"] == 3
+    # backoff_delay(0, base=0.2) waits 0.1 to 0.2 seconds; the other files go first
+    assert attempts[1] - attempts[0] >= 0.1
+    assert "doc000.txt" in client.prompts[-1]
+
+def test_two_engines_with_leases_tag_each_file_once(settings, fake_openai):
+    monitored = settings.get("monitored_folder")
+    names = write_inputs(monitored, 40)
+    leases = [FileLeases(monitored, worker_id) for worker_id in ("worker-a", "worker-b")]
+    engines = [_engine(settings, fake_openai, leases=lease, concurrency=4) for lease in leases]
+    for engine in engines:
+        engine.start()
+    try:
+        ready = scan_ready_files(monitored)[0]
+        for engine in engines:
+            assert engine.queue_ready_files(ready)
+        for engine in engines:
+            assert engine.wait_idle(timeout=10)
+    finally:
+        for engine in engines:
+            engine.stop()
+        for lease in leases:
+            lease.close(timeout=5)
+
+    assert len(fake_openai.prompts) == len(names)
+    assert sum(engine.stats()["done"] for engine in engines) == len(names)
+    assert sorted(os.listdir(settings.get("tagged_folder"))) == names
+    assert os.listdir(monitored) == []
@@ -0,0 +1,96 @@
+# project_root/tests/test_text_splitter.py
+import json
+import os
+import threading
+
+import pytest
+
+import text_splitter
+from text_splitter import SplitWriter, count_parts, iter_parts
+
+@pytest.mark.parametrize("text, delimiter, regex, expected", [
+    ("a,b,,c", ",", False, ["a", "b", "", "c"]),
+    ("no delimiter", ",", False, ["no delimiter"]),
+    ("a--b--", "--", False, ["a", "b", ""]),
+    ("a1b22c", r"\d+", True, ["a", "b", "c"]),
+    # Empty matches don't split between every character
+    ("abc", r"x*", True, ["abc"]),
+])
+def test_iter_parts(text, delimiter, regex, expected):
+    assert list(iter_parts(text, delimiter, regex)) == expected
+    assert count_parts(text, delimiter, regex) == len(expected)
+
+def _files(folder):
+    return sorted(os.listdir(str(folder)))
+
+def _read(folder, name):
+    with open(os.path.join(str(folder), name), encoding="utf-8") as f:
+        return f.read()
+
+def test_write_puts_every_part_in_place(tmp_path):
+    progress = []
+    writer = SplitWriter(str(tmp_path), "notes", "SPLIT", write_manifest=True, fsync_batch=2)
+    result = writer.write(iter_parts(" one , two ,three", ","), total=3,
+                          on_progress=lambda done, total: progress.append(done))
+
+    assert result["written"] == 3
+    assert _files(tmp_path) == ["notesSPLIT1.md", "notesSPLIT2.md", "notesSPLIT3.md", "notes_manifest.json"]
+    assert [_read(tmp_path, f"notesSPLIT{i}.md") for i in (1, 2, 3)] == ["one", "two", "three"]
+    assert progress[-1] == 3
+    with open(result["manifest"], encoding="utf-8") as f:
+        assert [part["chars"] for part in json.load(f)["parts"]] == [3, 3, 5]
+
+def test_existing_files_are_not_replaced_without_overwrite(tmp_path):
+    (tmp_path / "notes2.md").write_text("keep me", encoding="utf-8")
+    result = SplitWriter(str(tmp_path), "notes").write(iter(["a", "b", "c"]), total=3)
+
+    assert result["conflicts"] == ["notes2.md"]
+    assert _files(tmp_path) == ["notes2.md"]
+
+def test_cancel_leaves_nothing_behind(tmp_path):
+    cancel = threading.Event()
+
+    def parts():
+        yield "a"
+        cancel.set()
+        yield "b"
+
+    result = SplitWriter(str(tmp_path), "notes").write(parts(), cancel_event=cancel)
+    assert result["error"] == "Cancelled"
+    assert _files(tmp_path) == []
+
+def _fail_on_rename(monkeypatch, final_name):
+    """Make moving a temp file onto final_name fail."""
+    replace = os.replace
+
+    def failing_replace(src, dst):
+        if os.path.basename(dst) == final_name and src.endswith(".tmp"):
+            raise OSError("disk full")
+        replace(src, dst)
+
+    monkeypatch.setattr(text_splitter.os, "replace", failing_replace)
+
+def test_failed_rename_undoes_the_parts_already_in_place(tmp_path, monkeypatch):
+    _fail_on_rename(monkeypatch, "notes3.md")
+    result = SplitWriter(str(tmp_path), "notes").write(iter(["a", "b", "c", "d"]))
+
+    assert result["error"] == "disk full"
+    assert _files(tmp_path) == []
+
+def test_failed_overwrite_restores_the_old_files(tmp_path, monkeypatch):
+    for i in (1, 2, 3):
+        (tmp_path / f"notes{i}.md").write_text(f"old {i}", encoding="utf-8")
+    _fail_on_rename(monkeypatch, "notes3.md")
+    result = SplitWriter(str(tmp_path), "notes", overwrite=True).write(iter(["a", "b", "c"]))
+
+    assert "error" in result
+    assert _files(tmp_path) == ["notes1.md", "notes2.md", "notes3.md"]
+    assert [_read(tmp_path, f"notes{i}.md") for i in (1, 2, 3)] == ["old 1", "old 2", "old 3"]
+
+def test_overwrite_replaces_the_old_files(tmp_path):
+    (tmp_path / "notes1.md").write_text("old", encoding="utf-8")
+    result = SplitWriter(str(tmp_path), "notes", overwrite=True).write(iter(["new", "more"]))
+
+    assert result["written"] == 2
+    assert _files(tmp_path) == ["notes1.md", "notes2.md"]
+    assert _read(tmp_path, "notes1.md") == "new"
@@ -0,0 +1,71 @@
+# project_root/tests/test_tokenizer_service.py
+import pytest
+
+import tokenizer_service
+from tokenizer_service import TokenizerService, estimate_tokens
+
+class FakeEncoding:
+    """One token per word; records what it was asked to encode."""
+    name = "fake_words"
+
+    def __init__(self):
+        self.encoded = []
+        self.batches = []
+
+    def encode(self, text, disallowed_special=()):
+        self.encoded.append(text)
+        return text.split()
+
+    def encode_batch(self, texts, num_threads=1, disallowed_special=()):
+        self.batches.append(list(texts))
+        return [text.split() for text in texts]
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # configure() points TIKTOKEN_CACHE_DIR at the cache folder; restore it afterwards
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(tmp_path))
+    service = TokenizerService(cache_dir=str(tmp_path), max_cached_counts=3)
+    service._encoders["fake-model"] = FakeEncoding()
+    return service
+
+def test_counts_are_cached_by_content(service):
+    encoding = service.encoder("fake-model")
+    assert service.count_batch(["one two", "three", "one two"], "fake-model") == [2, 1, 2]
+    assert service.count("one two", "fake-model") == 2
+    # Each distinct text is encoded once
+    assert encoding.encoded == ["one two", "three"]
+    assert service.stats() == {"entries": 2, "hits": 1, "misses": 2}
+
+def test_least_recently_used_counts_are_dropped(service):
+    encoding = service.encoder("fake-model")
+    for text in ("a", "b", "c"):
+        service.count(text, "fake-model")
+    service.count("a", "fake-model")  # "b" is now the least recently used
+    service.count("d", "fake-model")
+
+    assert service.stats()["entries"] == 3
+    encoding.encoded.clear()
+    for text in ("a", "c", "d", "b"):
+        service.count(text, "fake-model")
+    assert encoding.encoded == ["b"]
+
+def test_large_uncached_texts_are_encoded_in_one_batch(service, monkeypatch):
+    monkeypatch.setattr(tokenizer_service, "BATCH_MIN_CHARS", 10)
+    encoding = service.encoder("fake-model")
+    service.count("cached text", "fake-model")
+    texts = ["cached text", "first new text", "second new text", "first new text"]
+
+    assert service.count_batch(texts, "fake-model") == [2, 3, 3, 3]
+    assert encoding.batches == [["first new text", "second new text"]]
+
+def test_small_batches_skip_the_thread_pool(service):
+    encoding = service.encoder("fake-model")
+    service.count_batch(["a b", "c"], "fake-model")
+    assert encoding.batches == []
+    assert encoding.encoded == ["a b", "c"]
+
+def test_unavailable_encoding_falls_back_to_an_estimate(service):
+    service._encoders["offline-model"] = None
+    assert not service.is_exact("offline-model")
+    assert service.count_batch(["x" * 40, ""], "offline-model") == [estimate_tokens("x" * 40), 0]
+    assert service.stats()["entries"] == 0
@@ -0,0 +1,178 @@
+# project_root/text_splitter.py
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from settings_manager import atomic_write_json
+
+def iter_parts(text: str, delimiter: str, regex: bool = False) -> Iterator[str]:
+    """Yield the parts of text between delimiters without building the whole list."""
+    if regex:
+        pattern = re.compile(delimiter)
+        start = 0
+        for match in pattern.finditer(text):
+            if match.end() == match.start():
+                # Skip empty matches; they would split between every character
+                continue
+            yield text[start:match.start()]
+            start = match.end()
+        yield text[start:]
+        return
+    start = 0
+    while True:
+        index = text.find(delimiter, start)
+        if index == -1:
+            yield text[start:]
+            return
+        yield text[start:index]
+        start = index + len(delimiter)
+
+def contains_delimiter(text: str, delimiter: str, regex: bool = False) -> bool:
+    if regex:
+        return any(m.end() > m.start() for m in re.finditer(delimiter, text))
+    return delimiter in text
+
+def count_parts(text: str, delimiter: str, regex: bool = False) -> int:
+    if regex:
+        return 1 + sum(1 for m in re.finditer(delimiter, text) if m.end() > m.start())
+    return text.count(delimiter) + 1
+
+def part_filename(base_filename: str, suffix: str, index: int) -> str:
+    # Construct filename: {base_filename}{suffix}{index}.md
+    return f"{base_filename}{suffix}{index}.md"
+
+class SplitWriter:
+    """Writes the parts of a split response to {base}{suffix}{i}.md.
+
+    Parts are written to hidden temp files and fsync'd in batches of
+    fsync_batch, then renamed into place once every part is on disk, so a
+    crash never leaves a half-written set behind. Existing files are only
+    replaced with overwrite=True. Optionally a {base}_manifest.json index
+    listing the parts is written as well.
+    """
+
+    def __init__(self, output_folder: str, base_filename: str, suffix: str = "",
+                 overwrite: bool = False, write_manifest: bool = False, fsync_batch: int = 200):
+        self.output_folder = output_folder
+        self.base_filename = base_filename
+        self.suffix = suffix
+        self.overwrite = overwrite
+        self.write_manifest = write_manifest
+        self.fsync_batch = max(1, fsync_batch)
+
+    def manifest_path(self) -> str:
+        return os.path.join(self.output_folder, f"{self.base_filename}_manifest.json")
+
+    def conflicts(self, part_count: int) -> List[str]:
+        """Existing files that writing part_count parts would replace."""
+        existing = set(os.listdir(self.output_folder))
+        names = [part_filename(self.base_filename, self.suffix, i) for i in range(1, part_count + 1)]
+        if self.write_manifest:
+            names.append(os.path.basename(self.manifest_path()))
+        return [name for name in names if name in existing]
+
+    def _sync_batch(self, files):
+        for f in files:
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        files.clear()
+
+    def _sync_folder(self):
+        # Persist the renames; directories can't be opened for fsync on Windows
+        if os.name == "nt":
+            return
+        fd = os.open(self.output_folder, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def write(self, parts: Iterator[str], total: Optional[int] = None,
+              on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+              cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Write every part. Returns {"written", "paths"} or {"error"}; nothing is left behind on error."""
+        if total is not None and not self.overwrite:
+            conflicts = self.conflicts(total)
+            if conflicts:
+                return {"error": f"{len(conflicts)} file(s) already exist", "conflicts": conflicts}
+
+        staged = []  # (temp path, final path, chars)
+        batch = []
+        renamed = []  # final paths already moved into place
+        backups = []  # (backup path, final path) of files being overwritten
+        try:
+            for i, part in enumerate(parts, start=1):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise InterruptedError("Cancelled")
+                content = part.strip()
+                final_path = os.path.join(self.output_folder, part_filename(self.base_filename, self.suffix, i))
+                temp_path = os.path.join(self.output_folder, f".{os.path.basename(final_path)}.tmp")
+                f = open(temp_path, "w", encoding="utf-8")
+                staged.append((temp_path, final_path, len(content)))
+                batch.append(f)
+                f.write(content)
+                if len(batch) >= self.fsync_batch:
+                    self._sync_batch(batch)
+                    if on_progress:
+                        on_progress(i, total)
+            self._sync_batch(batch)
+
+            if not self.overwrite:
+                # Files may have appeared while we were writing
+                taken = [final for _, final, _ in staged if os.path.exists(final)]
+                if taken:
+                    raise FileExistsError(f"{len(taken)} file(s) already exist")
+            for temp_path, final_path, _ in staged:
+                if self.overwrite and os.path.exists(final_path):
+                    # Keep the old file until every part is in place
+                    backup_path = os.path.join(self.output_folder, f".{os.path.basename(final_path)}.bak")
+                    os.replace(final_path, backup_path)
+                    backups.append((backup_path, final_path))
+                os.replace(temp_path, final_path)
+                renamed.append(final_path)
+            self._sync_folder()
+        except Exception as e:
+            for f in batch:
+                f.close()
+            # All or nothing: undo the renames that already happened, then drop the temp files
+            for final_path in renamed:
+                try:
+                    os.remove(final_path)
+                except OSError:
+                    pass
+            for backup_path, final_path in backups:
+                try:
+                    os.replace(backup_path, final_path)
+                except OSError:
+                    pass
+            for temp_path, _, _ in staged:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return {"error": str(e)}
+        for backup_path, _ in backups:
+            try:
+                os.remove(backup_path)
+            except OSError:
+                pass
+
+        paths = [final for _, final, _ in staged]
+        if on_progress:
+            on_progress(len(paths), total)
+        result = {"written": len(paths), "paths": paths}
+        if self.write_manifest:
+            manifest_path = self.manifest_path()
+            atomic_write_json(manifest_path, {
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "base_filename": self.base_filename,
+                "suffix": self.suffix,
+                "parts": [
+                    {"index": i, "file": os.path.basename(final), "chars": chars}
+                    for i, (_, final, chars) in enumerate(staged, start=1)
+                ]
+            })
+            result["manifest"] = manifest_path
+        return result
@@ -0,0 +1,158 @@
+# project_root/tokenizer_service.py
+"""Process-wide token counting shared by the input panel, the tagger and cost estimates.
+
+Encodings are loaded once per model, optionally from a local BPE cache so
+machines without internet access never need to download them. Counts are
+kept in an LRU keyed by content hash, and uncached texts are encoded in
+one multithreaded encode_batch call.
+
+To prepare a cache folder on a machine with internet access:
+
+    python -m tokenizer_service --prefetch resources/tiktoken_cache
+"""
+
+import argparse
+import collections
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Bundled cache, used unless tokenizer_cache_dir is set
+BUNDLED_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "tiktoken_cache")
+DEFAULT_ENCODING = "cl100k_base"
+PREFETCH_ENCODINGS = ["cl100k_base", "o200k_base"]
+
+# Below this much uncached text a thread pool costs more than it saves
+BATCH_MIN_CHARS = 32 * 1024
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+def estimate_tokens(text: str) -> int:
+    """Rough count for when no tokenizer is available."""
+    return len(text) // 4
+
+class TokenizerService:
+    """Memoized tiktoken encoders per model plus an LRU of token counts.
+
+    Without tiktoken (or when an encoding can't be loaded) counts fall back
+    to a length-based estimate; is_exact() tells callers which they got.
+    """
+
+    def __init__(self, cache_dir: str = "", max_cached_counts: int = 100000, num_threads: int = 4):
+        self.max_cached_counts = max_cached_counts
+        self.num_threads = max(1, num_threads)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._encoders: Dict[str, object] = {}  # model -> encoding, or None if unavailable
+        self._counts: "collections.OrderedDict[Tuple[str, bytes], int]" = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.configure(cache_dir)
+
+    def configure(self, cache_dir: str = ""):
+        """Load encodings from cache_dir (or the bundled cache, if present) instead of downloading them."""
+        cache_dir = cache_dir or (BUNDLED_CACHE_DIR if os.path.isdir(BUNDLED_CACHE_DIR) else "")
+        if cache_dir:
+            # tiktoken reads BPE files from here, and stores downloads here when online
+            os.environ["TIKTOKEN_CACHE_DIR"] = os.path.abspath(cache_dir)
+        self.cache_dir = cache_dir
+        with self._load_lock:
+            # Retry models that failed to load before the cache was configured
+            self._encoders = {model: enc for model, enc in self._encoders.items() if enc is not None}
+
+    def configure_from_settings(self, settings_manager):
+        self.configure(settings_manager.get("tokenizer_cache_dir", ""))
+
+    def encoder(self, model: str):
+        """The tiktoken encoding for model, or None if it can't be loaded."""
+        encoding = self._encoders.get(model, False)
+        if encoding is not False:
+            return encoding
+        with self._load_lock:
+            if model in self._encoders:
+                return self._encoders[model]
+            try:
+                import tiktoken
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    # Fallback to cl100k_base encoding if model not found
+                    encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+            except Exception as e:
+                print(f"Tokenizer unavailable for {model}, estimating by length: {str(e)}")
+                encoding = None
+            self._encoders[model] = encoding
+            return encoding
+
+    def is_exact(self, model: str) -> bool:
+        return self.encoder(model) is not None
+
+    def count(self, text: str, model: str) -> int:
+        return self.count_batch([text], model)[0]
+
+    def count_batch(self, texts: Sequence[str], model: str) -> List[int]:
+        """Token counts of texts, encoding only those not counted before (in parallel)."""
+        encoding = self.encoder(model)
+        if encoding is None:
+            return [estimate_tokens(text) for text in texts]
+        keys = [(encoding.name, _digest(text)) for text in texts]
+        counts: List[Optional[int]] = [None] * len(texts)
+        missing: Dict[Tuple[str, bytes], List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                n = self._counts.get(key)
+                if n is None:
+                    missing.setdefault(key, []).append(i)
+                    continue
+                self._counts.move_to_end(key)
+                counts[i] = n
+            self.hits += len(texts) - sum(len(indexes) for indexes in missing.values())
+            self.misses += len(missing)
+        if not missing:
+            return counts
+
+        todo = [texts[indexes[0]] for indexes in missing.values()]
+        if len(todo) > 1 and sum(len(text) for text in todo) >= BATCH_MIN_CHARS:
+            lengths = [len(tokens) for tokens in
+                       encoding.encode_batch(todo, num_threads=self.num_threads, disallowed_special=())]
+        else:
+            lengths = [len(encoding.encode(text, disallowed_special=())) for text in todo]
+
+        with self._lock:
+            for (key, indexes), n in zip(missing.items(), lengths):
+                for i in indexes:
+                    counts[i] = n
+                self._counts[key] = n
+            while len(self._counts) > self.max_cached_counts:
+                self._counts.popitem(last=False)
+        return counts
+
+    def clear(self):
+        """Forget every cached count."""
+        with self._lock:
+            self._counts.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._counts), "hits": self.hits, "misses": self.misses}
+
+# Shared by the input panel, the tagger (via OpenAIInterface) and the batch tagger
+tokenizer_service = TokenizerService()
+
+def prefetch(cache_dir: str, encodings: List[str]):
+    """Download encodings into cache_dir so they can be copied to offline machines."""
+    import tiktoken
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ["TIKTOKEN_CACHE_DIR"] = os.path.abspath(cache_dir)
+    for name in encodings:
+        tiktoken.get_encoding(name)
+        print(f"Cached {name} in {cache_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m tokenizer_service")
+    parser.add_argument("--prefetch", metavar="DIR", required=True, help="cache folder to fill")
+    parser.add_argument("--encodings", nargs="+", default=PREFETCH_ENCODINGS)
+    args = parser.parse_args()
+    prefetch(args.prefetch, args.encodings)
@@ -0,0 +1,134 @@
+# project_root/ui/folder_watcher.py
+
+import os
+from PyQt6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from tagger_engine import scan_ready_files
+
+class FolderScanThread(QThread):
+    """One folder scan, plus handing the ready files over, off the GUI thread."""
+    scanned = pyqtSignal(object, bool)  # next_check (or None), whether every ready file was taken
+
+    def __init__(self, folder: str, settle_seconds: float, recursive: bool, on_files_ready, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.settle_seconds = settle_seconds
+        self.recursive = recursive
+        self.on_files_ready = on_files_ready
+
+    def run(self):
+        next_check, taken = None, True
+        try:
+            if os.path.isdir(self.folder):
+                ready, next_check = scan_ready_files(self.folder, self.settle_seconds, self.recursive)
+                if ready:
+                    taken = self.on_files_ready(ready) is not False
+        except Exception as e:
+            print(f"Error scanning {self.folder}: {str(e)}")
+        self.scanned.emit(next_check, taken)
+
+class FolderWatcher(QObject):
+    """Reports files in the monitored folder once they have finished being written.
+
+    In "watch" mode a QFileSystemWatcher triggers a debounced scan as soon as
+    the directory changes, with a slow fallback rescan for missed events.
+    In "poll" mode the folder is scanned on a fixed interval, which is the
+    safer choice for network filesystems that don't deliver change events.
+    With recursive=True subfolders are scanned too; the watcher only sees
+    changes in the top folder, so the fallback rescan then runs every
+    poll_interval.
+
+    Scans run on a FolderScanThread, which passes the list of (filename,
+    size, mtime) tuples to on_files_ready on that thread, so the listing
+    and whatever the callback does with it (queueing, index lookups) never
+    block the GUI. on_files_ready returns False if it couldn't take every
+    file; scan_finished then reports it on the GUI thread. Scans requested
+    while one is running are merged into a single follow-up scan.
+    """
+    scan_finished = pyqtSignal(bool)  # whether every ready file was taken
+
+    def __init__(self, folder: str, on_files_ready, mode: str = "watch", poll_interval: int = 20,
+                 settle_seconds: float = 2.0, fallback_interval: int = 300, debounce_ms: int = 500,
+                 recursive: bool = False, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.on_files_ready = on_files_ready
+        self.mode = mode if mode in ("watch", "poll") else "watch"
+        self.settle_seconds = max(0.0, float(settle_seconds))
+        self.recursive = recursive
+
+        # Periodic scan: the main loop in poll mode, a safety net in watch mode
+        self.interval_timer = QTimer(self)
+        interval = poll_interval if self.mode == "poll" or recursive else fallback_interval
+        self.interval_timer.setInterval(max(1, int(interval)) * 1000)
+        self.interval_timer.timeout.connect(self.scan)
+
+        # Coalesces bursts of change events into a single scan
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_ms)
+        self.debounce_timer.timeout.connect(self.scan)
+
+        # Re-checks files that were still being written on the last scan
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.timeout.connect(self.scan)
+
+        self.fs_watcher = None
+        self.scan_thread = None
+        self._rescan = False
+        self._stopped = False
+
+    def start(self):
+        if self.mode == "watch":
+            self.fs_watcher = QFileSystemWatcher([self.folder], self)
+            self.fs_watcher.directoryChanged.connect(self.request_scan)
+        self.interval_timer.start()
+        # Pick up the existing backlog right away instead of waiting for an event
+        self.scan()
+
+    def stop(self):
+        """Stop scanning; the watcher deletes itself once a scan in flight has finished."""
+        self._stopped = True
+        self.interval_timer.stop()
+        self.debounce_timer.stop()
+        self.settle_timer.stop()
+        if self.fs_watcher:
+            self.fs_watcher.directoryChanged.disconnect(self.request_scan)
+            self.fs_watcher.removePaths(self.fs_watcher.directories())
+            self.fs_watcher = None
+        if self.scan_thread is not None:
+            self.scan_thread.finished.connect(self.deleteLater)
+        else:
+            self.deleteLater()
+
+    def request_scan(self, *args):
+        """Schedule a scan, restarting the debounce window."""
+        self.debounce_timer.start()
+
+    def scan(self):
+        if self._stopped:
+            return
+        if self.scan_thread is not None:
+            self._rescan = True
+            return
+        self.scan_thread = FolderScanThread(self.folder, self.settle_seconds, self.recursive,
+                                            self.on_files_ready, self)
+        self.scan_thread.scanned.connect(self.on_scanned)
+        self.scan_thread.finished.connect(self.on_scan_thread_finished)
+        self.scan_thread.start()
+
+    def on_scanned(self, next_check, taken):
+        if self._stopped:
+            return
+        if next_check is not None:
+            delay_ms = int(next_check * 1000) + 100
+            if not self.settle_timer.isActive() or self.settle_timer.remainingTime() > delay_ms:
+                self.settle_timer.start(delay_ms)
+        self.scan_finished.emit(taken)
+
+    def on_scan_thread_finished(self):
+        self.scan_thread.deleteLater()
+        self.scan_thread = None
+        if self._rescan:
+            self._rescan = False
+            self.scan()
@@ -0,0 +1,35 @@
+# project_root/ui/gpt_worker.py
+
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+
+class GPTRequestWorker(QThread):
+    """Sends one prompt off the GUI thread, optionally streaming the answer."""
+    delta_received = pyqtSignal(str)
+    result_ready = pyqtSignal(dict)
+
+    def __init__(self, openai_interface, prompt: str, use_cache: bool = True, stream: bool = True, parent=None):
+        super().__init__(parent)
+        self.openai_interface = openai_interface
+        self.prompt = prompt
+        self.use_cache = use_cache
+        self.stream = stream
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Ask the request to stop; the partial answer is still reported."""
+        self._cancel_event.set()
+
+    def run(self):
+        if not self.stream:
+            self.result_ready.emit(self.openai_interface.send_text(self.prompt, use_cache=self.use_cache))
+            return
+
+        result = {"error": "No response generated"}
+        for event in self.openai_interface.stream_text(self.prompt, use_cache=self.use_cache,
+                                                       cancel_event=self._cancel_event):
+            if "delta" in event:
+                self.delta_received.emit(event["delta"])
+            else:
+                result = event
+        self.result_ready.emit(result)
@@ -0,0 +1,117 @@
+# project_root/ui/large_document.py
+
+import codecs
+import mmap
+import os
+from typing import Iterator
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor, QTextOption
+
+# Above this many characters the editors switch to large-document mode:
+# no line wrapping, no undo history, estimated token counts, and the text
+# isn't mirrored into settings.json
+LARGE_DOCUMENT_CHARS = 1_000_000
+# Inserted per event-loop tick while loading
+LOAD_CHUNK_CHARS = 1 << 20
+LOAD_CHUNK_BYTES = 1 << 20
+
+def is_large(editor) -> bool:
+    # characterCount() is O(1); toPlainText() would copy the whole document
+    return editor.document().characterCount() > LARGE_DOCUMENT_CHARS
+
+def set_large_document_mode(editor, enabled: bool):
+    """Trade line wrapping and undo for speed and memory on very large texts."""
+    if editor.property("large_document") == enabled:
+        return
+    editor.setProperty("large_document", enabled)
+    editor.setWordWrapMode(QTextOption.WrapMode.NoWrap if enabled else QTextOption.WrapMode.WordWrap)
+    # The undo stack would keep another copy of every loaded chunk
+    editor.setUndoRedoEnabled(not enabled)
+
+def iter_text_chunks(text: str, chunk_chars: int = LOAD_CHUNK_CHARS) -> Iterator[str]:
+    for start in range(0, len(text), chunk_chars):
+        yield text[start:start + chunk_chars]
+
+def iter_file_chunks(path: str, chunk_bytes: int = LOAD_CHUNK_BYTES, encoding: str = "utf-8") -> Iterator[str]:
+    """Decode a file piece by piece through a memory map, without reading it into memory first."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    carry = ""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, size, chunk_bytes):
+                    text = carry + decoder.decode(mapped[start:start + chunk_bytes])
+                    # Keep a trailing \r until we know whether \n follows
+                    carry = text[-1:] if text.endswith("\r") else ""
+                    text = text[:len(text) - len(carry)]
+                    if text:
+                        yield text.replace("\r\n", "\n")
+    text = carry + decoder.decode(b"", final=True)
+    if text:
+        yield text.replace("\r\n", "\n")
+
+class ChunkedTextLoader(QObject):
+    """Fills a plain-text editor one chunk per event-loop tick so big texts never freeze the window."""
+    progress = pyqtSignal(int)  # characters loaded so far
+    finished = pyqtSignal(bool)  # False if cancelled or the file couldn't be read
+    error = pyqtSignal(str)
+
+    def __init__(self, editor, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self._chunks = None
+        self._loaded = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._insert_next_chunk)
+
+    def is_loading(self) -> bool:
+        return self._chunks is not None
+
+    def load_text(self, text: str):
+        self._start(iter_text_chunks(text), large=len(text) > LARGE_DOCUMENT_CHARS)
+
+    def load_file(self, path: str):
+        try:
+            large = os.path.getsize(path) > LARGE_DOCUMENT_CHARS
+        except OSError as e:
+            self.error.emit(str(e))
+            self.finished.emit(False)
+            return
+        self._start(iter_file_chunks(path), large=large)
+
+    def cancel(self):
+        if self._chunks is not None:
+            self._stop(False)
+
+    def _start(self, chunks: Iterator[str], large: bool):
+        self.cancel()
+        set_large_document_mode(self.editor, large)
+        self.editor.clear()
+        self._chunks = chunks
+        self._loaded = 0
+        self._timer.start()
+
+    def _insert_next_chunk(self):
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._stop(True)
+            return
+        except (OSError, ValueError) as e:
+            self.error.emit(str(e))
+            self._stop(False)
+            return
+        cursor = QTextCursor(self.editor.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(chunk)
+        self._loaded += len(chunk)
+        self.progress.emit(self._loaded)
+
+    def _stop(self, completed: bool):
+        self._timer.stop()
+        # Closes the memory map if the file wasn't read to the end
+        self._chunks.close()
+        self._chunks = None
+        self.finished.emit(completed)
@@ -1,63 +1,61 @@
 # project_root/ui/left_panel.py
 
 import os
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton, QComboBox, QTextEdit, QFileDialog, QMessageBox, QApplication)
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QTextOption, QSyntaxHighlighter, QTextCharFormat, QColor
-from config import COMBINE_FORMAT
-import tiktoken
-import re
-
-class MarkdownHighlighter(QSyntaxHighlighter):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self._formats = {
-            'header': self._create_format(QColor("#0000FF")),  # Blue for headers
-            'emphasis': self._create_format(QColor("#FF00FF")), # Magenta for emphasis
-            'list': self._create_format(QColor("#008000")),     # Green for lists
-        }
-
-    def _create_format(self, color):
-        fmt = QTextCharFormat()
-        fmt.setForeground(color)
-        return fmt
-
-    def highlightBlock(self, text):
-        # Basic markdown highlighting
-        # Headers
-        for match in re.finditer(r'^#{1,6}\s.*$', text):
-            self.setFormat(match.start(), match.end() - match.start(), self._formats['header'])
-        # Lists
-        for match in re.finditer(r'^\s*[\*\-\+]\s.*$', text):
-            self.setFormat(match.start(), match.end() - match.start(), self._formats['list'])
-        # Emphasis
-        for match in re.finditer(r'\*\*.*?\*\*|\*.*?\*|__.*?__|_.*?_', text):
-            self.setFormat(match.start(), match.end() - match.start(), self._formats['emphasis'])
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton, QComboBox, QPlainTextEdit, QFileDialog, QMessageBox, QCheckBox)
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QThreadPool
+from PyQt6.QtGui import QTextOption
+from prompt_builder import prompt_builder
+from startup_timing import startup_timer
+from .token_counter import BlockTokenCounter, TokenCountTask
+from .gpt_worker import GPTRequestWorker
+from .startup_worker import TokenizerLoader
+from .markdown_highlighter import MarkdownHighlighter
+from .large_document import ChunkedTextLoader, LARGE_DOCUMENT_CHARS, is_large, set_large_document_mode
 
 class LeftPanel(QWidget):
     gpt_response_received = pyqtSignal(str)
+    gpt_stream_started = pyqtSignal()
+    gpt_stream_delta = pyqtSignal(str)
+    gpt_request_finished = pyqtSignal()
     
     def __init__(self, settings_manager):
         super().__init__()
         self.settings_manager = settings_manager
         self.openai_interface = None  # Will be set from MainWindow
-        # Initialize tokenizer for GPT-4 (or get from settings)
-        self.tokenizer = tiktoken.encoding_for_model("gpt-4")
+        self._gpt_worker = None
+        # The tokenizer loads in the background (it may have to download its
+        # tables); token counts are estimated until it is ready
+        self.tokenizer = None
+        self.token_counter = BlockTokenCounter(self.settings_manager.get("model", "gpt-4"))
+        self._token_count_generation = 0
+        self._tokenizer_loader = None
+
+        # Count tokens (and persist the input) once typing pauses, not on every keystroke
+        self.token_count_timer = QTimer(self)
+        self.token_count_timer.setSingleShot(True)
+        self.token_count_timer.setInterval(300)
+        self.token_count_timer.timeout.connect(self.update_token_count)
         
         self.criteria_label = QLabel("TextInputCriteria")
         self.file_selector_button = QPushButton("Select Criteria Directory")
         self.file_dropdown = QComboBox()
 
         self.input_label = QLabel("InputWorkingText")
-        self.input_text_field = QTextEdit()
+        # Plain-text editor: lays out block by block, so large inputs stay usable
+        self.input_text_field = QPlainTextEdit()
         self.input_text_field.setWordWrapMode(QTextOption.WrapMode.WordWrap)
-        self.input_text_field.setAcceptRichText(False)  # Force plain text mode
         self.input_text_field.setPlaceholderText("Enter markdown text here...")
+        self.open_input_file_button = QPushButton("Open Text File...")
+        # Big files are memory-mapped and inserted a chunk at a time
+        self.input_loader = ChunkedTextLoader(self.input_text_field, self)
         
-        # Add markdown highlighter
-        self.markdown_highlighter = MarkdownHighlighter(self.input_text_field.document())
+        # Add markdown highlighter; large documents are highlighted viewport first
+        self.markdown_highlighter = MarkdownHighlighter(self.input_text_field)
         
-        self.token_counter_display = QLabel("Token Count: 0")
+        self.token_counter_display = QLabel("Token Count: loading tokenizer...")
+        # Unchecking forces a fresh completion, e.g. to get a different answer at the same temperature
+        self.use_cache_checkbox = QCheckBox("Use cached response if available")
+        self.use_cache_checkbox.setChecked(True)
         self.send_to_gpt_button = QPushButton("Send to GPT")
 
         layout = QVBoxLayout()
@@ -66,8 +64,10 @@ class LeftPanel(QWidget):
         layout.addWidget(self.file_dropdown)
 
         layout.addWidget(self.input_label)
+        layout.addWidget(self.open_input_file_button)
         layout.addWidget(self.input_text_field)
         layout.addWidget(self.token_counter_display)
+        layout.addWidget(self.use_cache_checkbox)
         layout.addWidget(self.send_to_gpt_button)
 
         self.setLayout(layout)
@@ -80,11 +80,20 @@ class LeftPanel(QWidget):
 
         self.file_selector_button.clicked.connect(self.select_criteria_directory)
         self.file_dropdown.currentIndexChanged.connect(self.on_criteria_file_selected)
-        self.input_text_field.textChanged.connect(self.update_token_count)
+        self.input_text_field.textChanged.connect(self.token_count_timer.start)
         self.send_to_gpt_button.clicked.connect(self.send_to_gpt)
+        self.open_input_file_button.clicked.connect(self.open_input_file)
+        self.input_loader.progress.connect(self.on_input_load_progress)
+        self.input_loader.finished.connect(self.on_input_load_finished)
+        self.input_loader.error.connect(
+            lambda message: QMessageBox.warning(self, "Error", f"Error reading file: {message}")
+        )
 
         self.update_send_button_state()
 
+        startup_timer.expect(["tokenizer"])
+        self.update_tokenizer(self.token_counter.model)
+
     def select_criteria_directory(self):
         directory = QFileDialog.getExistingDirectory(self, "Select Criteria Directory")
         if directory:
@@ -104,27 +113,79 @@ class LeftPanel(QWidget):
         self.settings_manager.set("text_input_criteria_file", selected_file)
         self.update_send_button_state()
 
+    def open_input_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Text File", "", "Text Files (*.txt *.md);;All Files (*)")
+        if path:
+            self.input_loader.load_file(path)
+            self.update_send_button_state()
+
+    def on_input_load_progress(self, chars):
+        self.token_counter_display.setText(f"Loading... {chars / (1024 * 1024):.1f}M characters")
+
+    def on_input_load_finished(self, completed):
+        self.token_count_timer.stop()
+        self.update_token_count()
+
     def update_token_count(self):
+        if self.input_loader.is_loading():
+            return
+        self._token_count_generation += 1
+        large = is_large(self.input_text_field)
+        set_large_document_mode(self.input_text_field, large)
+        if large:
+            # Don't copy tens of megabytes on every pause in typing; the text
+            # is only copied when it is sent. Not mirrored to settings.json either.
+            self.save_input_text("")
+            chars = self.input_text_field.document().characterCount()
+            self.on_token_count_finished(self._token_count_generation, chars // 4, False)
+            self.update_send_button_state()
+            return
+
         text = self.input_text_field.toPlainText()
-        # Use tiktoken for accurate token counting
-        try:
-            tokens = self.tokenizer.encode(text)
-            token_count = len(tokens)
-            self.token_counter_display.setText(f"Token Count: {token_count}")
-        except Exception as e:
-            # Fallback to simple counting if tokenizer fails
-            tokens = text.split()
-            self.token_counter_display.setText(f"Token Count (estimate): {len(tokens)}")
-            print(f"Tokenizer error: {str(e)}")
+        if self.tokenizer is None:
+            # Placeholder until the tokenizer is ready (or if tiktoken is unavailable)
+            self.on_token_count_finished(self._token_count_generation, len(text) // 4, False)
+        else:
+            # Encode on a worker thread; only blocks that changed since the last count are re-encoded
+            task = TokenCountTask(self.token_counter, text, self._token_count_generation)
+            task.signals.finished.connect(self.on_token_count_finished)
+            QThreadPool.globalInstance().start(task)
         
+        self.save_input_text(text)
+        self.update_send_button_state(text)
+
+    def save_input_text(self, text):
+        """Mirror the input to settings.json, only if it was edited since the last save.
+
+        Large documents are saved as "" so an older, smaller draft isn't left behind.
+        """
+        document = self.input_text_field.document()
+        if not document.isModified():
+            return
+        document.setModified(False)
         self.settings_manager.set("input_text", text)
-        self.update_send_button_state()
 
-    def update_send_button_state(self):
+    def on_token_count_finished(self, generation, token_count, exact):
+        # Ignore results for text that has been edited since
+        if generation != self._token_count_generation:
+            return
+        if exact:
+            self.token_counter_display.setText(f"Token Count: {token_count}")
+        else:
+            self.token_counter_display.setText(f"Token Count (estimate): {token_count}")
+
+    def update_send_button_state(self, input_text=None):
+        # The button doubles as Cancel while a request is running
+        if self._gpt_worker is not None:
+            return
         # Enable the button only if both input text and criteria file are present
-        input_text = self.input_text_field.toPlainText().strip()
+        if input_text is None:
+            # A large document is never blank; don't copy it just to check
+            has_text = is_large(self.input_text_field) or bool(self.input_text_field.toPlainText().strip())
+        else:
+            has_text = bool(input_text.strip())
         criteria_file = self.file_dropdown.currentText().strip()
-        if input_text and criteria_file:
+        if has_text and criteria_file and not self.input_loader.is_loading():
             self.send_to_gpt_button.setEnabled(True)
         else:
             self.send_to_gpt_button.setEnabled(False)
@@ -133,10 +194,18 @@ class LeftPanel(QWidget):
         self.openai_interface = openai_interface
 
     def send_to_gpt(self):
+        # While a request is running the button cancels it
+        if self._gpt_worker is not None:
+            self._gpt_worker.cancel()
+            self.send_to_gpt_button.setEnabled(False)
+            self.send_to_gpt_button.setText("Cancelling...")
+            return
+
         if not self.openai_interface:
             QMessageBox.warning(self, "Error", "OpenAI interface not initialized.")
             return
 
+        # The one full copy of the input, made only when it is actually sent
         input_text = self.input_text_field.toPlainText().strip()
         criteria_file_path = self.file_dropdown.currentText().strip()
         if not input_text or not criteria_file_path:
@@ -144,46 +213,61 @@ class LeftPanel(QWidget):
             return
 
         try:
-            # Load criteria file content
-            with open(criteria_file_path, "r", encoding="utf-8") as f:
-                criteria_content = f.read()
-                
-            # Format the prompt using the template
-            combined = COMBINE_FORMAT.format(
-                input_text=input_text.strip(),
-                criteria_content=criteria_content.strip()
-            )
-            
-            # Show processing indicator
-            self.send_to_gpt_button.setEnabled(False)
-            self.send_to_gpt_button.setText("Processing...")
-            QApplication.processEvents()
-            
-            try:
-                # Send to GPT and get response
-                response = self.openai_interface.send_text(combined)
-                
-                if "error" in response:
-                    QMessageBox.warning(self, "Error", f"API Error: {response['error']}")
-                    return
-                    
-                # Store the response and emit signal
-                self.settings_manager.set("last_response", response["content"])
-                self.gpt_response_received.emit(response["content"])
-                
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to send to GPT: {str(e)}")
-                
+            # Format the prompt using the template; the criteria file is cached until it changes
+            combined = prompt_builder.build(input_text, criteria_file_path)
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error reading criteria file: {str(e)}")
-        finally:
-            # Reset button state
-            self.send_to_gpt_button.setEnabled(True)
-            self.send_to_gpt_button.setText("Send to GPT")
+            return
+
+        # Send on a worker thread so the window stays responsive; deltas are
+        # forwarded to the response editor as they arrive
+        self._gpt_worker = GPTRequestWorker(
+            self.openai_interface, combined,
+            use_cache=self.use_cache_checkbox.isChecked(),
+            stream=self.settings_manager.get("stream_responses", True),
+            parent=self
+        )
+        self._gpt_worker.delta_received.connect(self.gpt_stream_delta)
+        self._gpt_worker.result_ready.connect(self.on_gpt_result)
+        self._gpt_worker.finished.connect(self.on_gpt_worker_finished)
+
+        # Show processing indicator
+        self.send_to_gpt_button.setText("Cancel")
+        self.gpt_stream_started.emit()
+        self._gpt_worker.start()
+
+    def on_gpt_result(self, response):
+        if "error" in response:
+            QMessageBox.warning(self, "Error", f"API Error: {response['error']}")
+            return
+
+        # Store the response (unless it is huge) and emit signal
+        if len(response["content"]) <= LARGE_DOCUMENT_CHARS:
+            self.settings_manager.set("last_response", response["content"])
+        self.gpt_response_received.emit(response["content"])
+
+    def on_gpt_worker_finished(self):
+        self._gpt_worker.deleteLater()
+        self._gpt_worker = None
+        self.gpt_request_finished.emit()
+        # Reset button state
+        self.send_to_gpt_button.setText("Send to GPT")
+        self.update_send_button_state()
 
     def update_tokenizer(self, model_name="gpt-4"):
-        try:
-            self.tokenizer = tiktoken.encoding_for_model(model_name)
-        except KeyError:
-            # Fallback to cl100k_base encoding if model not found
-            self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        """Load the encoding for model_name in the background and recount once it is ready."""
+        loader = TokenizerLoader(model_name, parent=self)
+        loader.loaded.connect(self.on_tokenizer_loaded)
+        loader.finished.connect(loader.deleteLater)
+        self._tokenizer_loader = loader
+        loader.start()
+
+    def on_tokenizer_loaded(self, tokenizer):
+        # Ignore loaders superseded by a later model change
+        loader = self.sender()
+        if loader is not self._tokenizer_loader:
+            return
+        self._tokenizer_loader = None
+        self.tokenizer = tokenizer
+        self.token_counter.set_model(loader.model)
+        self.token_count_timer.start()
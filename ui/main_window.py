@@ -26,11 +26,16 @@ class MainWindow(QMainWindow):
         self.middle_panel = MiddlePanel(self.settings_manager)
         self.right_panel = RightPanel(self.settings_manager, self.secure_storage)
         
-        # Pass the OpenAI interface to left panel
-        self.left_panel.set_openai_interface(self.right_panel.openai_interface)
-
-        # Connect the GPT response signal
+        # Pass the OpenAI interface to left panel once it has been built
+        self.right_panel.openai_interface_ready.connect(self.left_panel.set_openai_interface)
+        # Count tokens with the encoding of the newly selected model
+        self.right_panel.model_changed.connect(self.left_panel.update_tokenizer)
+
+        # Connect the GPT response signals
+        self.left_panel.gpt_stream_started.connect(self.middle_panel.begin_stream)
+        self.left_panel.gpt_stream_delta.connect(self.middle_panel.append_stream_delta)
         self.left_panel.gpt_response_received.connect(self.handle_gpt_response)
+        self.left_panel.gpt_request_finished.connect(self.middle_panel.end_stream)
 
         # Use a QSplitter to separate the panels
         splitter = QSplitter(Qt.Orientation.Horizontal)
@@ -42,4 +47,4 @@ class MainWindow(QMainWindow):
         
     def handle_gpt_response(self, response_text: str):
         """Handle GPT response by updating the middle panel"""
-        self.middle_panel.markdown_editor_response.setText(response_text)
+        self.middle_panel.finish_stream(response_text)
@@ -0,0 +1,177 @@
+# project_root/ui/markdown_highlighter.py
+
+import re
+import time
+from PyQt6.QtCore import QPoint, QTimer
+from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor
+
+# Block states; Qt starts every block at -1, which counts as NORMAL
+NORMAL = 0
+IN_FENCE = 1
+
+# Highlighting modes by document size (characters)
+FULL = "full"
+BASIC = "basic"  # headers, lists and code fences only
+OFF = "off"
+DEFER_CHARS = 200_000  # above this only blocks near the viewport are formatted right away
+BASIC_CHARS = 2_000_000
+OFF_CHARS = 20_000_000
+
+# Blocks above and below the viewport that are formatted eagerly
+VIEWPORT_MARGIN = 100
+# Work done per idle tick, so typing and scrolling stay responsive
+IDLE_SLICE_SECONDS = 0.008
+# Lines longer than this (e.g. minified data) get no inline highlighting
+MAX_INLINE_CHARS = 5000
+
+_FENCE = re.compile(r"\s{0,3}(```|~~~)")
+_HEADER = re.compile(r"#{1,6}\s")
+_LIST = re.compile(r"\s*[\*\-\+]\s")
+# A single pass over the line. The negated classes keep matching linear,
+# even on long lines full of underscores or asterisks.
+_INLINE = re.compile(
+    r"(?P<code>`[^`]+`)"
+    r"|(?P<emphasis>\*\*[^*]+\*\*|__[^_]+__|\*[^*\s][^*]*\*|\b_[^_]+_\b)"
+)
+
+def mode_for_size(chars: int) -> str:
+    if chars > OFF_CHARS:
+        return OFF
+    if chars > BASIC_CHARS:
+        return BASIC
+    return FULL
+
+class MarkdownHighlighter(QSyntaxHighlighter):
+    """Markdown highlighting that stays responsive on very large documents.
+
+    Each line is tokenized in one pass of precompiled patterns, and fenced
+    code blocks are tracked across lines through the block state. Once the
+    document is larger than DEFER_CHARS only blocks near the viewport are
+    formatted during an edit; the rest are formatted in small slices while
+    the event loop is idle. Larger documents lose inline emphasis (BASIC_CHARS)
+    and then highlighting altogether (OFF_CHARS).
+    """
+
+    def __init__(self, editor):
+        super().__init__(editor.document())
+        self.editor = editor
+        self._document = editor.document()
+        self._formats = {
+            'header': self._create_format(QColor("#0000FF")),  # Blue for headers
+            'emphasis': self._create_format(QColor("#FF00FF")), # Magenta for emphasis
+            'list': self._create_format(QColor("#008000")),     # Green for lists
+            'code': self._create_format(QColor("#8B4513")),     # Brown for code
+        }
+        self._mode = mode_for_size(self._document.characterCount())
+        self._visible = (0, 2 * VIEWPORT_MARGIN)
+        self._pending_from = None  # first block number that may still be unformatted
+        self._forcing = False
+
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setInterval(0)
+        self._idle_timer.timeout.connect(self._highlight_pending)
+
+        # Connected after the base class, so this runs once the edit has been highlighted
+        self._document.contentsChange.connect(self._on_contents_change)
+        editor.verticalScrollBar().valueChanged.connect(self._on_viewport_changed)
+        editor.verticalScrollBar().rangeChanged.connect(self._on_viewport_changed)
+        if self._mode == OFF:
+            self.setDocument(None)
+
+    def _create_format(self, color):
+        fmt = QTextCharFormat()
+        fmt.setForeground(color)
+        return fmt
+
+    def highlightBlock(self, text):
+        # The fence state is always tracked so later blocks know whether they are code
+        in_fence = self.previousBlockState() == IN_FENCE
+        is_fence = _FENCE.match(text) is not None
+        self.setCurrentBlockState(IN_FENCE if in_fence != is_fence else NORMAL)
+
+        if not self._forcing and self._document.characterCount() > DEFER_CHARS:
+            number = self.currentBlock().blockNumber()
+            first, last = self._visible
+            if not first <= number <= last:
+                self._defer(number)
+                return
+
+        if in_fence or is_fence:
+            self.setFormat(0, len(text), self._formats['code'])
+            return
+        if _HEADER.match(text):
+            self.setFormat(0, len(text), self._formats['header'])
+            return
+        if _LIST.match(text):
+            self.setFormat(0, len(text), self._formats['list'])
+        if self._mode != FULL or len(text) > MAX_INLINE_CHARS:
+            return
+        if "*" not in text and "_" not in text and "`" not in text:
+            return
+        for match in _INLINE.finditer(text):
+            self.setFormat(match.start(), match.end() - match.start(), self._formats[match.lastgroup])
+
+    def _defer(self, block_number: int):
+        if self._pending_from is None or block_number < self._pending_from:
+            self._pending_from = block_number
+        if not self._idle_timer.isActive():
+            self._idle_timer.start()
+
+    def _highlight_pending(self):
+        """Format deferred blocks for one idle slice."""
+        if self._pending_from is None:
+            self._idle_timer.stop()
+            return
+        block = self._document.findBlockByNumber(self._pending_from)
+        deadline = time.perf_counter() + IDLE_SLICE_SECONDS
+        self._forcing = True
+        try:
+            while block.isValid() and time.perf_counter() < deadline:
+                self.rehighlightBlock(block)
+                block = block.next()
+        finally:
+            self._forcing = False
+        if block.isValid():
+            self._pending_from = block.blockNumber()
+        else:
+            self._pending_from = None
+            self._idle_timer.stop()
+
+    def _visible_range(self):
+        viewport = self.editor.viewport()
+        first = self.editor.cursorForPosition(QPoint(0, 0)).blockNumber()
+        last = self.editor.cursorForPosition(QPoint(viewport.width() - 1, viewport.height() - 1)).blockNumber()
+        return max(0, first - VIEWPORT_MARGIN), last + VIEWPORT_MARGIN
+
+    def _on_viewport_changed(self, *args):
+        self._visible = self._visible_range()
+        if self._pending_from is None or self.document() is None:
+            return
+        # Scrolled into text that hasn't been formatted yet: do what is on screen first
+        first, last = self._visible
+        block = self._document.findBlockByNumber(max(first, self._pending_from))
+        self._forcing = True
+        try:
+            while block.isValid() and block.blockNumber() <= last:
+                self.rehighlightBlock(block)
+                block = block.next()
+        finally:
+            self._forcing = False
+
+    def _on_contents_change(self, position, removed, added):
+        mode = mode_for_size(self._document.characterCount())
+        if mode == self._mode:
+            return
+        previous, self._mode = self._mode, mode
+        if mode == OFF:
+            # Detaching removes the formats without another pass over the text
+            self._pending_from = None
+            self._idle_timer.stop()
+            self.setDocument(None)
+        elif previous == OFF:
+            # Re-attaching rehighlights; blocks off screen are deferred as usual
+            self._visible = self._visible_range()
+            self.setDocument(self._document)
+        else:
+            # Inline emphasis switched on or off: refresh everything in idle time
+            self._defer(0)
@@ -0,0 +1,78 @@
+# project_root/ui/metrics_tab.py
+
+from PyQt6.QtWidgets import QWidget, QFormLayout, QLabel
+from PyQt6.QtCore import QTimer
+import metrics
+
+def _seconds(value):
+    return "-" if value is None else f"{value:.2f} s"
+
+class MetricsTab(QWidget):
+    """Live view of the shared metrics registry, refreshed while the tab is visible."""
+
+    def __init__(self, refresh_ms: int = 2000):
+        super().__init__()
+        layout = QFormLayout()
+        self.fields = {}
+        for key, title in [
+            ("requests", "API requests (ok / error / cached):"),
+            ("error_rate", "Error rate:"),
+            ("latency", "API latency p50 / p95:"),
+            ("requests_per_minute", "Requests per minute:"),
+            ("tokens_per_minute", "Tokens per minute:"),
+            ("tokens", "Tokens (prompt / completion / cached):"),
+            ("retries", "Retries (rate limited / transient):"),
+            ("queue", "Tagger queue / in progress:"),
+            ("files", "Files (done / skipped / failed / requeued):"),
+            ("file_latency", "Time per file p50 / p95:"),
+            ("queue_wait", "Queue wait p50 / p95:"),
+            ("backlog", "Backlog at last scan:"),
+            ("scan", "Folder scan p95:"),
+        ]:
+            label = QLabel("-")
+            self.fields[key] = label
+            layout.addRow(title, label)
+        self.setLayout(layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(refresh_ms)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+    def refresh(self):
+        requests = metrics.api_requests
+        ok, error, cached = (requests.value(outcome=o) for o in ("ok", "error", "cached"))
+        sent = ok + error
+        tokens = metrics.api_tokens
+        latency = metrics.api_request_seconds
+        file_latency = metrics.tagger_file_seconds
+        queue_wait = metrics.tagger_queue_wait_seconds
+        files = metrics.tagger_files
+        values = {
+            "requests": f"{ok:.0f} / {error:.0f} / {cached:.0f}",
+            "error_rate": f"{error / sent:.1%}" if sent else "-",
+            "latency": f"{_seconds(latency.percentile(50))} / {_seconds(latency.percentile(95))}",
+            "requests_per_minute": f"{requests.rate_per_minute():.1f}",
+            # Cached tokens are a subset of prompt tokens
+            "tokens_per_minute": f"{tokens.rate_per_minute(kind='prompt') + tokens.rate_per_minute(kind='completion'):.0f}",
+            "tokens": " / ".join(f"{tokens.value(kind=k):.0f}" for k in ("prompt", "completion", "cached")),
+            "retries": " / ".join(
+                f"{metrics.api_retries.value(reason=r):.0f}" for r in ("rate_limited", "transient")
+            ),
+            "queue": f"{metrics.tagger_queue_depth.value():.0f} / {metrics.tagger_in_progress.value():.0f}",
+            "files": " / ".join(f"{files.value(outcome=o):.0f}" for o in ("done", "skipped", "failed", "requeued")),
+            "file_latency": f"{_seconds(file_latency.percentile(50))} / {_seconds(file_latency.percentile(95))}",
+            "queue_wait": f"{_seconds(queue_wait.percentile(50))} / {_seconds(queue_wait.percentile(95))}",
+            "backlog": f"{metrics.folder_backlog_files.value():.0f} files",
+            "scan": _seconds(metrics.folder_scan_seconds.percentile(95)),
+        }
+        for key, text in values.items():
+            self.fields[key].setText(text)
@@ -1,17 +1,32 @@
 # project_root/ui/middle_panel.py
 
-import os
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QTextEdit, QLineEdit, QPushButton, QFileDialog, QMessageBox)
-from PyQt6.QtGui import QTextOption
+import re
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPlainTextEdit, QLineEdit, QPushButton, QFileDialog, QMessageBox,
+                             QCheckBox)
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QTextOption, QTextCursor
+from text_splitter import SplitWriter, contains_delimiter
+from .split_worker import SplitWorker
+from .large_document import ChunkedTextLoader, LARGE_DOCUMENT_CHARS, set_large_document_mode
 
 class MiddlePanel(QWidget):
     def __init__(self, settings_manager):
         super().__init__()
         self.settings_manager = settings_manager
+        self.split_worker = None
 
         self.label = QLabel("InputTextProcess1")
-        self.markdown_editor_response = QTextEdit()
+        self.markdown_editor_response = QPlainTextEdit()
         self.markdown_editor_response.setWordWrapMode(QTextOption.WrapMode.WordWrap)
+        # Large answers are inserted in chunks instead of one blocking setPlainText
+        self.response_loader = ChunkedTextLoader(self.markdown_editor_response, self)
+
+        # Streamed deltas are buffered and appended at a bounded repaint rate
+        self._stream_buffer = []
+        self._streamed_chars = 0
+        self.stream_flush_timer = QTimer(self)
+        self.stream_flush_timer.setInterval(50)
+        self.stream_flush_timer.timeout.connect(self.flush_stream_buffer)
         
         # Add base filename input field
         self.base_filename_input = QLineEdit()
@@ -21,6 +36,11 @@ class MiddlePanel(QWidget):
         self.delimiter_input_field = QLineEdit()
         self.delimiter_input_field.setText(self.settings_manager.get("delimiter", ","))
         self.delimiter_input_field.textChanged.connect(self.save_delimiter)
+        self.delimiter_regex_checkbox = QCheckBox("Delimiter is a regular expression")
+        self.delimiter_regex_checkbox.setChecked(self.settings_manager.get("delimiter_is_regex", False))
+        self.delimiter_regex_checkbox.toggled.connect(
+            lambda checked: self.settings_manager.set("delimiter_is_regex", checked)
+        )
         
         # Initialize suffix with saved value and connect change handler
         self.filename_suffix_input = QLineEdit()
@@ -32,7 +52,15 @@ class MiddlePanel(QWidget):
         self.selected_folder_label = QLabel()
         self.update_folder_label()
         
+        self.split_manifest_checkbox = QCheckBox("Write an index of the parts (_manifest.json)")
+        self.split_manifest_checkbox.setChecked(self.settings_manager.get("split_write_manifest", False))
+        self.split_manifest_checkbox.toggled.connect(
+            lambda checked: self.settings_manager.set("split_write_manifest", checked)
+        )
+
         self.save_and_split_button = QPushButton("Save & Split")
+        self.split_status_label = QLabel()
+        self.split_status_label.setStyleSheet("color: #666; padding: 5px;")
 
         layout = QVBoxLayout()
         layout.addWidget(self.label)
@@ -42,12 +70,15 @@ class MiddlePanel(QWidget):
         layout.addWidget(self.base_filename_input)
         layout.addWidget(QLabel("Delimiter:"))
         layout.addWidget(self.delimiter_input_field)
+        layout.addWidget(self.delimiter_regex_checkbox)
         layout.addWidget(QLabel("Filename Suffix (optional):"))
         layout.addWidget(self.filename_suffix_input)
         layout.addWidget(QLabel("Output Folder:"))
         layout.addWidget(self.folder_selection_button)
         layout.addWidget(self.selected_folder_label)
+        layout.addWidget(self.split_manifest_checkbox)
         layout.addWidget(self.save_and_split_button)
+        layout.addWidget(self.split_status_label)
 
         self.setLayout(layout)
 
@@ -55,6 +86,50 @@ class MiddlePanel(QWidget):
         self.folder_selection_button.clicked.connect(self.select_output_folder)
         self.save_and_split_button.clicked.connect(self.save_and_split)
 
+    def begin_stream(self):
+        """Prepare for a new streamed answer; the editor is cleared on the first delta."""
+        self._stream_buffer = []
+        self._streamed_chars = 0
+        self.stream_flush_timer.start()
+
+    def end_stream(self):
+        """Stop the repaint timer once the request is over, whatever its outcome."""
+        self.stream_flush_timer.stop()
+        self.flush_stream_buffer()
+
+    def append_stream_delta(self, text: str):
+        self._stream_buffer.append(text)
+
+    def flush_stream_buffer(self):
+        if not self._stream_buffer:
+            return
+        chunk = "".join(self._stream_buffer)
+        self._stream_buffer = []
+        if self._streamed_chars == 0:
+            # Keep the previous answer visible until the new one actually starts
+            self.response_loader.cancel()
+            set_large_document_mode(self.markdown_editor_response, False)
+            self.markdown_editor_response.clear()
+        self._streamed_chars += len(chunk)
+        if self._streamed_chars > LARGE_DOCUMENT_CHARS:
+            set_large_document_mode(self.markdown_editor_response, True)
+        cursor = self.markdown_editor_response.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(chunk)
+
+    def finish_stream(self, response_text: str):
+        """Show the final answer, reusing what was already streamed when it matches."""
+        self.end_stream()
+        if self._streamed_chars != len(response_text):
+            # Nothing (or something different) was streamed, e.g. non-streaming mode
+            if len(response_text) > LARGE_DOCUMENT_CHARS:
+                self.response_loader.load_text(response_text)
+            else:
+                self.response_loader.cancel()
+                set_large_document_mode(self.markdown_editor_response, False)
+                self.markdown_editor_response.setPlainText(response_text)
+        self._streamed_chars = 0
+
     def update_folder_label(self):
         """Update the label showing the currently selected split folder"""
         folder = self.settings_manager.get_nested("folders", "split_folder", default="")
@@ -76,14 +151,31 @@ class MiddlePanel(QWidget):
             self.update_folder_label()
 
     def save_and_split(self):
+        if self.split_worker and self.split_worker.isRunning():
+            # The button doubles as Cancel while parts are being written
+            self.split_worker.cancel()
+            return
+
+        if self.response_loader.is_loading():
+            QMessageBox.warning(self, "Error", "The response is still loading.")
+            return
+
         delimiter = self.delimiter_input_field.text().strip()
         if not delimiter:
             QMessageBox.warning(self, "Error", "Please provide a valid delimiter.")
             return
 
+        regex = self.delimiter_regex_checkbox.isChecked()
+        if regex:
+            try:
+                re.compile(delimiter)
+            except re.error as e:
+                QMessageBox.warning(self, "Error", f"Invalid regular expression: {str(e)}")
+                return
+
+        # The one full copy of the response; the split worker and any overwrite retry share it
         text = self.markdown_editor_response.toPlainText()
-        parts = text.split(delimiter)
-        if len(parts) < 2:
+        if not contains_delimiter(text, delimiter, regex):
             QMessageBox.warning(self, "Error", "The text does not contain the specified delimiter.")
             return
 
@@ -101,13 +193,43 @@ class MiddlePanel(QWidget):
             QMessageBox.warning(self, "Error", "Please select an output folder first.")
             return
 
-        # Save each part with new naming convention
-        for i, part in enumerate(parts, start=1):
-            # Construct filename: {base_filename}{suffix}{index}.md
-            out_filename = f"{base_filename}{suffix}{i}.md"
-            out_path = os.path.join(output_folder, out_filename)
-            with open(out_path, "w", encoding="utf-8") as f:
-                f.write(part.strip())
+        self._start_split(text, delimiter, regex, output_folder, base_filename, suffix, overwrite=False)
+
+    def _start_split(self, text, delimiter, regex, output_folder, base_filename, suffix, overwrite):
+        writer = SplitWriter(
+            output_folder, base_filename, suffix,
+            overwrite=overwrite,
+            write_manifest=self.split_manifest_checkbox.isChecked(),
+            fsync_batch=self.settings_manager.get("split_fsync_batch", 200)
+        )
+        self.split_worker = SplitWorker(text, delimiter, regex, writer, self)
+        self.split_worker.progress.connect(self.on_split_progress)
+        self.split_worker.result_ready.connect(
+            lambda result: self.on_split_finished(result, text, delimiter, regex, output_folder, base_filename, suffix)
+        )
+        self.save_and_split_button.setText("Cancel")
+        self.split_status_label.setText("Splitting...")
+        self.split_worker.start()
+
+    def on_split_progress(self, written, total):
+        self.split_status_label.setText(f"Written {written} of {total} parts")
+
+    def on_split_finished(self, result, text, delimiter, regex, output_folder, base_filename, suffix):
+        self.save_and_split_button.setText("Save & Split")
+        if "conflicts" in result:
+            self.split_status_label.clear()
+            answer = QMessageBox.question(
+                self, "Overwrite Files?",
+                f"{len(result['conflicts'])} file(s) in the output folder would be replaced, "
+                f"starting with {result['conflicts'][0]}. Overwrite them?"
+            )
+            if answer == QMessageBox.StandardButton.Yes:
+                self._start_split(text, delimiter, regex, output_folder, base_filename, suffix, overwrite=True)
+            return
+        if "error" in result:
+            self.split_status_label.setText(f"Split failed: {result['error']}")
+            return
+        self.split_status_label.setText(f"Saved {result['written']} parts")
 
     def save_delimiter(self):
         """Save the delimiter value when it changes"""
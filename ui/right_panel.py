@@ -1,31 +1,60 @@
 # project_root/ui/right_panel.py
 
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTabWidget
+from PyQt6.QtCore import pyqtSignal
+from startup_timing import startup_timer
 from .tagger_tab import TaggerTab
 from .settings_tab import SettingsTab
-from openai_interface import OpenAIInterface
+from .metrics_tab import MetricsTab
+from .startup_worker import ClientInitWorker
 
 class RightPanel(QWidget):
+    # Emitted once the OpenAI interface has been built in the background
+    openai_interface_ready = pyqtSignal(object)
+    # Emitted when the user picks another model in the Settings tab
+    model_changed = pyqtSignal(str)
+
     def __init__(self, settings_manager, secure_storage):
         super().__init__()
         self.settings_manager = settings_manager
         self.secure_storage = secure_storage
-        api_key = self.secure_storage.retrieve_api_key()
-        model = self.settings_manager.get("model", "gpt-4")
-        temperature = self.settings_manager.get("temperature", 0.7)
-        self.openai_interface = OpenAIInterface(api_key, model, temperature)
+        self.openai_interface = None
 
         layout = QVBoxLayout()
 
         self.tabs = QTabWidget()
         self.tagger_tab = TaggerTab(self.settings_manager)
         self.settings_tab = SettingsTab(self.settings_manager, self.secure_storage, self.openai_interface)
+        self.metrics_tab = MetricsTab()
 
         self.tabs.addTab(self.tagger_tab, "Tagger")
         self.tabs.addTab(self.settings_tab, "Settings")
+        self.tabs.addTab(self.metrics_tab, "Metrics")
 
         layout.addWidget(self.tabs)
         self.setLayout(layout)
 
-        # Pass OpenAI interface to TaggerTab
-        self.tagger_tab.set_openai_interface(self.openai_interface)
+        self.settings_tab.model_selected.connect(self.on_model_selected)
+
+        # Decrypting the key and importing the OpenAI client would delay the
+        # window; do it on a worker thread and hand the interface out when ready
+        startup_timer.expect(["OpenAI client", "model list"])
+        self._client_init_worker = ClientInitWorker(self.settings_manager, self.secure_storage, parent=self)
+        self._client_init_worker.ready.connect(self.on_openai_interface_ready)
+        self._client_init_worker.start()
+
+    def on_openai_interface_ready(self, openai_interface):
+        if openai_interface is None:
+            startup_timer.task_done("model list")
+            return
+        self.openai_interface = openai_interface
+        # Pass OpenAI interface to the tabs
+        self.tagger_tab.set_openai_interface(openai_interface)
+        self.settings_tab.set_openai_interface(openai_interface)
+        self.openai_interface_ready.emit(openai_interface)
+
+    def on_model_selected(self, model_name: str):
+        # The tagger and the Send to GPT button share this interface; use the new model from the next request on
+        if self.openai_interface:
+            self.openai_interface.model = model_name
+        self.model_changed.emit(model_name)
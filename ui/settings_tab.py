@@ -1,14 +1,24 @@
 # project_root/ui/settings_tab.py
 
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QSlider, QHBoxLayout, QMessageBox)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
+from rate_limiter import RateLimiter
+from chunking import REDUCE_MODES
+from scheduling import POLICIES
+from output_sinks import SINK_TYPES
+from startup_timing import startup_timer
+from .startup_worker import ModelListWorker
 
 class SettingsTab(QWidget):
+    # The user picked another model; carries the model name
+    model_selected = pyqtSignal(str)
+
     def __init__(self, settings_manager, secure_storage, openai_interface):
         super().__init__()
         self.settings_manager = settings_manager
         self.secure_storage = secure_storage
         self.openai_interface = openai_interface
+        self._model_list_worker = None
 
         layout = QVBoxLayout()
 
@@ -48,6 +58,70 @@ class SettingsTab(QWidget):
         layout.addWidget(self.monitoring_interval_label)
         layout.addWidget(self.monitoring_interval_field)
 
+        # Monitoring Mode
+        self.monitoring_mode_label = QLabel("Monitoring Mode:")
+        self.monitoring_mode_dropdown = QComboBox()
+        # "watch" reacts to folder events; "poll" scans every interval (use for network drives)
+        self.monitoring_mode_dropdown.addItems(["watch", "poll"])
+        self.monitoring_mode_dropdown.setCurrentText(self.settings_manager.get("monitoring_mode", "watch"))
+        layout.addWidget(self.monitoring_mode_label)
+        layout.addWidget(self.monitoring_mode_dropdown)
+
+        # Tagger Concurrency
+        self.tagger_concurrency_label = QLabel("Tagger Concurrency (parallel requests):")
+        self.tagger_concurrency_field = QLineEdit(str(self.settings_manager.get("tagger_concurrency", 4)))
+        layout.addWidget(self.tagger_concurrency_label)
+        layout.addWidget(self.tagger_concurrency_field)
+
+        # Tagger queue order
+        self.queue_policy_label = QLabel("Tagger Queue Order:")
+        self.queue_policy_dropdown = QComboBox()
+        # "smallest" tags short files first; "priority" reads p0_..p9_ prefixes or .priority files
+        self.queue_policy_dropdown.addItems(POLICIES)
+        self.queue_policy_dropdown.setCurrentText(self.settings_manager.get("queue_policy", "fifo"))
+        layout.addWidget(self.queue_policy_label)
+        layout.addWidget(self.queue_policy_dropdown)
+
+        # Tagger output
+        self.output_sink_label = QLabel("Tagger Output:")
+        self.output_sink_dropdown = QComboBox()
+        # "files" writes one file per input; "jsonl" and "sqlite" append records to the tagged folder
+        self.output_sink_dropdown.addItems(SINK_TYPES)
+        self.output_sink_dropdown.setCurrentText(self.settings_manager.get("output_sink", "files"))
+        layout.addWidget(self.output_sink_label)
+        layout.addWidget(self.output_sink_dropdown)
+
+        # Chunking of oversized inputs
+        self.chunk_max_tokens_label = QLabel("Chunk Size (prompt tokens per request, 0 = model's context window):")
+        self.chunk_max_tokens_field = QLineEdit(str(self.settings_manager.get("chunk_max_tokens", 0)))
+        self.chunk_reduce_mode_label = QLabel("Chunk Results:")
+        self.chunk_reduce_mode_dropdown = QComboBox()
+        # "concatenate" joins chunk results in order; "merge" asks the model to combine them
+        self.chunk_reduce_mode_dropdown.addItems(REDUCE_MODES)
+        self.chunk_reduce_mode_dropdown.setCurrentText(self.settings_manager.get("chunk_reduce_mode", "concatenate"))
+        layout.addWidget(self.chunk_max_tokens_label)
+        layout.addWidget(self.chunk_max_tokens_field)
+        layout.addWidget(self.chunk_reduce_mode_label)
+        layout.addWidget(self.chunk_reduce_mode_dropdown)
+
+        # Rate Limits
+        self.rate_limit_rpm_label = QLabel("Rate Limit (requests/minute, 0 = off):")
+        self.rate_limit_rpm_field = QLineEdit(str(self.settings_manager.get("rate_limit_rpm", 0)))
+        self.rate_limit_tpm_label = QLabel("Rate Limit (tokens/minute, 0 = off):")
+        self.rate_limit_tpm_field = QLineEdit(str(self.settings_manager.get("rate_limit_tpm", 0)))
+        layout.addWidget(self.rate_limit_rpm_label)
+        layout.addWidget(self.rate_limit_rpm_field)
+        layout.addWidget(self.rate_limit_tpm_label)
+        layout.addWidget(self.rate_limit_tpm_field)
+
+        # Response Cache
+        self.cache_stats_label = QLabel()
+        self.cache_clear_button = QPushButton("Clear Response Cache")
+        layout.addWidget(QLabel("Response Cache:"))
+        layout.addWidget(self.cache_stats_label)
+        layout.addWidget(self.cache_clear_button)
+        self.update_cache_stats()
+
         # Save settings button
         self.save_settings_button = QPushButton("Save Settings")
         layout.addWidget(self.save_settings_button)
@@ -59,6 +133,7 @@ class SettingsTab(QWidget):
         self.model_selector_dropdown.currentIndexChanged.connect(self.model_changed)
         self.temperature_slider.valueChanged.connect(self.temperature_changed)
         self.save_settings_button.clicked.connect(self.save_settings)
+        self.cache_clear_button.clicked.connect(self.clear_cache)
 
         # Load models into dropdown
         self.load_models()
@@ -67,46 +142,145 @@ class SettingsTab(QWidget):
         api_key = self.api_key_field.text().strip()
         if api_key:
             self.secure_storage.store_api_key(api_key)
+            if self.openai_interface:
+                self.openai_interface.set_api_key(api_key)
             QMessageBox.information(self, "Success", "API Key saved securely.")
             self.api_key_field.clear()
         else:
             QMessageBox.warning(self, "Error", "Please enter a valid API Key.")
 
+    def set_openai_interface(self, openai_interface):
+        """Called once the OpenAI interface has been built in the background."""
+        self.openai_interface = openai_interface
+        self.update_cache_stats()
+        # Fill the model list on first run without blocking the window
+        if not self.settings_manager.get("models_list", []) and self.secure_storage.retrieve_api_key():
+            self.refresh_models()
+        else:
+            startup_timer.task_done("model list")
+
+    def update_cache_stats(self):
+        if not self.openai_interface:
+            self.cache_stats_label.setText("Loading...")
+            self.cache_clear_button.setEnabled(False)
+            return
+        cache = self.openai_interface.cache
+        if not cache:
+            self.cache_stats_label.setText("Disabled")
+            self.cache_clear_button.setEnabled(False)
+            return
+        stats = cache.stats()
+        self.cache_stats_label.setText(
+            f"{stats['entries']} entries ({stats['bytes'] / (1024 * 1024):.1f} MB), "
+            f"{stats['hits']} hits / {stats['misses']} misses this session"
+        )
+
+    def clear_cache(self):
+        if self.openai_interface and self.openai_interface.cache:
+            self.openai_interface.cache.clear()
+        self.update_cache_stats()
+
     def refresh_models(self):
         # Refresh models from OpenAI
         api_key = self.secure_storage.retrieve_api_key()
         if not api_key:
             QMessageBox.warning(self, "Error", "No API Key found. Please save your API Key first.")
             return
-        oi = self.openai_interface
-        models = oi.refresh_models()
+        if not self.openai_interface or self._model_list_worker is not None:
+            return
+        # Fetch on a worker thread; the request can take a while on a slow connection
+        self.openai_refresh_button.setEnabled(False)
+        self.openai_refresh_button.setText("Refreshing Models...")
+        self._model_list_worker = ModelListWorker(self.openai_interface, parent=self)
+        self._model_list_worker.models_ready.connect(self.on_models_ready)
+        self._model_list_worker.finished.connect(self.on_model_list_worker_finished)
+        self._model_list_worker.start()
+
+    def on_models_ready(self, models):
         self.settings_manager.set("models_list", models)
         self.load_models()
 
+    def on_model_list_worker_finished(self):
+        self._model_list_worker.deleteLater()
+        self._model_list_worker = None
+        self.openai_refresh_button.setText("Refresh Models")
+        self.openai_refresh_button.setEnabled(True)
+
     def load_models(self):
-        self.model_selector_dropdown.clear()
-        models = self.settings_manager.get("models_list", [])
-        if models:
-            self.model_selector_dropdown.addItems(models)
-        current_model = self.settings_manager.get("model", "gpt-4")
-        if current_model in models:
-            self.model_selector_dropdown.setCurrentText(current_model)
+        # Refilling the list isn't a model change; don't let it pass through model_changed()
+        self.model_selector_dropdown.blockSignals(True)
+        try:
+            self.model_selector_dropdown.clear()
+            models = self.settings_manager.get("models_list", [])
+            if models:
+                self.model_selector_dropdown.addItems(models)
+            current_model = self.settings_manager.get("model", "gpt-4")
+            if current_model in models:
+                self.model_selector_dropdown.setCurrentText(current_model)
+        finally:
+            self.model_selector_dropdown.blockSignals(False)
 
     def model_changed(self):
         selected_model = self.model_selector_dropdown.currentText()
+        if not selected_model:
+            return
         self.settings_manager.set("model", selected_model)
+        self.model_selected.emit(selected_model)
 
     def temperature_changed(self):
         val = self.temperature_slider.value() / 100.0
         self.temperature_value_label.setText(f"{val:.2f}")
 
-    def save_settings(self):
-        # Save temperature and monitoring interval
-        temp_val = float(self.temperature_slider.value())/100.0
-        self.settings_manager.set("temperature", temp_val)
+    def _rate_limit_value(self, field: QLineEdit, name: str):
+        """Parse one rate limit field; warns and returns None when it isn't a whole number >= 0."""
+        text = field.text().strip()
         try:
-            interval = int(self.monitoring_interval_field.text().strip())
+            value = int(text) if text else 0
         except ValueError:
-            interval = 20
-        self.settings_manager.set("monitoring_interval", interval)
+            value = -1
+        if value < 0:
+            QMessageBox.warning(self, "Error", f"Invalid {name} limit \"{text}\": enter a whole number, or 0 for no limit.")
+            field.setFocus()
+            return None
+        return value
+
+    def save_settings(self):
+        # Check the rate limits first so a typo in one doesn't silently turn both off
+        rpm = self._rate_limit_value(self.rate_limit_rpm_field, "requests/minute")
+        if rpm is None:
+            return
+        tpm = self._rate_limit_value(self.rate_limit_tpm_field, "tokens/minute")
+        if tpm is None:
+            return
+        # Save temperature, monitoring interval and tagger concurrency
+        with self.settings_manager.transaction():
+            temp_val = float(self.temperature_slider.value())/100.0
+            self.settings_manager.set("temperature", temp_val)
+            try:
+                interval = int(self.monitoring_interval_field.text().strip())
+            except ValueError:
+                interval = 20
+            self.settings_manager.set("monitoring_interval", interval)
+            self.settings_manager.set("monitoring_mode", self.monitoring_mode_dropdown.currentText())
+            try:
+                concurrency = max(1, int(self.tagger_concurrency_field.text().strip()))
+            except ValueError:
+                concurrency = 4
+            self.settings_manager.set("tagger_concurrency", concurrency)
+            self.settings_manager.set("queue_policy", self.queue_policy_dropdown.currentText())
+            self.settings_manager.set("output_sink", self.output_sink_dropdown.currentText())
+            try:
+                chunk_max_tokens = int(self.chunk_max_tokens_field.text().strip())
+                # 0 (or less) sizes chunks from the model's context window
+                chunk_max_tokens = max(512, chunk_max_tokens) if chunk_max_tokens > 0 else 0
+            except ValueError:
+                chunk_max_tokens = 0
+            self.settings_manager.set("chunk_max_tokens", chunk_max_tokens)
+            self.settings_manager.set("chunk_reduce_mode", self.chunk_reduce_mode_dropdown.currentText())
+            self.settings_manager.set("rate_limit_rpm", rpm)
+            self.settings_manager.set("rate_limit_tpm", tpm)
+        self.settings_manager.flush()
+        # Apply the new limits to the shared interface right away
+        if self.openai_interface:
+            self.openai_interface.rate_limiter = RateLimiter(rpm, tpm) if (rpm or tpm) else None
         QMessageBox.information(self, "Success", "Settings saved.")
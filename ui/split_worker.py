@@ -0,0 +1,34 @@
+# project_root/ui/split_worker.py
+
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from text_splitter import SplitWriter, iter_parts, count_parts
+
+class SplitWorker(QThread):
+    """Splits a response and writes the parts off the GUI thread."""
+    progress = pyqtSignal(int, int)  # parts written, total parts
+    result_ready = pyqtSignal(dict)
+
+    def __init__(self, text: str, delimiter: str, regex: bool, writer: SplitWriter, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.delimiter = delimiter
+        self.regex = regex
+        self.writer = writer
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        try:
+            total = count_parts(self.text, self.delimiter, self.regex)
+            result = self.writer.write(
+                iter_parts(self.text, self.delimiter, self.regex),
+                total=total,
+                on_progress=self.progress.emit,
+                cancel_event=self._cancel_event
+            )
+        except Exception as e:
+            result = {"error": str(e)}
+        self.result_ready.emit(result)
@@ -0,0 +1,52 @@
+# project_root/ui/startup_worker.py
+
+from PyQt6.QtCore import QThread, pyqtSignal
+from startup_timing import startup_timer
+from tokenizer_service import tokenizer_service
+
+class TokenizerLoader(QThread):
+    """Loads the encoding for a model off the GUI thread (it may have to download BPE tables)."""
+    loaded = pyqtSignal(object)  # encoding, or None if tiktoken is unavailable
+
+    def __init__(self, model: str = "gpt-4", parent=None):
+        super().__init__(parent)
+        self.model = model
+
+    def run(self):
+        encoding = tokenizer_service.encoder(self.model)
+        startup_timer.task_done("tokenizer")
+        self.loaded.emit(encoding)
+
+class ClientInitWorker(QThread):
+    """Decrypts the API key and builds the OpenAI interface off the GUI thread."""
+    ready = pyqtSignal(object)  # OpenAIInterface, or None on failure
+
+    def __init__(self, settings_manager, secure_storage, parent=None):
+        super().__init__(parent)
+        self.settings_manager = settings_manager
+        self.secure_storage = secure_storage
+
+    def run(self):
+        openai_interface = None
+        try:
+            api_key = self.secure_storage.retrieve_api_key()
+            # Importing openai/httpx is a large part of the startup cost
+            from openai_interface import OpenAIInterface
+            openai_interface = OpenAIInterface.from_settings(self.settings_manager, api_key)
+        except Exception as e:
+            print(f"Error initializing OpenAI client: {str(e)}")
+        startup_timer.task_done("OpenAI client")
+        self.ready.emit(openai_interface)
+
+class ModelListWorker(QThread):
+    """Fetches the available chat models without blocking the window."""
+    models_ready = pyqtSignal(list)
+
+    def __init__(self, openai_interface, parent=None):
+        super().__init__(parent)
+        self.openai_interface = openai_interface
+
+    def run(self):
+        models = self.openai_interface.refresh_models()
+        startup_timer.task_done("model list")
+        self.models_ready.emit(models)
@@ -1,18 +1,34 @@
 # project_root/ui/tagger_tab.py
 
 import os
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton, QComboBox, QFileDialog, QMessageBox, QLineEdit)
-from PyQt6.QtCore import QTimer
-from config import COMBINE_FORMAT
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton, QComboBox, QFileDialog, QMessageBox, QLineEdit,
+                             QCheckBox, QListWidget, QListWidgetItem)
+from PyQt6.QtCore import Qt
+from batch_tagger import BatchTagger
+from job_manifest import JobManifest
+from file_lease import FileLeases
+from output_sinks import create_sink, sink_settings
+from chunking import Chunker
+from tagger_engine import OUTPUT_LAYOUTS
+from .tagger_worker import TaggerWorkerPool, BatchTaggerWorker
+from .folder_watcher import FolderWatcher
 
 class TaggerTab(QWidget):
     def __init__(self, settings_manager):
         super().__init__()
         self.settings_manager = settings_manager
         self.openai_interface = None
+        self.worker_pool = None
+        self.folder_watcher = None
+        self.batch_worker = None
+        # Opened once per process: opening it resets jobs left in flight by a crash
+        self.job_manifest = None
+        self._job_manifest_opened = False
+        # Kept across runs; reopened when its settings change
+        self.output_sink = None
+        self._output_sink_settings = None
         self.monitoring_active = False
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_monitored_folder)
+        self._backlog_overflow = False
 
         layout = QVBoxLayout()
 
@@ -23,6 +39,16 @@ class TaggerTab(QWidget):
         self.tag_criteria_dropdown.setMinimumWidth(300)
         self.tag_criteria_dropdown.setPlaceholderText("Select a criteria file...")
 
+        # Multi-criteria mode: tag each input against every checked criteria file
+        self.multi_criteria_checkbox = QCheckBox("Tag against several criteria files")
+        self.multi_criteria_checkbox.setChecked(self.settings_manager.get("multi_criteria_enabled", False))
+        self.multi_criteria_list = QListWidget()
+        self.multi_criteria_list.setMaximumHeight(120)
+        self.multi_criteria_output_dropdown = QComboBox()
+        # "subfolder" writes tagged/<criteria>/<file>; "prefix" writes tagged/<criteria>_<file>
+        self.multi_criteria_output_dropdown.addItems(OUTPUT_LAYOUTS)
+        self.multi_criteria_output_dropdown.setCurrentText(self.settings_manager.get("multi_criteria_output", "subfolder"))
+
         # Monitored Folder Section
         self.monitored_folder_label = QLabel("Monitored Folder:")
         self.monitored_folder_button = QPushButton("Select Monitored Folder")
@@ -48,6 +74,9 @@ class TaggerTab(QWidget):
         layout.addWidget(self.tag_criteria_label)
         layout.addWidget(self.tag_criteria_button)
         layout.addWidget(self.tag_criteria_dropdown)
+        layout.addWidget(self.multi_criteria_checkbox)
+        layout.addWidget(self.multi_criteria_list)
+        layout.addWidget(self.multi_criteria_output_dropdown)
         layout.addSpacing(15)
 
         layout.addWidget(self.monitored_folder_label)
@@ -68,9 +97,26 @@ class TaggerTab(QWidget):
         self.start_monitoring_button = QPushButton("Start Monitoring")
         self.stop_monitoring_button = QPushButton("Stop Monitoring")
         self.stop_monitoring_button.setEnabled(False)
+
+        # Worker pool progress
+        self.progress_label = QLabel("Queued: 0 | In progress: 0 | Done: 0 | Failed: 0")
+        self.progress_label.setStyleSheet("color: #666; padding: 5px;")
         
         layout.addWidget(self.start_monitoring_button)
         layout.addWidget(self.stop_monitoring_button)
+        layout.addWidget(self.progress_label)
+        layout.addSpacing(15)
+
+        # Batch API controls for large backlogs
+        self.submit_batch_button = QPushButton("Submit Backlog as Batch")
+        self.check_batch_button = QPushButton("Check Batch Jobs")
+        self.batch_status_label = QLabel()
+        self.batch_status_label.setStyleSheet("color: #666; padding: 5px;")
+        self.batch_status_label.setWordWrap(True)
+
+        layout.addWidget(self.submit_batch_button)
+        layout.addWidget(self.check_batch_button)
+        layout.addWidget(self.batch_status_label)
         layout.addStretch()  # Push everything up
 
         self.setLayout(layout)
@@ -89,9 +135,17 @@ class TaggerTab(QWidget):
         self.saved_tagged_button.clicked.connect(self.select_tagged_folder)
         self.start_monitoring_button.clicked.connect(self.start_monitoring)
         self.stop_monitoring_button.clicked.connect(self.stop_monitoring)
+        self.submit_batch_button.clicked.connect(lambda: self.run_batch_action("submit"))
+        self.check_batch_button.clicked.connect(lambda: self.run_batch_action("poll"))
 
         # Add dropdown selection change handler
         self.tag_criteria_dropdown.currentTextChanged.connect(self.on_criteria_file_changed)
+        self.multi_criteria_checkbox.toggled.connect(self.on_multi_criteria_toggled)
+        self.multi_criteria_list.itemChanged.connect(self.on_multi_criteria_changed)
+        self.multi_criteria_output_dropdown.currentTextChanged.connect(
+            lambda text: self.settings_manager.set("multi_criteria_output", text)
+        )
+        self.on_multi_criteria_toggled(self.multi_criteria_checkbox.isChecked())
 
     def set_openai_interface(self, openai_interface):
         """Set the OpenAI interface from RightPanel"""
@@ -102,7 +156,8 @@ class TaggerTab(QWidget):
             QMessageBox.warning(self, "Error", "OpenAI interface not initialized.")
             return
             
-        if not self.tag_criteria_dropdown.currentText():
+        criteria_files = self.selected_criteria_files()
+        if not criteria_files:
             QMessageBox.warning(self, "Error", "Please select a tagging criteria file.")
             return
             
@@ -110,105 +165,165 @@ class TaggerTab(QWidget):
         if not monitored_folder or not os.path.isdir(monitored_folder):
             QMessageBox.warning(self, "Error", "Please select a valid monitored folder.")
             return
+
+        if not self.settings_manager.get("tagged_folder", ""):
+            QMessageBox.warning(self, "Error", "Please select a tagged output folder.")
+            return
+
+        if not self.open_outputs():
+            return
+
+        # Create a fresh pool so concurrency changes in Settings take effect
+        self.worker_pool = TaggerWorkerPool(
+            self.settings_manager,
+            self.openai_interface,
+            criteria_files,
+            concurrency=self.settings_manager.get("tagger_concurrency", 4),
+            queue_size=self.settings_manager.get("tagger_queue_size", 100),
+            manifest=self.job_manifest,
+            chunker=Chunker.from_settings(self.settings_manager),
+            leases=FileLeases.from_settings(self.settings_manager),
+            sink=self.output_sink
+        )
+        self.worker_pool.progress_changed.connect(self.on_progress_changed)
+        self.worker_pool.file_finished.connect(self.on_file_finished)
+        self.worker_pool.start()
             
         self.monitoring_active = True
-        interval = self.settings_manager.get("monitoring_interval", 20) * 1000  # Convert to milliseconds
-        self.timer.start(interval)
+        self._backlog_overflow = False
+        # Scans and queueing run on the watcher's scan thread
+        self.folder_watcher = FolderWatcher(
+            monitored_folder,
+            self.worker_pool.queue_ready_files,
+            mode=self.settings_manager.get("monitoring_mode", "watch"),
+            poll_interval=self.settings_manager.get("monitoring_interval", 20),
+            settle_seconds=self.settings_manager.get("watch_settle_seconds", 2),
+            fallback_interval=self.settings_manager.get("watch_fallback_interval", 300),
+            recursive=self.settings_manager.get("scan_recursive", False),
+            parent=self
+        )
+        self.folder_watcher.scan_finished.connect(self.on_scan_finished)
         self.start_monitoring_button.setEnabled(False)
         self.stop_monitoring_button.setEnabled(True)
+        self.folder_watcher.start()
+
+    def open_outputs(self) -> bool:
+        """Open the job manifest and the output sink shared by live and batch tagging."""
+        if not self._job_manifest_opened:
+            self._job_manifest_opened = True
+            try:
+                self.job_manifest = JobManifest.from_settings(self.settings_manager)
+            except Exception as e:
+                print(f"Job manifest unavailable: {str(e)}")
+
+        if sink_settings(self.settings_manager) != self._output_sink_settings:
+            try:
+                output_sink = create_sink(self.settings_manager)
+            except Exception as e:
+                QMessageBox.warning(self, "Error", f"Could not open the tagger output: {str(e)}")
+                return False
+            if self.output_sink:
+                # Commits what the previous run's last workers still hand it
+                self.output_sink.close()
+            self.output_sink = output_sink
+            self._output_sink_settings = sink_settings(self.settings_manager)
+        return True
 
     def stop_monitoring(self):
         self.monitoring_active = False
-        self.timer.stop()
+        if self.folder_watcher:
+            self.folder_watcher.stop()
+            self.folder_watcher = None
+        if self.worker_pool:
+            self.worker_pool.stop()
         self.start_monitoring_button.setEnabled(True)
         self.stop_monitoring_button.setEnabled(False)
 
-    def check_monitored_folder(self):
+    def on_scan_finished(self, taken):
+        """The watcher handed its ready files to the worker pool; note if the queue was full."""
         if not self.monitoring_active:
             return
-            
-        monitored_folder = self.settings_manager.get("monitored_folder", "")
-        tagged_folder = self.settings_manager.get("tagged_folder", "")
-        
-        if not all([monitored_folder, tagged_folder]):
-            self.stop_monitoring()
+        # If the queue filled up, rescan once it has drained
+        if not taken:
+            self._backlog_overflow = True
+
+    def on_progress_changed(self, queued, in_progress, done, failed):
+        self.progress_label.setText(
+            f"Queued: {queued} | In progress: {in_progress} | Done: {done} | Failed: {failed}"
+        )
+        # Files left behind by a full queue produce no new folder events, so
+        # ask the watcher for another scan once there is room again
+        if self._backlog_overflow and self.folder_watcher and queued <= self.worker_pool.queue_size // 2:
+            self._backlog_overflow = False
+            self.folder_watcher.request_scan()
+
+    def on_file_finished(self, filename, success, message):
+        if not success:
+            print(f"Error processing {filename}: {message}")
+
+    def run_batch_action(self, action):
+        """Submit the backlog to the Batch API or collect finished batch jobs."""
+        if not self.openai_interface:
+            QMessageBox.warning(self, "Error", "OpenAI interface not initialized.")
             return
-            
-        # Get list of files and immediately filter out zero-byte files
-        allowed_extensions = [".txt", ".md"]
-        files_to_process = []
-        
-        for f in os.listdir(monitored_folder):
-            if os.path.splitext(f)[1].lower() not in allowed_extensions:
-                continue
-            
-            input_path = os.path.join(monitored_folder, f)
-            
-            # Check for zero-byte files immediately
-            if os.path.getsize(input_path) == 0:
-                try:
-                    os.remove(input_path)
-                    print(f"Deleted zero-byte file: {f}")
-                except Exception as e:
-                    print(f"Error deleting zero-byte file {f}: {str(e)}")
-                continue
-            
-            files_to_process.append(f)
-                
-        prefix = self.settings_manager.get("tag_prefix", "")
-        for filename in files_to_process:
-            input_path = os.path.join(monitored_folder, filename)
-            if prefix:
-                output_filename = f"{prefix}_{filename}"
-            else:
-                output_filename = filename
-            output_path = os.path.join(tagged_folder, output_filename)
-            
-            # Skip if output file already exists
-            if os.path.exists(output_path):
-                continue
-                
-            try:
-                # Read input file
-                with open(input_path, "r", encoding="utf-8") as f:
-                    input_text = f.read()
-                    
-                # Read criteria file
-                criteria_file = self.tag_criteria_dropdown.currentText()
-                with open(criteria_file, "r", encoding="utf-8") as f:
-                    criteria_content = f.read()
-                    
-                # Combine using the template
-                combined = COMBINE_FORMAT.format(
-                    input_text=input_text.strip(),
-                    criteria_content=criteria_content.strip()
-                )
-                
-                # Send to GPT
-                response = self.openai_interface.send_text(combined)
-                
-                if "error" in response:
-                    print(f"Error processing {filename}: {response['error']}")
-                    continue
-                    
-                # Save the tagged output
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(response["content"])
-                    
-                # Delete the source file after successful processing
-                try:
-                    os.remove(input_path)
-                    print(f"Successfully processed and deleted: {filename}")
-                except Exception as e:
-                    print(f"Error deleting file {filename}: {str(e)}")
-                    
-            except Exception as e:
-                print(f"Error processing {filename}: {str(e)}")
+        if self.batch_worker and self.batch_worker.isRunning():
+            return
+        if action == "submit":
+            if self.monitoring_active:
+                QMessageBox.warning(self, "Error", "Stop monitoring before submitting the backlog as a batch.")
+                return
+            if self.multi_criteria_checkbox.isChecked():
+                QMessageBox.warning(self, "Error", "Batch mode supports a single criteria file.")
+                return
+            if not self.tag_criteria_dropdown.currentText():
+                QMessageBox.warning(self, "Error", "Please select a tagging criteria file.")
+                return
+            if not os.path.isdir(self.settings_manager.get("monitored_folder", "")):
+                QMessageBox.warning(self, "Error", "Please select a valid monitored folder.")
+                return
+
+        if not self.open_outputs():
+            return
+        batch_tagger = BatchTagger(self.settings_manager, self.openai_interface,
+                                   self.tag_criteria_dropdown.currentText(),
+                                   manifest=self.job_manifest, sink=self.output_sink)
+        self.batch_worker = BatchTaggerWorker(batch_tagger, action, self)
+        self.batch_worker.finished_with_status.connect(self.batch_status_label.setText)
+        self.batch_worker.finished.connect(self.on_batch_worker_finished)
+        self.submit_batch_button.setEnabled(False)
+        self.check_batch_button.setEnabled(False)
+        self.batch_status_label.setText("Submitting batch..." if action == "submit" else "Checking batch jobs...")
+        self.batch_worker.start()
+
+    def on_batch_worker_finished(self):
+        self.submit_batch_button.setEnabled(True)
+        self.check_batch_button.setEnabled(True)
+
+    def selected_criteria_files(self):
+        """Criteria files to tag against: the checked ones in multi-criteria mode, else the dropdown's."""
+        if self.multi_criteria_checkbox.isChecked():
+            return [
+                self.multi_criteria_list.item(i).text()
+                for i in range(self.multi_criteria_list.count())
+                if self.multi_criteria_list.item(i).checkState() == Qt.CheckState.Checked
+            ]
+        criteria_file = self.tag_criteria_dropdown.currentText()
+        return [criteria_file] if criteria_file else []
+
+    def on_multi_criteria_toggled(self, checked):
+        self.settings_manager.set("multi_criteria_enabled", checked)
+        self.multi_criteria_list.setVisible(checked)
+        self.multi_criteria_output_dropdown.setVisible(checked)
+        self.tag_criteria_dropdown.setVisible(not checked)
+
+    def on_multi_criteria_changed(self, item):
+        self.settings_manager.set("tag_criteria_files", self.selected_criteria_files())
 
     def select_criteria_directory(self):
         directory = QFileDialog.getExistingDirectory(self, "Select Criteria Directory")
         if directory:
             self.populate_file_dropdown(self.tag_criteria_dropdown, directory)
+            self.populate_criteria_list(directory)
             # The selection change will be handled by on_criteria_file_changed
 
     def select_monitored_folder(self):
@@ -232,11 +347,25 @@ class TaggerTab(QWidget):
             full_path = os.path.join(directory, f)
             dropdown.addItem(full_path)
 
+    def populate_criteria_list(self, directory):
+        checked = set(self.settings_manager.get("tag_criteria_files", []))
+        # Don't save the selection while the list is being rebuilt
+        self.multi_criteria_list.blockSignals(True)
+        self.multi_criteria_list.clear()
+        for i in range(self.tag_criteria_dropdown.count()):
+            full_path = self.tag_criteria_dropdown.itemText(i)
+            item = QListWidgetItem(full_path)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if full_path in checked else Qt.CheckState.Unchecked)
+            self.multi_criteria_list.addItem(item)
+        self.multi_criteria_list.blockSignals(False)
+
     def _load_tag_criteria(self):
         criteria_file = self.settings_manager.get("tag_criteria_file", "")
         if criteria_file and os.path.exists(criteria_file):
             criteria_dir = os.path.dirname(criteria_file)
             self.populate_file_dropdown(self.tag_criteria_dropdown, criteria_dir)
+            self.populate_criteria_list(criteria_dir)
             # Set the dropdown to the saved full path
             self.tag_criteria_dropdown.setCurrentText(criteria_file)
 
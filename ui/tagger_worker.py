@@ -0,0 +1,69 @@
+# project_root/ui/tagger_worker.py
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from tagger_engine import TaggerEngine
+
+class TaggerWorkerPool(QObject):
+    """Qt front end for TaggerEngine that reports worker progress through signals."""
+    file_started = pyqtSignal(str)
+    file_finished = pyqtSignal(str, bool, str)  # filename, success, message
+    progress_changed = pyqtSignal(int, int, int, int)  # queued, in progress, done, failed
+
+    def __init__(self, settings_manager, openai_interface, criteria_files,
+                 concurrency: int = 4, queue_size: int = 100, manifest=None, chunker=None, leases=None,
+                 sink=None):
+        super().__init__()
+        # Signals emitted from the worker threads are delivered on the GUI thread
+        self.engine = TaggerEngine(
+            settings_manager, openai_interface, criteria_files,
+            concurrency=concurrency, queue_size=queue_size, manifest=manifest, chunker=chunker, leases=leases, sink=sink,
+            on_progress=self.progress_changed.emit,
+            on_file_started=self.file_started.emit,
+            on_file_finished=self.file_finished.emit
+        )
+
+    @property
+    def queue_size(self) -> int:
+        return self.engine.queue.maxsize
+
+    def start(self):
+        self.engine.start()
+
+    def stop(self):
+        self.engine.stop()
+
+    def is_running(self) -> bool:
+        return self.engine.is_running()
+
+    def queue_ready_files(self, ready_files) -> bool:
+        return self.engine.queue_ready_files(ready_files)
+
+
+class BatchTaggerWorker(QThread):
+    """Runs one BatchTagger action ("submit" or "poll") off the GUI thread."""
+    finished_with_status = pyqtSignal(str)
+
+    def __init__(self, batch_tagger, action: str, parent=None):
+        super().__init__(parent)
+        self.batch_tagger = batch_tagger
+        self.action = action
+
+    def run(self):
+        try:
+            if self.action == "submit":
+                job = self.batch_tagger.submit()
+                if job is None:
+                    self.finished_with_status.emit("Nothing to submit")
+                    return
+                self.finished_with_status.emit(f"Submitted batch {job['batch_id']} with {len(job['files'])} files")
+                return
+            self.batch_tagger.poll()
+            jobs = self.batch_tagger.open_jobs()
+            if not jobs:
+                self.finished_with_status.emit("No open batch jobs")
+                return
+            self.finished_with_status.emit(" | ".join(
+                f"{job['batch_id']}: {job['status']}" for job in jobs
+            ))
+        except Exception as e:
+            self.finished_with_status.emit(f"Batch error: {str(e)}")
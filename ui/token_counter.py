@@ -0,0 +1,68 @@
+# project_root/ui/token_counter.py
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+from tokenizer_service import tokenizer_service
+
+# Paragraphs longer than this are split further on line breaks so a single
+# huge paragraph doesn't have to be re-encoded on every edit
+MAX_BLOCK_CHARS = 16 * 1024
+
+def split_blocks(text: str):
+    """Split text into paragraph-sized blocks and return (blocks, separator_count)."""
+    blocks = []
+    separators = 0
+    paragraphs = text.split("\n\n")
+    separators += len(paragraphs) - 1
+    for paragraph in paragraphs:
+        if len(paragraph) <= MAX_BLOCK_CHARS:
+            blocks.append(paragraph)
+            continue
+        lines = paragraph.split("\n")
+        separators += len(lines) - 1
+        blocks.extend(lines)
+    return blocks, separators
+
+class BlockTokenCounter:
+    """Counts tokens block by block through the shared tokenizer service.
+
+    The service remembers counts by content, so after an edit only the
+    changed blocks are encoded again. Each paragraph separator is counted
+    as one token, which matches how the GPT encodings tokenize blank lines
+    closely enough for a live counter.
+    """
+
+    def __init__(self, model: str = "gpt-4"):
+        self.model = model
+
+    def set_model(self, model: str):
+        self.model = model
+
+    @property
+    def exact(self) -> bool:
+        return tokenizer_service.is_exact(self.model)
+
+    def count(self, text: str) -> int:
+        blocks, separators = split_blocks(text)
+        return separators + sum(tokenizer_service.count_batch(blocks, self.model))
+
+class _TokenCountSignals(QObject):
+    finished = pyqtSignal(int, int, bool)  # generation, token count, exact
+
+class TokenCountTask(QRunnable):
+    """Counts tokens for a text snapshot on a QThreadPool thread."""
+
+    def __init__(self, counter: BlockTokenCounter, text: str, generation: int):
+        super().__init__()
+        self.counter = counter
+        self.text = text
+        self.generation = generation
+        self.signals = _TokenCountSignals()
+
+    def run(self):
+        try:
+            count, exact = self.counter.count(self.text), self.counter.exact
+        except Exception as e:
+            # Fallback to simple counting if tokenizer fails
+            print(f"Tokenizer error: {str(e)}")
+            count, exact = len(self.text.split()), False
+        self.signals.finished.emit(self.generation, count, exact)